@@ -0,0 +1,75 @@
+# Benchmark độ trễ mỗi nước của các mức độ khó (engine.DIFFICULTY_PROFILES)
+"""
+Chạy: python benchmarks/latency_benchmark.py [--plies 10] [--levels easy hard]
+Với mỗi mức độ khó, từ mỗi thế cờ trong positions.POSITIONS engine tự chơi --plies nước (cả hai bên
+dùng cùng mức, không sách khai cuộc / bảng tàn cuộc) và đo thời gian từng lời gọi engine.engine.
+Báo p50 / p99 / max độ trễ và độ sâu trung bình đạt được. p99 vượt move_time của mức đó quá --slack
+(tỉ lệ) thì thoát với mã 1.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import engine  # noqa: E402
+from board.fen import board_from_fen  # noqa: E402
+from positions import POSITIONS  # noqa: E402
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure_level(profile, plies: int = 10, positions=None, log=print) -> dict:
+    """Độ trễ (giây) của từng nước khi engine tự chơi ở mức `profile`."""
+    log = log or (lambda message: None)
+    latencies = []
+    depths = []
+    for name, fen in (positions or POSITIONS).items():
+        board = board_from_fen(fen)
+        for _ in range(plies):
+            before = len(board.move_history)
+            start = time.perf_counter()
+            stats = engine.engine(board, board.current_player, type='alpha_beta', book=None, tablebase=None,
+                                  profile=profile)
+            latencies.append(time.perf_counter() - start)
+            if stats is not None and stats.iterations:
+                completed = [it['depth'] for it in stats.iterations if it['completed']]
+                depths.append(completed[-1] if completed else 0)
+            if len(board.move_history) == before:
+                break  # hết nước đi
+        log(f"  [{profile.name}/{name}] {len(latencies)} nước, max {max(latencies):.3f}s")
+    return {
+        'moves': len(latencies),
+        'p50': percentile(latencies, 0.50),
+        'p99': percentile(latencies, 0.99),
+        'max': max(latencies),
+        'mean_depth': statistics.fmean(depths) if depths else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    names = [profile.name for profile in engine.DIFFICULTY_PROFILES.values()]
+    parser = argparse.ArgumentParser(description='Benchmark độ trễ các mức độ khó của AI Cờ Tướng')
+    parser.add_argument('--plies', type=int, default=10, help='Số nước tự chơi từ mỗi thế cờ')
+    parser.add_argument('--levels', nargs='*', choices=names, default=names)
+    parser.add_argument('--slack', type=float, default=0.10, help='Dư cho p99 so với move_time (0.10 = 10%%)')
+    args = parser.parse_args()
+
+    failures = []
+    for level in args.levels:
+        profile = engine.difficulty_profile(level)
+        result = measure_level(profile, args.plies)
+        print(f"[{profile.name}] move_time {profile.move_time}s, {result['moves']} nước: p50 {result['p50']:.3f}s, "
+              f"p99 {result['p99']:.3f}s, max {result['max']:.3f}s, độ sâu TB {result['mean_depth']:.1f}")
+        if profile.move_time is not None and result['p99'] > profile.move_time * (1 + args.slack):
+            failures.append(f"{profile.name} p99 {result['p99']:.3f}s > {profile.move_time}s")
+    if failures:
+        print("Vượt độ trễ: " + '; '.join(failures))
+        sys.exit(1)
@@ -1,40 +1,200 @@
+# Benchmark bộ nhớ: kích thước thế cờ, đỉnh bộ nhớ khi tìm kiếm, cấp phát theo nút, dung lượng cache
+"""
+Chạy: python benchmarks/memory_benchmark.py [--depth 3] [--top 15] [--max-peak-kb 64 ...]
+    1. Board: số byte cho mỗi thế cờ (dựng từ FEN và board.copy() như lúc tìm kiếm), đo bằng tracemalloc
+    2. Tìm kiếm cố định (AlphaBeta, độ sâu --depth, mặc định thế kaiju): đỉnh bộ nhớ trên mức nền, và
+       - cấp phát mỗi nút (churn): ở một số nút trong (mỗi --expand-every nút), chụp snapshot khi vào nút và
+         ngay sau khi nút sinh + sắp xếp xong nước đi (get_valid_moves, list1_2list, order_moves, tuple nước
+         đi), lúc các biến tạm này còn sống; hiệu hai snapshot là số khối / byte một lần mở nút cấp phát rồi
+         giải phóng. Ở nút lá đo đỉnh bộ nhớ tạm của lần đánh giá (reset_peak).
+       - còn sống theo ply (retained): snapshot ở nút lá so với lúc bắt đầu, chia cho độ sâu; đây là bộ nhớ
+         giữ trên đường đi từ gốc, không phải cấp phát mỗi nút.
+       Nhóm theo file:dòng để thấy dòng nào cấp phát.
+    3. Dung lượng cache: EvalCache ở các kích thước cấu hình, bảng mẫu an toàn Tướng.
+Vượt một trong các ngưỡng --max-* (mặc định đo ở kaiju độ sâu 3, cộng ~30% dư) thì thoát với mã 1.
+"""
+import argparse
+import os
 import sys
 import tracemalloc
-from src.engine import AIEngine
-from src.board.board import BanCo
 
-def test_tailen_memory():
-    """Kiểm tra bộ nhớ khi tải nhiều bàn cờ"""
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from board.fen import board_from_fen  # noqa: E402
+from evaluation.eval_cache import DEFAULT_EVAL_CACHE_SIZE, EvalCache  # noqa: E402
+from evaluation.king_safety import PATTERN_TABLE  # noqa: E402
+from positions import POSITIONS  # noqa: E402
+import search.alphabeta as search_module  # noqa: E402
+from search.alphabeta import AlphaBeta  # noqa: E402
+
+# Chỉ tính cấp phát do code của engine (bỏ tracemalloc, fnmatch, chính benchmark...)
+_ENGINE_ONLY = (tracemalloc.Filter(True, os.path.join(ROOT, 'src', '*')),)
+
+
+class SampledAlphaBeta(AlphaBeta):
+    """
+    AlphaBeta đo bộ nhớ ở mỗi `sample_every` nút lá và mỗi `expand_every` nút trong (tối đa max_samples lần
+    mỗi loại):
+    leaf_snapshots (còn sống ở nút lá), leaf_peaks (byte tạm khi đánh giá lá), expansions (cặp snapshot
+    khi vào nút trong và sau khi sắp xếp nước đi, xem ordered()).
+    """
+
+    def __init__(self, sample_every: int = 50, max_samples: int = 20, expand_every: int = 10, **kwargs):
+        super().__init__(**kwargs)
+        self.sample_every = sample_every
+        self.expand_every = expand_every
+        self.max_samples = max_samples
+        self.leaves = 0
+        self.interior = 0
+        self.leaf_snapshots = []
+        self.leaf_peaks = []
+        self.expansions = []
+        self._entry = None
+
+    def search(self, board, depth, is_maximizing, alpha, beta):
+        if depth == 0:
+            self.leaves += 1
+            if self.leaves % self.sample_every == 0 and len(self.leaf_snapshots) < self.max_samples:
+                self.leaf_snapshots.append(tracemalloc.take_snapshot().filter_traces(_ENGINE_ONLY))
+                current = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                result = super().search(board, depth, is_maximizing, alpha, beta)
+                self.leaf_peaks.append(tracemalloc.get_traced_memory()[1] - current)
+                return result
+        else:
+            self.interior += 1
+            if self.interior % self.expand_every == 0 and len(self.expansions) < self.max_samples:
+                self._entry = tracemalloc.take_snapshot().filter_traces(_ENGINE_ONLY)
+                result = super().search(board, depth, is_maximizing, alpha, beta)
+                self._entry = None  # nút cắt sớm (TT, ...) không sắp xếp nước đi: bỏ mẫu
+                return result
+        return super().search(board, depth, is_maximizing, alpha, beta)
+
+    def ordered(self, flat_moves):
+        """Gọi ngay sau order_moves của nút đang mở, khi list nước đi và tuple của nút còn sống."""
+        if self._entry is not None:
+            after = tracemalloc.take_snapshot().filter_traces(_ENGINE_ONLY)
+            self.expansions.append((self._entry, after))
+            self._entry = None
+        return flat_moves
+
+
+def _by_line(pairs, divisor):
+    """Cộng các diff dương (snapshot sau so với trước) theo file:dòng, chia cho divisor."""
+    lines = {}
+    for before, after in pairs:
+        for diff in after.compare_to(before, 'lineno'):
+            if diff.size_diff <= 0:
+                continue
+            frame = diff.traceback[0]
+            key = f"{os.path.relpath(frame.filename, ROOT)}:{frame.lineno}"
+            size, blocks = lines.get(key, (0, 0))
+            lines[key] = (size + diff.size_diff, blocks + diff.count_diff)
+    divisor = max(divisor, 1)
+    per = {key: (size / divisor, blocks / divisor) for key, (size, blocks) in lines.items()}
+    return dict(sorted(per.items(), key=lambda item: -item[1][0]))
+
+
+def board_footprint(fen: str, count: int = 200) -> dict:
+    """Số byte trung bình cho mỗi Board dựng từ FEN và mỗi bản sao board.copy()."""
     tracemalloc.start()
-    
-    # Ghi nhận trạng thái bộ nhớ ban đầu
-    snapshot1 = tracemalloc.take_snapshot()
-    
-    # Tạo 100 bàn cờ
-    danh_sach_ban_co = [BanCo() for _ in range(100)]
-    
-    # Ghi nhận sau khi tạo
-    snapshot2 = tracemalloc.take_sapshot()
-    
-    # Phân tích khác biệt
-    stats = snapshot2.compare_to(snapshot1, 'lineno')
-    print("[Memory] Tiêu hao cho 100 bàn cờ:", stats[0].size_diff/1024, "KB")
-
-def test_engine_memory():
-    """Kiểm tra bộ nhớ cho Engine AI"""
-    engine = AIEngine()
-    print("[Memory] Kích thước Engine:", sys.getsizeof(engine), "bytes")
-    
-    # Test memory khi tính nước đi
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        boards = [board_from_fen(fen) for _ in range(count)]
+        from_fen = (tracemalloc.get_traced_memory()[0] - before) / count
+        before = tracemalloc.get_traced_memory()[0]
+        copies = [boards[0].copy() for _ in range(count)]
+        copied = (tracemalloc.get_traced_memory()[0] - before) / count
+    finally:
+        tracemalloc.stop()
+    del boards, copies
+    return {'from_fen': from_fen, 'copy': copied}
+
+
+def search_memory(fen: str, depth: int = 3, sample_every: int = 50, max_samples: int = 20,
+                  expand_every: int = 10) -> dict:
+    """Đỉnh bộ nhớ, cấp phát mỗi lần mở nút (churn) và bộ nhớ còn sống theo ply cho một lần tìm kiếm cố định."""
+    board = board_from_fen(fen)
+    search = SampledAlphaBeta(sample_every, max_samples, expand_every)
+    real_order_moves = search_module.order_moves
+    search_module.order_moves = lambda *args, **kwargs: search.ordered(real_order_moves(*args, **kwargs))
     tracemalloc.start()
-    before = tracemalloc.take_snapshot()
-    
-    engine.chay(BanCo())
-    
-    after = tracemalloc.take_snapshot()
-    stats = after.compare_to(before, 'lineno')
-    print("[Memory] Tiêu hao khi tính nước:", stats[0].size_diff/1024, "KB")
+    try:
+        # Đỉnh đo ở một lần chạy riêng không lấy mẫu: các snapshot giữ lại cũng được tracemalloc tính vào
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        AlphaBeta().search_root(board.copy(), depth, True)
+        peak = tracemalloc.get_traced_memory()[1] - start
+        baseline = tracemalloc.take_snapshot().filter_traces(_ENGINE_ONLY)
+        search.search_root(board, depth, True)
+    finally:
+        tracemalloc.stop()
+        search_module.order_moves = real_order_moves
+    churn = _by_line(search.expansions, len(search.expansions))
+    retained = _by_line([(baseline, snapshot) for snapshot in search.leaf_snapshots],
+                        len(search.leaf_snapshots) * depth)
+    return {
+        'nodes': search.total_nodes,
+        'peak_bytes': peak,
+        'expansions': len(search.expansions),
+        'bytes_per_node': sum(size for size, _ in churn.values()),
+        'blocks_per_node': sum(blocks for _, blocks in churn.values()),
+        'by_line': churn,
+        'leaf_peak_bytes': sum(search.leaf_peaks) / max(len(search.leaf_peaks), 1),
+        'leaves': len(search.leaf_snapshots),
+        'retained_bytes_per_ply': sum(size for size, _ in retained.values()),
+        'retained_blocks_per_ply': sum(blocks for _, blocks in retained.values()),
+        'retained_by_line': retained,
+    }
+
+
+def cache_footprint(sizes=(1 << 12, DEFAULT_EVAL_CACHE_SIZE, 1 << 20)) -> dict:
+    footprint = {f'EvalCache({size})': EvalCache(size).nbytes() for size in sizes}
+    footprint[f'PatternTable({PATTERN_TABLE.size})'] = PATTERN_TABLE.nbytes()
+    return footprint
+
 
 if __name__ == "__main__":
-    test_tailen_memory()
-    test_engine_memory()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Benchmark bộ nhớ AI Cờ Tướng')
+    parser.add_argument('--position', default='kaiju', choices=sorted(POSITIONS))
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--sample-every', type=int, default=50, help='Chụp snapshot ở mỗi N nút lá')
+    parser.add_argument('--expand-every', type=int, default=10, help='Đo cấp phát ở mỗi N nút trong')
+    parser.add_argument('--top', type=int, default=15, help='Số dòng cấp phát nhiều nhất cần in')
+    parser.add_argument('--max-board-bytes', type=float, default=17000, help='Ngưỡng byte / board.copy()')
+    parser.add_argument('--max-peak-kb', type=float, default=64, help='Ngưỡng đỉnh bộ nhớ khi tìm kiếm (KB)')
+    parser.add_argument('--max-blocks-per-node', type=float, default=60, help='Ngưỡng số khối cấp phát mỗi lần mở nút')
+    args = parser.parse_args()
+    fen = POSITIONS[args.position]
+
+    boards = board_footprint(fen)
+    print(f"[Board] {boards['from_fen']:.0f} byte / thế cờ từ FEN, {boards['copy']:.0f} byte / board.copy()")
+
+    result = search_memory(fen, args.depth, args.sample_every, expand_every=args.expand_every)
+    print(f"[Tìm kiếm] {args.position} độ sâu {args.depth}: {result['nodes']} nút, "
+          f"đỉnh {result['peak_bytes'] / 1024:.1f} KB")
+    print(f"  Cấp phát mỗi lần mở nút: {result['bytes_per_node']:.0f} byte / "
+          f"{result['blocks_per_node']:.1f} khối ({result['expansions']} mẫu)")
+    for key, (size, blocks) in list(result['by_line'].items())[:args.top]:
+        print(f"    {key:48s} {size:8.0f} byte {blocks:7.1f} khối / nút")
+    print(f"  Bộ nhớ tạm khi đánh giá lá: {result['leaf_peak_bytes']:.0f} byte")
+    print(f"  Còn sống theo ply (giữ trên đường đi): {result['retained_bytes_per_ply']:.0f} byte / "
+          f"{result['retained_blocks_per_ply']:.1f} khối ({result['leaves']} mẫu)")
+    for key, (size, blocks) in list(result['retained_by_line'].items())[:args.top]:
+        print(f"    {key:48s} {size:8.0f} byte {blocks:7.1f} khối / ply")
+
+    for name, size in cache_footprint().items():
+        print(f"[Cache] {name}: {size / 1024:.0f} KB")
+
+    failures = []
+    if boards['copy'] > args.max_board_bytes:
+        failures.append(f"board.copy() {boards['copy']:.0f} > {args.max_board_bytes:.0f} byte")
+    if result['peak_bytes'] / 1024 > args.max_peak_kb:
+        failures.append(f"đỉnh {result['peak_bytes'] / 1024:.1f} > {args.max_peak_kb:.1f} KB")
+    if result['blocks_per_node'] > args.max_blocks_per_node:
+        failures.append(f"{result['blocks_per_node']:.1f} > {args.max_blocks_per_node:.1f} khối / nút")
+    if failures:
+        print("Hồi quy bộ nhớ: " + '; '.join(failures))
+        sys.exit(1)
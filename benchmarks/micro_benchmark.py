@@ -0,0 +1,195 @@
+# Microbenchmark các hàm cơ bản của bàn cờ / đánh giá trên bộ thế cờ chuẩn
+"""
+Chạy: python benchmarks/micro_benchmark.py [--filter check] [--history benchmarks/micro_history.jsonl]
+Mỗi benchmark là một hàm chạy một lượt qua mọi thế cờ trong positions.POSITIONS và trả về số
+phép đo đã gọi; kết quả tính theo micro giây / phép.
+    - warmup lượt chạy bỏ đi, rồi repeat mẫu, mỗi mẫu chạy đủ số lượt để dài ít nhất --min-time giây
+    - báo min / median / mean / stdev của các mẫu
+Với --history: ghi nối tiếp một dòng JSON (commit, thời điểm, median từng benchmark) và so với
+dòng trước đó; median chậm hơn quá --threshold được đánh dấu (thoát mã 1 nếu có --fail-on-regression).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from board.fen import board_from_fen  # noqa: E402
+from positions import POSITIONS  # noqa: E402
+from utils.move_generation import checkAnquan, checkKongjian, checkShizhan, checkShizhi  # noqa: E402
+
+DEFAULT_HISTORY = os.path.join(ROOT, 'benchmarks', 'micro_history.jsonl')
+PIECE_CLASSES = ('Ju', 'Ma', 'Xiang', 'Shi', 'JiangShuai', 'Pao', 'BingZu')
+
+
+def _boards():
+    return [board_from_fen(fen) for fen in POSITIONS.values()]
+
+
+def _pieces(board, class_name):
+    return [piece for row in board.board for piece in row
+            if piece is not None and type(piece).__name__ == class_name]
+
+
+def build_benchmarks() -> dict:
+    """{tên: hàm không tham số trả về số phép đã gọi}; thế cờ được dựng sẵn, không tính vào thời gian."""
+    boards = _boards()
+    benchmarks = {}
+
+    for class_name in PIECE_CLASSES:
+        cases = [(board, piece) for board in boards for piece in _pieces(board, class_name)]
+
+        def valid_moves(cases=cases):
+            for board, piece in cases:
+                piece.get_valid_moves(board)
+            return len(cases)
+        benchmarks[f'get_valid_moves[{class_name}]'] = valid_moves
+
+    def is_in_check():
+        for board in boards:
+            board.is_in_check('red')
+            board.is_in_check('black')
+        return 2 * len(boards)
+
+    def get_legal_moves():
+        for board in boards:
+            board.get_legal_moves(board.current_player)
+        return len(boards)
+
+    def is_checkmate():
+        for board in boards:
+            board.is_checkmate(board.current_player)
+        return len(boards)
+
+    def copy():
+        for board in boards:
+            board.copy()
+        return len(boards)
+
+    moves = [(board, board.get_legal_moves(board.current_player)) for board in boards]
+
+    def move_undo():
+        count = 0
+        for board, legal in moves:
+            for from_pos, to_pos in legal:
+                captured = board.move_piece(from_pos, to_pos)
+                board.undo_move(from_pos, to_pos, captured)
+            count += len(legal)
+        return count
+
+    benchmarks.update({
+        'Board.is_in_check': is_in_check,
+        'Board.get_legal_moves': get_legal_moves,
+        'Board.is_checkmate': is_checkmate,
+        'Board.copy': copy,
+        'move_piece+undo_move': move_undo,
+    })
+    for evaluate in (checkShizhi, checkShizhan, checkKongjian, checkAnquan):
+        def evaluation(evaluate=evaluate):
+            for board in boards:
+                evaluate(board, 'red')
+            return len(boards)
+        benchmarks[evaluate.__name__] = evaluation
+    return benchmarks
+
+
+def measure(func, warmup: int = 2, repeat: int = 7, min_time: float = 0.05) -> dict:
+    """Thống kê micro giây / phép qua `repeat` mẫu."""
+    for _ in range(warmup):
+        func()
+    start = time.perf_counter()
+    ops = func()
+    loops = max(1, int(min_time / max(time.perf_counter() - start, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ops = 0
+        for _ in range(loops):
+            ops += func()
+        samples.append((time.perf_counter() - start) / ops * 1e6)
+    return {
+        'ops': ops,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def run(name_filter: str = '', warmup: int = 2, repeat: int = 7, min_time: float = 0.05, log=print) -> dict:
+    log = log or (lambda message: None)
+    results = {}
+    for name, func in build_benchmarks().items():
+        if name_filter not in name:
+            continue
+        results[name] = stats = measure(func, warmup, repeat, min_time)
+        log(f"{name:32s} median {stats['median']:10.2f} µs  min {stats['min']:10.2f}  "
+            f"mean {stats['mean']:10.2f}  stdev {stats['stdev']:8.2f}  ({stats['ops']} phép/mẫu)")
+    return results
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def append_history(path: str, results: dict, threshold: float = 0.10, log=print) -> list:
+    """Ghi nối tiếp vào file lịch sử; trả về các benchmark chậm hơn dòng trước quá threshold."""
+    log = log or (lambda message: None)
+    previous = None
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            lines = [line for line in f if line.strip()]
+        previous = json.loads(lines[-1]) if lines else None
+    entry = {'commit': _commit(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+             'python': sys.version.split()[0],
+             'median_us': {name: stats['median'] for name, stats in results.items()}}
+    regressions = []
+    if previous is not None:
+        log(f"So với {previous['commit']} ({previous['time']}):")
+        for name, median in entry['median_us'].items():
+            before = previous['median_us'].get(name)
+            if not before:
+                continue
+            change = median / before - 1
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressions.append(name)
+            log(f"  {name:32s} {before:10.2f} -> {median:10.2f} µs ({change:+.1%}){flag}")
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, sort_keys=True) + '\n')
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Microbenchmark các hàm cơ bản của AI Cờ Tướng')
+    parser.add_argument('--filter', default='', help='Chỉ chạy benchmark có tên chứa chuỗi này')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--min-time', type=float, default=0.05, help='Thời gian tối thiểu mỗi mẫu (giây)')
+    parser.add_argument('--output', help='Ghi thống kê đầy đủ ra JSON')
+    parser.add_argument('--history', nargs='?', const=DEFAULT_HISTORY,
+                        help=f'Ghi nối tiếp vào file lịch sử (mặc định {DEFAULT_HISTORY})')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    results = run(args.filter, args.warmup, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.history:
+        regressions = append_history(args.history, results, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"Hồi quy hiệu năng: {', '.join(regressions)}")
+            sys.exit(1)
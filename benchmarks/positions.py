@@ -0,0 +1,8 @@
+# Bộ thế cờ chuẩn dùng chung cho các benchmark (FEN, Đỏ viết hoa, bên đi sau dấu cách)
+POSITIONS = {
+    'kaiju': 'rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w',  # Khai cuộc (开局)
+    'zhongpan': 'r2akab2/7r1/1cn1b1n2/p1p1p3p/6p2/2P6/P3P1P1P/1CN1B1N2/4A4/R2AK1BR1 w',  # Trung cuộc (中局)
+    'canju': '4ka3/4a4/4b4/9/2p6/9/9/4B4/9/3K1R3 w',  # Tàn cuộc (残局)
+    'shuangche': '4k4/4a4/3a5/9/9/9/9/9/R8/4K3R w',  # Song Xa (双车)
+    'shuangpao': '2bakab2/9/4c4/p3p3p/9/9/P3P3P/1C2C4/9/2BAKAB2 w',  # Song Pháo (双炮)
+}
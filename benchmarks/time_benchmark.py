@@ -1,42 +1,122 @@
+# Benchmark tìm kiếm (macro): các thế cờ chuẩn ở độ sâu cố định và số nút cố định
+"""
+Chạy: python benchmarks/time_benchmark.py --output bench.json --baseline [benchmarks/baseline_time.json]
+Mỗi thế cờ trong positions.POSITIONS được tìm qua engine.engine (không sách khai cuộc, không
+bảng tàn cuộc, không cache dùng chung) theo hai chế độ:
+    depth  Alpha-beta đến độ sâu --depth
+    nodes  iterative deepening với ngân sách --nodes nút (đo nps khi số nút bằng nhau)
+Báo thời gian (tốt nhất trong --repeat lần), số nút, nps, nước đi tốt nhất; ghi JSON nếu có --output.
+Với --baseline (không ghi đường dẫn thì dùng DEFAULT_BASELINE, file tham chiếu có trong repo): so
+thời gian từng trường hợp với file baseline, chậm hơn quá --threshold là hồi quy
+(thoát với mã 1). Số nút khác baseline nghĩa là cây tìm kiếm đã đổi, nên in cảnh báo.
+--save-baseline ghi kết quả lần chạy này làm baseline mới.
+"""
 import argparse
+import json
+import os
+import sys
 import time
-from src.engine import AIEngine
-from src.board.board import BanCo
-
-def benchmark_hethong():
-    """Chạy benchmark hệ thống với các test case tiêu chuẩn"""
-    test_cases = [
-        ("Khai cuộc", "kaiju"), # Khai cuộc (开局)
-        ("Trung cuộc", "zhongpan"), # Trung cuộc (中局)
-        ("Tàn cuộc", "canju") # Tàn cuộc (残局)
-    ]
-
-    for ten, loai in test_cases:
-        ban_co = BanCo.setup_tu_vi_tri(loai)
-        engine = AIEngine(shendu=4)
-        
-        start = time.perf_counter()
-        engine.chay(ban_co)
-        thoi_gian = time.perf_counter() - start
-        
-        print(f"[{ten}] Độ sâu 4: {thoi_gian:.2f}s")
-
-def benchmark_dacbiet():
-    """Các thế cờ đặc biệt (特殊棋局 - Tèshū Qíjú)"""
-    # Test thế "Song Xa Vấn Sát" (双车问杀 - Shuāng Jū Wèn Shā)
-    ban_co = BanCo.setup_tu_vi_tri("shuangche")
-    engine = AIEngine(shendu=5)
-    
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import engine  # noqa: E402
+from board.fen import board_from_fen  # noqa: E402
+from positions import POSITIONS  # noqa: E402
+from records.notation import format_iccs  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline_time.json')
+
+
+def run_case(fen: str, mode: str, limit: int, quiescence: bool = False) -> dict:
+    """Một lần tìm kiếm; trả về thời gian, số nút, nps, nước đi (ICCS)."""
+    board = board_from_fen(fen)
+    color = board.current_player
+    settings = {'type': 'alpha_beta', 'book': None, 'tablebase': None, 'eval_cache': None,
+                'quiescence': quiescence}
+    if mode == 'depth':
+        settings['difficulty'] = limit
+    else:
+        settings.update(difficulty=64, nodes=limit)
     start = time.perf_counter()
-    engine.chay(ban_co)
-    print(f"Song Xa Vấn Sát: {time.perf_counter() - start:.2f}s")
+    stats = engine.engine(board, color, **settings)
+    elapsed = time.perf_counter() - start
+    move = format_iccs(*board.move_history[-1][:2]) if board.move_history else None
+    return {
+        'time': elapsed,
+        'nodes': stats.total_nodes,
+        'nps': stats.total_nodes / elapsed if elapsed > 0 else 0.0,
+        'depth': stats.iterations[-1]['depth'] if stats.iterations else 0,
+        'best_move': move,
+    }
+
+
+def run_suite(depth: int = 3, nodes: int = 5000, repeat: int = 1, quiescence: bool = False,
+              positions=None, log=print) -> dict:
+    """{'<thế cờ>/<chế độ>': kết quả}; thời gian là lần nhanh nhất trong `repeat` lần."""
+    log = log or (lambda message: None)
+    results = {}
+    for name, fen in (positions or POSITIONS).items():
+        for mode, limit in (('depth', depth), ('nodes', nodes)):
+            runs = [run_case(fen, mode, limit, quiescence) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run['time'])
+            best.update(position=name, mode=mode, limit=limit)
+            key = f"{name}/{mode}={limit}"
+            results[key] = best
+            log(f"[{key}] {best['time']:.3f}s, {best['nodes']} nút, {best['nps']:.0f} nps, "
+                f"độ sâu {best['depth']}, nước {best['best_move']}")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.15, log=print) -> list:
+    """Danh sách key bị chậm hơn baseline quá threshold (tỉ lệ)."""
+    log = log or (lambda message: None)
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            log(f"  {key}: chưa có trong baseline")
+            continue
+        ratio = result['time'] / base['time'] if base['time'] > 0 else float('inf')
+        status = 'OK'
+        if ratio > 1 + threshold:
+            status = 'REGRESSION'
+            regressions.append(key)
+        log(f"  {key}: {base['time']:.3f}s -> {result['time']:.3f}s ({ratio - 1:+.1%}) {status}")
+        if result['nodes'] != base['nodes'] or result['best_move'] != base['best_move']:
+            log(f"    cảnh báo: cây tìm kiếm đã đổi (nút {base['nodes']} -> {result['nodes']}, "
+                f"nước {base['best_move']} -> {result['best_move']})")
+    return regressions
+
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='Benchmark AI Cờ Tướng')
-    parser.add_argument('--loai', type=str, default='hethong', help='Loại benchmark (hethong/dacbiet)')
+    parser = argparse.ArgumentParser(description='Benchmark tìm kiếm AI Cờ Tướng')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--nodes', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quiescence', action='store_true')
+    parser.add_argument('--positions', nargs='*', choices=sorted(POSITIONS), help='Chỉ chạy các thế cờ này')
+    parser.add_argument('--output', help='Ghi kết quả JSON')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help=f'File baseline để so sánh (không ghi đường dẫn: {DEFAULT_BASELINE})')
+    parser.add_argument('--threshold', type=float, default=0.15, help='Ngưỡng hồi quy (0.15 = chậm hơn 15%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='Ghi kết quả làm baseline (--baseline)')
     args = parser.parse_args()
-    
-    if args.loai == 'hethong':
-        benchmark_hethong()
-    else:
-        benchmark_dacbiet()
\ No newline at end of file
+
+    positions = {name: POSITIONS[name] for name in args.positions} if args.positions else None
+    results = run_suite(args.depth, args.nodes, args.repeat, args.quiescence, positions)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Đã ghi baseline {baseline_path}")
+    elif args.baseline:
+        with open(baseline_path, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"Hồi quy hiệu năng: {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,33 @@
+# Phân tích thế cờ không cần giao diện (headless): in K dòng tốt nhất dạng JSON
+"""
+Chạy: PYTHONPATH=src python src/analyse.py --fen "<FEN>" --multipv 3 --depth 4 [--nodes 20000 | --movetime 2]
+Mỗi dòng kết quả: rank, move (ICCS), score (góc nhìn bên đi), depth, pv (ICCS). Xem engine.analyse.
+"""
+import argparse
+import json
+import os
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # stdout chỉ có JSON
+
+import engine  # noqa: E402
+from board.fen import START_FEN, board_from_fen  # noqa: E402
+from search.stats import SearchStats  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Phân tích MultiPV một thế cờ')
+    parser.add_argument('--fen', default=START_FEN)
+    parser.add_argument('--multipv', type=int, default=3)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--nodes', type=int, help='Ngân sách nút (kết quả lặp lại được)')
+    parser.add_argument('--movetime', type=float, help='Thời gian tối đa (giây)')
+    parser.add_argument('--quiescence', action='store_true')
+    parser.add_argument('--stats', action='store_true', help='In kèm thống kê tìm kiếm')
+    args = parser.parse_args()
+
+    stats = SearchStats()
+    lines = engine.analyse(board_from_fen(args.fen), args.multipv, depth=args.depth, nodes=args.nodes,
+                           move_time=args.movetime, quiescence=args.quiescence, stats=stats)
+    result = {'lines': [line.as_dict() for line in lines]}
+    if args.stats:
+        result['stats'] = stats.as_dict()
+    print(json.dumps(result, indent=2))
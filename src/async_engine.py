@@ -0,0 +1,182 @@
+# API asyncio cho engine: phân tích trên process pool, không chặn event loop, hủy được
+"""
+    async with AsyncEngine(workers=4) as xq:
+        result = await xq.analyse(fen, Limits(depth=4, move_time=2.0, multipv=3))
+        async for update in xq.analysis(fen, Limits(nodes=50000)):
+            ...                     # một AnalysisResult mỗi độ sâu xong, cái cuối có final=True
+Hoặc dùng hàm module `await analyse(position, limits)` (AsyncEngine dùng chung, tạo khi cần);
+`await aclose()` tắt process pool và Manager của nó (nếu không gọi thì atexit tắt khi thoát chương trình).
+position là FEN hoặc Board; Board được chuyển thành FEN nên thế cờ của bên gọi không bị thay đổi
+(lịch sử nước đi không được gửi sang process tìm kiếm).
+Tìm kiếm chạy bằng engine.analyse trong ProcessPoolExecutor. Khi task asyncio bị hủy (hoặc vòng
+async for dừng giữa chừng), process tìm kiếm được báo qua một Event của multiprocessing.Manager và
+dừng ở lần kiểm tra kế tiếp (mỗi alphabeta.CLOCK_CHECK_NODES nút, Event chỉ được hỏi mỗi
+CANCEL_POLL_INTERVAL giây vì mỗi lần hỏi là một lần gọi sang process manager).
+"""
+import asyncio
+import atexit
+import multiprocessing
+import queue
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+from board.fen import board_from_fen, board_to_fen
+from search.stats import SearchStats
+
+CANCEL_POLL_INTERVAL = 0.02    # giây giữa hai lần hỏi Event hủy trong process tìm kiếm
+PROGRESS_POLL_INTERVAL = 0.02  # giây giữa hai lần event loop đọc hàng đợi tiến trình
+
+# depth: độ sâu tối đa; nodes: ngân sách nút; move_time: giây; multipv: số dòng
+Limits = namedtuple('Limits', 'depth nodes move_time multipv', defaults=(3, None, None, 1))
+# move: (from_pos, to_pos) của dòng tốt nhất (None nếu hết nước); lines: list MultiPVLine;
+# stats: SearchStats.as_dict() (chỉ có ở kết quả cuối); final: False với các cập nhật giữa chừng
+AnalysisResult = namedtuple('AnalysisResult', 'fen move score depth lines nodes time stats final')
+
+
+def _result(fen, lines, stats, final):
+    best = lines[0] if lines else None
+    return AnalysisResult(fen, best.move if best else None, best.score if best else None,
+                          best.depth if best else 0, lines, stats.total_nodes, stats.elapsed,
+                          stats.as_dict() if final else None, final)
+
+
+def _run_analysis(fen: str, limits: Limits, cancel=None, progress=None) -> AnalysisResult:
+    """Chạy trong process của pool."""
+    stats = SearchStats()
+    next_poll = [0.0]
+
+    def poll_cancel():
+        now = time.perf_counter()
+        if now < next_poll[0]:
+            return False
+        next_poll[0] = now + CANCEL_POLL_INTERVAL
+        return cancel.is_set()
+
+    def report_progress(lines):
+        progress.put(_result(fen, lines, stats, False))
+
+    lines = engine.analyse(board_from_fen(fen), limits.multipv, depth=limits.depth, nodes=limits.nodes,
+                           move_time=limits.move_time, stats=stats,
+                           should_stop=poll_cancel if cancel is not None else None,
+                           on_iteration=report_progress if progress is not None else None)
+    return _result(fen, lines, stats, True)
+
+
+class AsyncEngine:
+    def __init__(self, workers: int = None, executor: ProcessPoolExecutor = None):
+        self._own_executor = executor is None
+        self._executor = executor
+        self._workers = workers
+        self._manager = None
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self._workers)
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+
+    @staticmethod
+    def _fen(position) -> str:
+        return position if isinstance(position, str) else board_to_fen(position)
+
+    async def analyse(self, position, limits: Limits = None) -> AnalysisResult:
+        """Kết quả cuối của lần phân tích; hủy task thì dừng luôn tìm kiếm."""
+        result = None
+        async for result in self._run(position, limits or Limits(), with_progress=False):
+            pass
+        return result
+
+    def analysis(self, position, limits: Limits = None):
+        """Async iterator: một AnalysisResult mỗi độ sâu xong, cuối cùng là kết quả final=True."""
+        return self._run(position, limits or Limits(), with_progress=True)
+
+    async def _run(self, position, limits, with_progress):
+        self._ensure_started()
+        fen = self._fen(position)
+        loop = asyncio.get_running_loop()
+        cancel = self._manager.Event()
+        progress = self._manager.Queue() if with_progress else None
+        future = loop.run_in_executor(self._executor, _run_analysis, fen, limits, cancel, progress)
+        finished = False
+        try:
+            if progress is not None:
+                while not future.done():
+                    await asyncio.wait({future}, timeout=PROGRESS_POLL_INTERVAL)
+                    for update in self._drain(progress):
+                        yield update
+                for update in self._drain(progress):
+                    yield update
+            result = await future
+            finished = True
+            yield result
+        finally:
+            # Task bị hủy thì future của asyncio cũng đã bị hủy theo, nhưng process vẫn đang tìm
+            if not finished:
+                cancel.set()
+                future.cancel()
+
+    @staticmethod
+    def _drain(progress):
+        while True:
+            try:
+                yield progress.get_nowait()
+            except queue.Empty:
+                return
+
+    def _shutdown(self):
+        """Tắt process pool (nếu tự tạo) và Manager; chặn tới khi các process thoát."""
+        if self._executor is not None and self._own_executor:
+            self._executor.shutdown()
+        self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._shutdown)
+
+    async def __aenter__(self):
+        self._ensure_started()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+_default_engine = None
+
+
+def _get_default_engine() -> AsyncEngine:
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = AsyncEngine()
+    return _default_engine
+
+
+async def analyse(position, limits: Limits = None) -> AnalysisResult:
+    """await analyse(fen_hoặc_board, Limits(...)) dùng AsyncEngine chung của module."""
+    return await _get_default_engine().analyse(position, limits)
+
+
+def analysis(position, limits: Limits = None):
+    """Async iterator tiến trình dùng AsyncEngine chung của module (xem AsyncEngine.analysis)."""
+    return _get_default_engine().analysis(position, limits)
+
+
+async def aclose():
+    """Tắt AsyncEngine chung của module; analyse()/analysis() gọi sau đó sẽ tạo cái mới."""
+    global _default_engine
+    default, _default_engine = _default_engine, None
+    if default is not None:
+        await default.close()
+
+
+@atexit.register
+def _close_default_engine():
+    # Không có event loop lúc thoát: tắt đồng bộ
+    global _default_engine
+    default, _default_engine = _default_engine, None
+    if default is not None:
+        default._shutdown()
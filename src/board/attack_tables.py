@@ -0,0 +1,196 @@
+# Bảng nước đi tính sẵn theo ô, dùng để đếm/duyệt ô đích mà không sinh list nước đi
+"""
+Mọi bảng đánh theo sq = row * 9 + col, phần tử là tọa độ (row, col) để tra thẳng board.board.
+    RAYS[sq]                 4 tia (lên, phải, xuống, trái) cho Xe/Pháo
+    MA_MOVES[sq]             ((chân mã), (ô đích)) cho Mã
+    XIANG_MOVES[color][sq]   ((mắt tượng), (ô đích)), không qua sông
+    SHI_MOVES / JIANG_MOVES / BING_MOVES[color][sq]   ô đích (trong cung / theo hướng Tốt)
+    ORTHOGONAL[sq] / DIAGONAL[sq]                     ô kề (nơi Mã / Tượng dùng sq làm chân / mắt)
+count_targets giống hệt len(get_valid_moves) của các lớp trong pieces/ (nước giả hợp lệ, chưa xét chiếu).
+attack_squares là tập ô bị khống chế: như ô đích nhưng tính cả ô có quân mình, Pháo chỉ khống chế
+ô ăn được sau ngòi. Board dùng nó để duy trì bản đồ tấn công tăng dần.
+"""
+from board.palace import is_in_palace
+from board.river import is_across_river
+
+COLORS = ('red', 'black')
+
+
+def _on_board(row, col) -> bool:
+    return 0 <= row < 10 and 0 <= col < 9
+
+
+def _build():
+    rays, ma, orthogonal, diagonal = [], [], [], []
+    xiang = {color: [] for color in COLORS}
+    shi = {color: [] for color in COLORS}
+    jiang = {color: [] for color in COLORS}
+    bing = {color: [] for color in COLORS}
+    for sq in range(90):
+        row, col = divmod(sq, 9)
+        square_rays = []
+        for dr, dc in ((-1, 0), (0, 1), (1, 0), (0, -1)):
+            ray = []
+            r, c = row + dr, col + dc
+            while _on_board(r, c):
+                ray.append((r, c))
+                r, c = r + dr, c + dc
+            square_rays.append(tuple(ray))
+        rays.append(tuple(square_rays))
+
+        steps = []
+        for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+            leg = (row + dr, col + dc)
+            if not _on_board(*leg):
+                continue
+            diagonals = ((1, dc), (-1, dc)) if dr == 0 else ((dr, 1), (dr, -1))
+            for er, ec in diagonals:
+                target = (leg[0] + er, leg[1] + ec)
+                if _on_board(*target):
+                    steps.append((leg, target))
+        ma.append(tuple(steps))
+        orthogonal.append(tuple((row + dr, col + dc) for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0))
+                                if _on_board(row + dr, col + dc)))
+        diagonal.append(tuple((row + dr, col + dc) for dr, dc in ((1, 1), (1, -1), (-1, 1), (-1, -1))
+                              if _on_board(row + dr, col + dc)))
+
+        for color in COLORS:
+            steps = []
+            for dr, dc in ((2, 2), (2, -2), (-2, 2), (-2, -2)):
+                target = (row + dr, col + dc)
+                if _on_board(*target) and not is_across_river(target, color):
+                    steps.append(((row + dr // 2, col + dc // 2), target))
+            xiang[color].append(tuple(steps))
+            shi[color].append(tuple(t for t in ((row + 1, col + 1), (row + 1, col - 1),
+                                                (row - 1, col + 1), (row - 1, col - 1))
+                                    if is_in_palace(t, color)))
+            jiang[color].append(tuple(t for t in ((row + 1, col), (row - 1, col),
+                                                  (row, col + 1), (row, col - 1))
+                                      if is_in_palace(t, color)))
+            targets = [(row + (1 if color == 'black' else -1), col)]
+            if is_across_river((row, col), color):
+                targets += [(row, col - 1), (row, col + 1)]
+            bing[color].append(tuple(t for t in targets if _on_board(*t)))
+    return tuple(rays), tuple(ma), xiang, shi, jiang, bing, tuple(orthogonal), tuple(diagonal)
+
+
+RAYS, MA_MOVES, XIANG_MOVES, SHI_MOVES, JIANG_MOVES, BING_MOVES, ORTHOGONAL, DIAGONAL = _build()
+
+
+def count_targets(grid, piece) -> int:
+    """Số ô đích của `piece` (bằng len(piece.get_valid_moves(board))) mà không tạo list."""
+    row, col = piece.position
+    sq = row * 9 + col
+    color = piece.color
+    kind = piece.symbol.lower()
+    count = 0
+    if kind == 'r':
+        for ray in RAYS[sq]:
+            for r, c in ray:
+                target = grid[r][c]
+                if target is None:
+                    count += 1
+                else:
+                    if target.color != color:
+                        count += 1
+                    break
+    elif kind == 'p':
+        for ray in RAYS[sq]:
+            jumped = False
+            for r, c in ray:
+                target = grid[r][c]
+                if not jumped:
+                    if target is None:
+                        count += 1
+                    else:
+                        jumped = True
+                elif target is not None:
+                    if target.color != color:
+                        count += 1
+                    break
+    elif kind == 'm':
+        for (lr, lc), (r, c) in MA_MOVES[sq]:
+            if grid[lr][lc] is None:
+                target = grid[r][c]
+                if target is None or target.color != color:
+                    count += 1
+    elif kind == 'x':
+        for (er, ec), (r, c) in XIANG_MOVES[color][sq]:
+            if grid[er][ec] is None:
+                target = grid[r][c]
+                if target is None or target.color != color:
+                    count += 1
+    else:
+        table = SHI_MOVES if kind == 's' else JIANG_MOVES if kind == 'j' else BING_MOVES
+        for r, c in table[color][sq]:
+            target = grid[r][c]
+            if target is None or target.color != color:
+                count += 1
+    return count
+
+
+def attack_squares(grid, piece) -> tuple:
+    """Các ô (sq) mà `piece` đang khống chế, kể cả ô có quân mình (để tính quân bảo vệ)."""
+    row, col = piece.position
+    sq = row * 9 + col
+    color = piece.color
+    kind = piece.symbol.lower()
+    attacks = []
+    if kind == 'r':
+        for ray in RAYS[sq]:
+            for r, c in ray:
+                attacks.append(r * 9 + c)
+                if grid[r][c] is not None:
+                    break
+    elif kind == 'p':
+        for ray in RAYS[sq]:
+            jumped = False
+            for r, c in ray:
+                if grid[r][c] is not None:
+                    if jumped:
+                        attacks.append(r * 9 + c)
+                        break
+                    jumped = True
+    elif kind == 'm':
+        for (lr, lc), (r, c) in MA_MOVES[sq]:
+            if grid[lr][lc] is None:
+                attacks.append(r * 9 + c)
+    elif kind == 'x':
+        for (er, ec), (r, c) in XIANG_MOVES[color][sq]:
+            if grid[er][ec] is None:
+                attacks.append(r * 9 + c)
+    else:
+        table = SHI_MOVES if kind == 's' else JIANG_MOVES if kind == 'j' else BING_MOVES
+        for r, c in table[color][sq]:
+            attacks.append(r * 9 + c)
+    return tuple(attacks)
+
+
+def dependents(grid, sq) -> list:
+    """
+    Các quân có tập khống chế phụ thuộc việc ô sq trống hay có quân:
+    Xe là quân đầu tiên trên mỗi tia từ sq, Pháo là quân thứ nhất hoặc thứ hai,
+    Mã đứng kề (sq là chân Mã), Tượng đứng chéo kề (sq là mắt Tượng).
+    """
+    found = []
+    for ray in RAYS[sq]:
+        seen = 0
+        for r, c in ray:
+            piece = grid[r][c]
+            if piece is None:
+                continue
+            kind = piece.symbol
+            if kind in 'Pp' or (seen == 0 and kind in 'Rr'):
+                found.append(piece)
+            seen += 1
+            if seen == 2:
+                break
+    for r, c in ORTHOGONAL[sq]:
+        piece = grid[r][c]
+        if piece is not None and piece.symbol in 'Mm':
+            found.append(piece)
+    for r, c in DIAGONAL[sq]:
+        piece = grid[r][c]
+        if piece is not None and piece.symbol in 'Xx':
+            found.append(piece)
+    return found
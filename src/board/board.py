@@ -3,6 +3,10 @@ import os
 import sys
 import pygame
 from pieces.piece import Piece
+from board.zobrist import PIECE_KEYS, SIDE_KEY, compute_hash
+from evaluation.piece_square import MATERIAL, POSITION
+from evaluation.king_safety import HOME_COUNTERS
+from board.attack_tables import attack_squares, dependents
 import copy
 class Board:
     # Game board constants
@@ -13,16 +17,28 @@ class Board:
     MARGIN_LEFT = 35
     MARGIN_TOP = 100
 
-    def __init__(self):
+    def __init__(self, headless=False):
         # Initialize empty 10x9 board (rowx x cols)
         self.board = [[None for _ in range(9)] for _ in range(10)]
         self.current_player = 'red' # First player is red
         self.move_history = []
         self.selected_piece = None
         self.valid_moves = []
+        self.zobrist_key = 0  # Hash của thế cờ, cập nhật tăng dần khi đi/undo
+        # Tổng giá trị quân / điểm vị trí của mỗi bên, cập nhật tăng dần khi đi/undo
+        self.material = {'red': 0, 'black': 0}
+        self.positional = {'red': 0, 'black': 0}
+        # Số Tượng mình / Xe, Mã, Pháo, Tốt địch trong nửa sân mỗi bên (mẫu an toàn Tướng, evaluation.king_safety)
+        self.home_counts = {'red': [0] * 5, 'black': [0] * 5}
+        # Bản đồ tấn công: attack_counts[color][sq] = số quân của color khống chế ô sq.
+        # Mỗi quân giữ piece.attacks; khi đi/undo chỉ tính lại các quân bị ảnh hưởng.
+        self.attack_counts = {'red': [0] * 90, 'black': [0] * 90}
+        self.kings = {}
         
-        # Load images
-        self.load_images()
+        # Load images (bỏ qua khi chạy không có giao diện: replay, tools, AI worker)
+        self.images = {}
+        if not headless:
+            self.load_images()
         
         # Set up pieces
         self.setup_pieces()
@@ -144,6 +160,35 @@ class Board:
         """Place a piece at its position on the board"""
         row, col = piece.position
         self.board[row][col] = piece
+        sq = row * 9 + col
+        self.zobrist_key ^= PIECE_KEYS[piece.symbol][sq]
+        self.material[piece.color] += MATERIAL[piece.symbol][sq]
+        self.positional[piece.color] += POSITION[piece.symbol][sq]
+        counter = HOME_COUNTERS.get(piece.symbol)
+        if counter is not None:
+            side, index, inside = counter
+            self.home_counts[side][index] += inside[sq]
+        if piece.symbol in 'Jj':
+            self.kings[piece.color] = piece
+        piece.attacks = ()
+        self._refresh_attacks((sq,), (piece,))
+
+    def clear(self):
+        """Remove all pieces (dùng trước khi dựng thế cờ từ FEN)"""
+        for row in self.board:
+            for piece in row:
+                if piece is not None:
+                    piece.attacks = ()
+        self.board = [[None for _ in range(9)] for _ in range(10)]
+        self.move_history = []
+        self.selected_piece = None
+        self.valid_moves = []
+        self.zobrist_key = compute_hash(self)
+        self.material = {'red': 0, 'black': 0}
+        self.positional = {'red': 0, 'black': 0}
+        self.home_counts = {'red': [0] * 5, 'black': [0] * 5}
+        self.attack_counts = {'red': [0] * 90, 'black': [0] * 90}
+        self.kings = {}
     
     def get_piece(self, position):
         """Get piece at the given position"""
@@ -154,18 +199,14 @@ class Board:
             return self.board[row][col]
         return None
     
-    def move_piece(self, from_pos, to_pos):
-        """Move a piece and return captured piece."""
+    def move_piece(self, from_pos, to_pos, validate=True):
+        """Move a piece and return captured piece.
+        validate=False bỏ qua kiểm tra get_valid_moves khi nước đi đã được kiểm tra trước đó."""
         piece = self.get_piece(from_pos)
-        if piece is None or (to_pos not in piece.get_valid_moves(self)):
+        if piece is None or (validate and to_pos not in piece.get_valid_moves(self)):
             return None
 
-        captured_piece = self.get_piece(to_pos)
-
-        self.board[from_pos[0]][from_pos[1]] = None
-        self.board[to_pos[0]][to_pos[1]] = piece
-        piece.position = to_pos
-
+        captured_piece = self._make_move(piece, from_pos, to_pos)
         self.current_player = 'black' if self.current_player == 'red' else 'red'
         
         self.move_history.append((from_pos, to_pos, piece, captured_piece))
@@ -175,16 +216,88 @@ class Board:
 
         return captured_piece
 
+    def _make_move(self, piece, from_pos, to_pos):
+        """Đặt quân lên bàn và cập nhật trạng thái tăng dần; không đổi lượt, lịch sử hay quân đang chọn."""
+        captured_piece = self.board[to_pos[0]][to_pos[1]]
+        self.board[from_pos[0]][from_pos[1]] = None
+        self.board[to_pos[0]][to_pos[1]] = piece
+        piece.position = to_pos
+
+        from_sq, to_sq = from_pos[0] * 9 + from_pos[1], to_pos[0] * 9 + to_pos[1]
+        self._update_incremental(piece, from_sq, to_sq, captured_piece, -1)
+        if captured_piece is not None:
+            counts = self.attack_counts[captured_piece.color]
+            for sq in captured_piece.attacks:
+                counts[sq] -= 1
+            captured_piece.attacks = ()
+        self._refresh_attacks((from_sq, to_sq), (piece,))
+        return captured_piece
+
+    def _unmake_move(self, piece, from_pos, to_pos, captured_piece):
+        """Ngược lại _make_move."""
+        self.board[from_pos[0]][from_pos[1]] = piece
+        self.board[to_pos[0]][to_pos[1]] = captured_piece
+        piece.position = from_pos
+
+        from_sq, to_sq = from_pos[0] * 9 + from_pos[1], to_pos[0] * 9 + to_pos[1]
+        self._update_incremental(piece, from_sq, to_sq, captured_piece, 1)
+        self._refresh_attacks((from_sq, to_sq), (piece,) if captured_piece is None else (piece, captured_piece))
+
+    def _refresh_attacks(self, squares, pieces):
+        """Tính lại tập khống chế của `pieces` và các quân có tia/chân/mắt đi qua các ô vừa đổi."""
+        grid = self.board
+        affected = list(pieces)
+        for sq in squares:
+            for piece in dependents(grid, sq):
+                if piece not in affected:
+                    affected.append(piece)
+        for piece in affected:
+            counts = self.attack_counts[piece.color]
+            for sq in piece.attacks:
+                counts[sq] -= 1
+            attacks = attack_squares(grid, piece)
+            for sq in attacks:
+                counts[sq] += 1
+            piece.attacks = attacks
+
+    def attacked_by(self, color, sq) -> bool:
+        """Ô sq (= row * 9 + col) có bị quân `color` khống chế không."""
+        return self.attack_counts[color][sq] > 0
+
+    def attack_count(self, color, sq) -> int:
+        """Số quân `color` khống chế ô sq (kể cả quân bảo vệ ô có quân mình)."""
+        return self.attack_counts[color][sq]
+
+    def _update_incremental(self, piece, from_sq, to_sq, captured_piece, sign):
+        """Cập nhật tăng dần hash, material, positional và home_counts cho nước from_sq -> to_sq (sign=-1 khi đi, +1 khi undo)."""
+        symbol = piece.symbol
+        keys = PIECE_KEYS[symbol]
+        key = self.zobrist_key ^ keys[from_sq] ^ keys[to_sq] ^ SIDE_KEY
+        material = MATERIAL[symbol]
+        position = POSITION[symbol]
+        self.material[piece.color] += sign * (material[from_sq] - material[to_sq])
+        self.positional[piece.color] += sign * (position[from_sq] - position[to_sq])
+        counter = HOME_COUNTERS.get(symbol)
+        if counter is not None:
+            side, index, inside = counter
+            self.home_counts[side][index] += sign * (inside[from_sq] - inside[to_sq])
+        if captured_piece is not None:
+            key ^= PIECE_KEYS[captured_piece.symbol][to_sq]
+            self.material[captured_piece.color] += sign * MATERIAL[captured_piece.symbol][to_sq]
+            self.positional[captured_piece.color] += sign * POSITION[captured_piece.symbol][to_sq]
+            counter = HOME_COUNTERS.get(captured_piece.symbol)
+            if counter is not None:
+                side, index, inside = counter
+                self.home_counts[side][index] += sign * inside[to_sq]
+        self.zobrist_key = key
+
     def undo_move(self, from_pos, to_pos, captured_piece):
         """Undo a move."""
         piece = self.get_piece(to_pos)
         if piece is None:
             return False
 
-        self.board[from_pos[0]][from_pos[1]] = piece
-        self.board[to_pos[0]][to_pos[1]] = captured_piece
-        piece.position = from_pos
-
+        self._unmake_move(piece, from_pos, to_pos, captured_piece)
         self.current_player = 'black' if self.current_player == 'red' else 'red'
         
         if self.move_history:
@@ -198,23 +311,15 @@ class Board:
     
     def is_in_check(self, color):
         """Check if the player of given color is in check (bị chiếu tướng)"""
-        # pind the generals/king
-        king_pos  = next(((row, col) for row in range(10) for col in range(9) 
-                            if (self.board[row][col]
-                            and self.board[row][col].color == color 
-                            and self.board[row][col].__class__.__name__ == 'JiangShuai')), None)
-        
-        if king_pos is None: return False
-        
-        # Check if any opponent piece can capture the king
+        king = self.kings.get(color)
+        if king is None:
+            return False
+        row, col = king.position
+        if self.board[row][col] is not king:
+            return False  # Tướng đã bị ăn
+        # Tướng bị chiếu khi ô của Tướng nằm trong bản đồ tấn công của đối phương
         opposite_color = 'black' if color == 'red' else 'red'
-        for row in range(10):
-            for col in range(9):
-                piece = self.board[row][col]
-                if piece and piece.color == opposite_color:
-                    if king_pos in piece.get_valid_moves(self):
-                        return True
-        return False
+        return self.attack_counts[opposite_color][row * 9 + col] > 0
 
     def is_checkmate(self, color):
         """Check if the player of given color is in checkmate."""
@@ -231,14 +336,9 @@ class Board:
                 if piece and piece.color == color:
                     for move in piece.get_valid_moves(self):
                         original_pos = piece.position
-                        captured = self.get_piece(move)
-                        self.board[original_pos[0]][original_pos[1]] = None
-                        self.board[move[0]][move[1]] = piece
-                        piece.position = move
+                        captured = self._make_move(piece, original_pos, move)
                         still_in_check = self.is_in_check(color)
-                        self.board[original_pos[0]][original_pos[1]] = piece
-                        piece.position = original_pos
-                        self.board[move[0]][move[1]] = captured
+                        self._unmake_move(piece, original_pos, move, captured)
                         if not still_in_check:
                             return False
         # Nếu không có nước nào thoát khỏi chiếu thì đúng là checkmate
@@ -258,19 +358,13 @@ class Board:
                     for move in piece.get_valid_moves(self):
                         # Only include that dont leave the player in check
                         original_pos = piece.position
-                        captured = self.get_piece(move)
-                        
-                        self.board[original_pos[0]][original_pos[1]] = None
-                        self.board[move[0]][move[1]] = piece
-                        piece.position = move
+                        captured = self._make_move(piece, original_pos, move)
                         
                         # Check if the move leaves the player in check
                         in_check = self.is_in_check(color)
                         
                         # Undo the move
-                        self.board[original_pos[0]][original_pos[1]] = piece
-                        piece.position = original_pos
-                        self.board[move[0]][move[1]] = captured
+                        self._unmake_move(piece, original_pos, move, captured)
                         
                         if not in_check:
                             moves.append((original_pos, move)) # ((r, c), (r, c))
@@ -309,19 +403,13 @@ class Board:
             for move in piece.get_valid_moves(self):
                 # Temporarily make the move
                 original_pos = piece.position
-                captured = self.get_piece(move)
-
-                self.board[original_pos[0]][original_pos[1]] = None
-                self.board[move[0]][move[1]] = piece
-                piece.position = move
+                captured = self._make_move(piece, original_pos, move)
                 
                 # Check if the move leaves the player in check
                 in_check = self.is_in_check(piece.color)
                 
                 # Undo the move
-                self.board[original_pos[0]][original_pos[1]] = piece
-                piece.position = original_pos
-                self.board[move[0]][move[1]] = captured
+                self._unmake_move(piece, original_pos, move, captured)
                 
                 if not in_check:
                     self.valid_moves.append(move)
@@ -438,10 +526,8 @@ class Board:
             # Kiểm tra nước đi này có chiếu không
             temp_board = self.copy()
             temp_piece = temp_board.get_piece(from_pos)
-            temp_board.board[from_pos[0]][from_pos[1]] = None
-            temp_board.board[to_pos[0]][to_pos[1]] = temp_piece
             if temp_piece:
-                temp_piece.position = to_pos
+                temp_board._make_move(temp_piece, from_pos, to_pos)
             if not temp_board.is_in_check('black' if color == 'red' else 'red'):
                 return False  # Nếu nước này không chiếu tướng thì không phải tam chiếu
 
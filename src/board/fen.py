@@ -0,0 +1,106 @@
+# Đọc/ghi thế cờ dạng FEN (chuẩn WXF) cho Board
+
+from board.board import Board
+from board.zobrist import compute_hash
+
+START_FEN = 'rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1'
+
+# Chữ cái FEN chuẩn (K A B N R C P) <-> tên lớp quân cờ trong repo
+FEN_TO_CLASS = {
+    'k': 'JiangShuai',
+    'a': 'Shi',
+    'b': 'Xiang',
+    'e': 'Xiang',   # Một số nguồn dùng E (elephant) thay cho B
+    'n': 'Ma',
+    'h': 'Ma',      # H (horse) thay cho N
+    'r': 'Ju',
+    'c': 'Pao',
+    'p': 'BingZu',
+}
+CLASS_TO_FEN = {
+    'JiangShuai': 'k',
+    'Shi': 'a',
+    'Xiang': 'b',
+    'Ma': 'n',
+    'Ju': 'r',
+    'Pao': 'c',
+    'BingZu': 'p',
+}
+
+
+def _piece_classes():
+    from pieces.jiang_shuai import JiangShuai
+    from pieces.shi import Shi
+    from pieces.xiang import Xiang
+    from pieces.ma import Ma
+    from pieces.ju import Ju
+    from pieces.pao import Pao
+    from pieces.bing_zu import BingZu
+    return {cls.__name__: cls for cls in (JiangShuai, Shi, Xiang, Ma, Ju, Pao, BingZu)}
+
+
+def board_to_fen(board: Board) -> str:
+    """Trả về chuỗi FEN của thế cờ hiện tại (hàng 0 = hàng cuối của Đen)."""
+    ranks = []
+    for row in range(10):
+        rank = ''
+        empty = 0
+        for col in range(9):
+            piece = board.board[row][col]
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            letter = CLASS_TO_FEN[piece.__class__.__name__]
+            rank += letter.upper() if piece.color == 'red' else letter
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+    side = 'w' if board.current_player == 'red' else 'b'
+    return f"{'/'.join(ranks)} {side} - - 0 {len(board.move_history) // 2 + 1}"
+
+
+def grid_from_fen(fen: str) -> tuple:
+    """(lưới 10x9 các quân, bên đi) từ chuỗi FEN, không tạo Board (dùng cho replay nhanh)."""
+    fields = fen.split()
+    if not fields:
+        raise ValueError("Empty FEN string")
+    ranks = fields[0].split('/')
+    if len(ranks) != 10:
+        raise ValueError(f"FEN must have 10 ranks: {fen!r}")
+
+    classes = _piece_classes()
+    grid = [[None] * 9 for _ in range(10)]
+    for row, rank in enumerate(ranks):
+        col = 0
+        for ch in rank:
+            if ch.isdigit():
+                col += int(ch)
+                continue
+            name = FEN_TO_CLASS.get(ch.lower())
+            if name is None or col > 8:
+                raise ValueError(f"Invalid FEN rank {rank!r}")
+            color = 'red' if ch.isupper() else 'black'
+            grid[row][col] = classes[name](color, (row, col))
+            col += 1
+        if col != 9:
+            raise ValueError(f"Invalid FEN rank {rank!r}")
+
+    side = fields[1] if len(fields) > 1 else 'w'
+    return grid, 'black' if side == 'b' else 'red'
+
+
+def board_from_fen(fen: str, headless: bool = True) -> Board:
+    """Tạo Board từ chuỗi FEN. Mặc định không load hình ảnh (dùng cho replay/AI)."""
+    grid, side = grid_from_fen(fen)
+    board = Board(headless=headless)
+    board.clear()
+    for row in grid:
+        for piece in row:
+            if piece is not None:
+                board.place_piece(piece)
+    board.current_player = side
+    board.zobrist_key = compute_hash(board)
+    return board
@@ -0,0 +1,26 @@
+# Zobrist hashing cho thế cờ (khóa 64 bit)
+"""
+Khóa được sinh từ seed cố định để giá trị hash ổn định giữa các lần chạy:
+file index, opening book và tablebase trên đĩa đều dựa vào điều này.
+Board cập nhật `zobrist_key` theo kiểu XOR tăng dần trong move_piece/undo_move.
+"""
+import random
+
+SYMBOLS = 'RMXSJPBrmxsjpb'
+
+_rng = random.Random(0x58514931)
+PIECE_KEYS = {symbol: [_rng.getrandbits(64) for _ in range(90)] for symbol in SYMBOLS}
+SIDE_KEY = _rng.getrandbits(64)     # XOR vào khi tới lượt Đen
+
+
+def compute_hash(board) -> int:
+    """Tính hash từ đầu (dùng khi khởi tạo hoặc để kiểm tra giá trị tăng dần)."""
+    key = 0
+    for row in range(10):
+        for col in range(9):
+            piece = board.board[row][col]
+            if piece is not None:
+                key ^= PIECE_KEYS[piece.symbol][row * 9 + col]
+    if board.current_player == 'black':
+        key ^= SIDE_KEY
+    return key
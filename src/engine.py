@@ -1,19 +1,148 @@
 from board.board import Board
-from search import alphabeta, minimax, iterative_deepening
-def engine(board: Board,Ai_color:str,type = 'minimax', difficulty = 2):
+from search import alphabeta, minimax, iterative_deepening, opening_book
+from search.tablebase import DEFAULT_TB_DIR, load_tablebase
+from evaluation.eval_cache import DEFAULT_EVAL_CACHE_SIZE, shared_cache
+from search.stats import SearchStats
+from search.time_manager import TimeManager
+from search.multipv import multipv_search
+from utils.profiling import profiled
+from collections import namedtuple
+import random
+
+# Mức độ khó theo độ trễ: mỗi mức chặn thời gian (move_time, giới hạn cứng, giây) và số nút cho một
+# nước, nên thời gian nghĩ không phụ thuộc giai đoạn ván cờ; max_depth và noise (nhiễu điểm ở gốc)
+# giảm sức mạnh cho các mức dễ. Thời gian nghĩ tối đa ~ move_time + vài ms (đồng hồ được kiểm tra
+# mỗi alphabeta.CLOCK_CHECK_NODES nút). engine(profile=..., nodes=...) là chế độ chỉ dừng theo số nút:
+# bỏ move_time, nhiễu và sách khai cuộc lấy seed từ hash thế cờ, nên kết quả lặp lại được.
+DifficultyProfile = namedtuple('DifficultyProfile', 'name max_depth move_time nodes noise')
+DIFFICULTY_PROFILES = {
+    1: DifficultyProfile('easy', 2, 0.5, 3000, 80),
+    2: DifficultyProfile('medium', 3, 1.5, 15000, 20),
+    3: DifficultyProfile('hard', 8, 3.0, 80000, 0),
+}
+# Ngân sách nút của từng mức cho chế độ chỉ dừng theo số nút (nodes='difficulty')
+DIFFICULTY_NODES = {level: profile.nodes for level, profile in DIFFICULTY_PROFILES.items()}
+# Không bắt đầu độ sâu mới khi đã dùng quá tỉ lệ này của move_time (độ sâu mới thường tốn gấp nhiều
+# lần độ sâu trước, khó xong kịp)
+SOFT_TIME_FRACTION = 0.4
+# Độ sâu tối đa khi chơi theo đồng hồ mà không có profile (thực tế dừng theo thời gian)
+CLOCK_MAX_DEPTH = 64
+
+
+def difficulty_profile(level) -> DifficultyProfile:
+    """Mức độ khó theo số (1-3), tên ('easy', 'medium', 'hard') hoặc DifficultyProfile."""
+    if isinstance(level, DifficultyProfile):
+        return level
+    for number, profile in DIFFICULTY_PROFILES.items():
+        if level == number or level == profile.name:
+            return profile
+    raise ValueError(f"Unknown difficulty level: {level!r}")
+
+@profiled
+def engine(board: Board,Ai_color:str,type = 'minimax', difficulty = 2, book = opening_book.DEFAULT_BOOK_PATH,
+           tablebase = DEFAULT_TB_DIR, eval_cache = DEFAULT_EVAL_CACHE_SIZE, quiescence = False, nodes = None,
+           profile = None, clock = None, multipv = None):
     """
     This function is the main engine for AI chess game with many types of AI.
     The default setiing is Alpha-beta.
     The default difficulty is 2. (1-3)
-        Otherwise, difficulty also set the depth of the search tree."""
-    if type == 'alpha_beta':
-        alpha_beta = alphabeta.AlphaBeta()
+        Otherwise, difficulty also set the depth of the search tree.
+    book: đường dẫn sách khai cuộc (hoặc OpeningBook); None để tắt. Nếu thế cờ có trong sách
+        thì đi nước trong sách ngay, không cần tìm kiếm.
+    tablebase: thư mục bảng tàn cuộc (hoặc Tablebase); None để tắt. Thế cờ thắng/thua theo bảng
+        được đi ngay theo bảng; các nút lá của Alpha-beta cũng tra bảng.
+    eval_cache: số ô cache đánh giá (lũy thừa của 2, cache dùng chung trong process) hoặc EvalCache;
+        None để tắt.
+    quiescence: True để Alpha-beta xét tiếp các nước ăn quân không lỗ (SEE) ở nút lá.
+    nodes: ngân sách nút cho nước đi này (Alpha-beta / iterative deepening). Khi có, tìm kiếm chạy
+        iterative deepening tới độ sâu `difficulty` và dừng đúng khi hết số nút thay vì theo đồng hồ;
+        nước trong sách khai cuộc cũng được chọn theo seed là hash thế cờ, nên cùng thế cờ + cài đặt
+        luôn cho cùng nước đi. 'difficulty' = ngân sách của mức hiện tại (profile.nodes, hoặc
+        DIFFICULTY_NODES[difficulty] khi không có profile).
+    profile: mức độ khó theo độ trễ (xem DIFFICULTY_PROFILES / difficulty_profile); khi có thì thay cho
+        difficulty: iterative deepening tới profile.max_depth, dừng theo profile.move_time và
+        profile.nodes, chọn nước có nhiễu profile.noise. Kèm nodes (không có clock) thì chỉ dừng theo
+        nodes, nhiễu lấy seed từ hash thế cờ: lặp lại được.
+    clock: utils.clock.GameClock của ván cờ. Khi có, thời gian cho nước này được phân bổ từ thời gian
+        còn lại của Ai_color, increment và số nước (search.time_manager: giới hạn mềm / cứng, nới ra
+        khi nước tốt nhất chưa ổn định); profile (nếu có) vẫn giới hạn độ sâu, số nút, nhiễu, và
+        move_time của nó là trần thời gian.
+    multipv: số dòng K cho chế độ MultiPV (xem analyse); đi nước của dòng tốt nhất, các dòng nằm trong
+        stats.lines. Không đi theo sách / bảng tàn cuộc (bảng vẫn được tra ở nút lá). Dùng difficulty /
+        nodes / profile như trên, không dùng clock.
+    Trả về search.stats.SearchStats của lần tìm kiếm (Alpha-beta / iterative deepening), None nếu
+    đi theo sách / bảng tàn cuộc hoặc dùng minimax."""
+    # Chỉ dừng theo số nút (không theo thời gian): mọi lựa chọn ngẫu nhiên lấy seed từ hash thế cờ
+    node_only = nodes is not None and clock is None
+    if profile is not None:
+        profile = difficulty_profile(profile)
+        if type not in ('alpha_beta', 'iterative_deepening'):
+            raise ValueError("difficulty profiles require 'alpha_beta' or 'iterative_deepening'.")
+        difficulty = profile.max_depth
+        if nodes is None or nodes == 'difficulty':
+            nodes = profile.nodes
+        if node_only:
+            profile = profile._replace(move_time=None)
+    elif nodes == 'difficulty':
+        nodes = DIFFICULTY_NODES[difficulty]
+    rng = random.Random(board.zobrist_key) if node_only else None
+    # MultiPV luôn tìm kiếm (không đi theo sách / bảng tàn cuộc) để stats.lines luôn có
+    if book is not None and multipv is None:
+        if isinstance(book, str):
+            book = opening_book.load_book(book)
+        book_move = book.choose_move(board, rng) if book is not None else None
+        if book_move is not None:
+            before = len(board.move_history)
+            board.handle_AI_move(book_move[0], book_move[1])
+            if len(board.move_history) > before:
+                return
+    if isinstance(tablebase, str):
+        tablebase = load_tablebase(tablebase)
+    if tablebase is not None and multipv is None:
+        tb_move = tablebase.best_move(board)
+        if tb_move is not None:
+            before = len(board.move_history)
+            board.handle_AI_move(tb_move[0], tb_move[1])
+            if len(board.move_history) > before:
+                return
+    if isinstance(eval_cache, int):
+        eval_cache = shared_cache(eval_cache)
+    stats = SearchStats(eval_cache) if type != 'minimax' else None
+    if multipv is not None:
+        if type not in ('alpha_beta', 'iterative_deepening'):
+            raise ValueError("multipv requires 'alpha_beta' or 'iterative_deepening'.")
+        lines = analyse(board, multipv, depth=difficulty, nodes=nodes, tablebase=tablebase, eval_cache=eval_cache,
+                        move_time=profile.move_time if profile is not None else None, quiescence=quiescence,
+                        stats=stats)
+        best_move = (lines[0].move[0], lines[0].move[1], lines[0].score) if lines else (None, None, None)
+    elif clock is not None:
+        if type not in ('alpha_beta', 'iterative_deepening'):
+            raise ValueError("clock requires 'alpha_beta' or 'iterative_deepening'.")
+        time_manager = TimeManager.from_clock(clock, Ai_color, len(board.move_history) // 2 + 1,
+                                              max_time=profile.move_time if profile is not None else None)
+        best_move = iterative_deepening.iterative_deepening_search(
+            board, max_depth=difficulty if profile is not None else CLOCK_MAX_DEPTH, time_limit=None,
+            tablebase=tablebase, eval_cache=eval_cache, quiescence=quiescence, max_nodes=nodes, verbose=False,
+            stats=stats, root_noise=profile.noise if profile is not None else 0.0, time_manager=time_manager)
+    elif profile is not None:
+        move_time = profile.move_time
+        best_move = iterative_deepening.iterative_deepening_search(
+            board, max_depth=difficulty, time_limit=move_time * SOFT_TIME_FRACTION if move_time else None,
+            tablebase=tablebase, eval_cache=eval_cache, quiescence=quiescence, max_nodes=nodes, verbose=False,
+            stats=stats, hard_time_limit=move_time, root_noise=profile.noise, rng=rng)
+    elif nodes is not None:
+        if type not in ('alpha_beta', 'iterative_deepening'):
+            raise ValueError("nodes budget requires 'alpha_beta' or 'iterative_deepening'.")
+        best_move = iterative_deepening.iterative_deepening_search(board, max_depth=difficulty, time_limit=None,
+                                                                   tablebase=tablebase, eval_cache=eval_cache,
+                                                                   quiescence=quiescence, max_nodes=nodes,
+                                                                   verbose=False, stats=stats)
+    elif type == 'alpha_beta':
+        alpha_beta = alphabeta.AlphaBeta(tablebase=tablebase, eval_cache=eval_cache, quiescence=quiescence,
+                                         stats=stats)
         maximizing = (board.current_player == Ai_color)
-        
-        best_move = alpha_beta.search(board, depth=difficulty, is_maximizing=maximizing, alpha=float('-inf'), beta=float('inf'))
-        #print(f"pruned_branches: {alpha_beta.pruned_branches} branches pruned")
-        #print(f"Time taken: {alpha_beta.time_taken:.2f} seconds")
-        #print(f"Total_nodes: {alpha_beta.total_nodes} nodes searched")
+
+        best_move = alpha_beta.search_root(board, depth=difficulty, is_maximizing=maximizing)
     elif type == 'minimax':
         # Minimax algorithm without pruning
         m = minimax.Minimax()
@@ -23,11 +152,34 @@ def engine(board: Board,Ai_color:str,type = 'minimax', difficulty = 2):
         #print(f"Total_nodes: {m.total_nodes} nodes searched")
     elif type == 'iterative_deepening':
         # Iterative deepening search algorithm
-        best_move = iterative_deepening.iterative_deepening_search(board, max_depth=difficulty, time_limit=50.0)
+        best_move = iterative_deepening.iterative_deepening_search(board, max_depth=difficulty, time_limit=50.0,
+                                                                   tablebase=tablebase, eval_cache=eval_cache,
+                                                                   quiescence=quiescence, stats=stats)
     else:
         raise ValueError("Invalid AI type. Use 'alpha_beta' or 'minimax'.")
     if best_move != (None, None, float('-inf')) and best_move[0] is not None and best_move[1] is not None:
         board.handle_AI_move(best_move[0], best_move[1])
-    else:
-        # Không còn nước đi, để game tự xử lý kết thúc
-        return
\ No newline at end of file
+    # Không còn nước đi thì để game tự xử lý kết thúc
+    return stats
+
+
+def analyse(board: Board, multipv = 1, depth = 3, nodes = None, move_time = None, tablebase = DEFAULT_TB_DIR,
+            eval_cache = DEFAULT_EVAL_CACHE_SIZE, quiescence = False, stats = None, should_stop = None,
+            on_iteration = None):
+    """
+    Phân tích thế cờ (không sách khai cuộc, không đi quân, board không bị thay đổi): K = multipv nước
+    tốt nhất của bên đi, mỗi dòng là search.multipv.MultiPVLine (rank, move, score, depth, pv; as_dict()
+    cho JSON, nước đi theo ICCS). Tìm iterative deepening tới `depth`, dừng sớm theo `nodes` (ngân
+    sách nút, kết quả lặp lại được) hoặc `move_time` (giây). stats: SearchStats để nhận thống kê;
+    các dòng cũng được ghi vào stats.lines. should_stop / on_iteration: xem search.multipv.multipv_search.
+    """
+    if isinstance(tablebase, str):
+        tablebase = load_tablebase(tablebase)
+    if isinstance(eval_cache, int):
+        eval_cache = shared_cache(eval_cache)
+    lines = multipv_search(board, multipv, max_depth=depth, tablebase=tablebase, eval_cache=eval_cache,
+                           quiescence=quiescence, max_nodes=nodes, hard_time_limit=move_time, stats=stats,
+                           should_stop=should_stop, on_iteration=on_iteration)
+    if stats is not None:
+        stats.lines = lines
+    return lines
@@ -0,0 +1,186 @@
+# Đánh giá hàng loạt nhiều thế cờ bằng NumPy (dùng cho tuning, gán nhãn dữ liệu, phân tích kho ván)
+"""
+Mỗi thế cờ là một hàng int8 dài 90 (sq = row * 9 + col):
+    0 = ô trống, PIECE_CODES[symbol] > 0 cho quân Đỏ, < 0 cho quân Đen.
+batch_terms(positions, color) trả về material / positional / mobility / king_safety cho cả mảng
+(N, 90), cho kết quả bằng đúng checkShizhi / checkShizhan / checkKongjian / checkAnquan
+của utils.move_generation.
+(Không gồm luật lặp nước vì cần lịch sử ván.)
+"""
+import numpy as np
+
+from board.attack_tables import (
+    BING_MOVES, JIANG_MOVES, MA_MOVES, RAYS, SHI_MOVES, XIANG_MOVES,
+)
+from evaluation import king_safety
+from evaluation import mobility as mobility_weights
+from evaluation import piece_square
+
+PIECE_CODES = {'J': 1, 'S': 2, 'X': 3, 'M': 4, 'R': 5, 'P': 6, 'B': 7}
+PIECE_CODES.update({symbol.lower(): -code for symbol, code in list(PIECE_CODES.items())})
+CODE_SYMBOLS = {code: symbol for symbol, code in PIECE_CODES.items()}
+OFF_BOARD = 90   # Ô đệm (luôn trống) cho các bảng chỉ số có độ dài khác nhau
+DEFAULT_CHUNK = 4096
+
+
+def encode_board(board) -> np.ndarray:
+    """Board -> mảng int8 (90,)."""
+    row = np.zeros(90, dtype=np.int8)
+    for r in range(10):
+        for c in range(9):
+            piece = board.board[r][c]
+            if piece is not None:
+                row[r * 9 + c] = PIECE_CODES[piece.symbol]
+    return row
+
+
+def encode_boards(boards) -> np.ndarray:
+    """Danh sách Board -> mảng int8 (N, 90)."""
+    return np.stack([encode_board(board) for board in boards]) if boards else np.zeros((0, 90), np.int8)
+
+
+def _index_table(rows, width):
+    """Danh sách (mỗi ô một tuple ô đích) -> mảng (90, width), phần thiếu trỏ tới OFF_BOARD."""
+    table = np.full((90, width), OFF_BOARD, dtype=np.intp)
+    for sq, targets in enumerate(rows):
+        for i, (r, c) in enumerate(targets):
+            table[sq, i] = r * 9 + c
+    return table
+
+
+def _build_geometry():
+    ray = np.full((90, 4, 9), OFF_BOARD, dtype=np.intp)
+    for sq in range(90):
+        for d, squares in enumerate(RAYS[sq]):
+            for i, (r, c) in enumerate(squares):
+                ray[sq, d, i] = r * 9 + c
+    geometry = {
+        'ray': ray,
+        'ray_valid': ray != OFF_BOARD,
+        'ma_leg': _index_table([[leg for leg, _ in MA_MOVES[sq]] for sq in range(90)], 8),
+        'ma_to': _index_table([[to for _, to in MA_MOVES[sq]] for sq in range(90)], 8),
+    }
+    for color in ('red', 'black'):
+        geometry['xiang_eye', color] = _index_table([[eye for eye, _ in XIANG_MOVES[color][sq]] for sq in range(90)], 4)
+        geometry['xiang_to', color] = _index_table([[to for _, to in XIANG_MOVES[color][sq]] for sq in range(90)], 4)
+        geometry['shi', color] = _index_table(SHI_MOVES[color], 4)
+        geometry['jiang', color] = _index_table(JIANG_MOVES[color], 4)
+        geometry['bing', color] = _index_table(BING_MOVES[color], 3)
+    return geometry
+
+
+GEOMETRY = _build_geometry()
+
+
+def _score_tables():
+    """Bảng (15, 90) material và positional theo mã quân + 7, lấy từ evaluation.piece_square hiện tại."""
+    material = np.zeros((15, 90), dtype=np.int64)
+    positional = np.zeros((15, 90), dtype=np.int64)
+    for symbol, code in PIECE_CODES.items():
+        material[code + 7] = piece_square.MATERIAL[symbol]
+        positional[code + 7] = piece_square.POSITION[symbol]
+    return material, positional
+
+
+def _target_counts(padded, rows, squares, symbol):
+    """Số ô đích của các quân `symbol` nằm ở (rows[i], squares[i]); trả về mảng (k,)."""
+    own_sign = 1 if symbol.isupper() else -1
+    color = 'red' if own_sign > 0 else 'black'
+    kind = symbol.upper()
+    if kind in 'RP':
+        along = padded[rows[:, None, None], GEOMETRY['ray'][squares]]     # (k, 4, 9)
+        occupied = along != 0
+        before = np.cumsum(occupied, axis=-1) - occupied
+        quiet = GEOMETRY['ray_valid'][squares] & ~occupied & (before == 0)
+        captures = (along * own_sign < 0) & (before == (0 if kind == 'R' else 1))
+        return quiet.sum(axis=(1, 2)) + captures.sum(axis=(1, 2))
+    if kind in 'MX':
+        blockers = GEOMETRY['ma_leg'] if kind == 'M' else GEOMETRY['xiang_eye', color]
+        targets = GEOMETRY['ma_to'] if kind == 'M' else GEOMETRY['xiang_to', color]
+        blockers, targets = blockers[squares], targets[squares]
+        valid = (targets != OFF_BOARD) & (padded[rows[:, None], blockers] == 0)
+    else:
+        targets = GEOMETRY[{'S': 'shi', 'J': 'jiang', 'B': 'bing'}[kind], color][squares]
+        valid = targets != OFF_BOARD
+    dest = padded[rows[:, None], targets]
+    return (valid & (dest * own_sign <= 0)).sum(axis=1)
+
+
+def mobility_counts(positions) -> dict:
+    """{symbol: mảng (N,)} tổng số ô đích của mọi quân `symbol` trong từng thế cờ."""
+    n = positions.shape[0]
+    padded = np.zeros((n, 91), dtype=np.int8)
+    padded[:, :90] = positions
+    all_rows, all_squares = np.nonzero(positions)
+    all_codes = positions[all_rows, all_squares]
+    counts = {}
+    for symbol, code in PIECE_CODES.items():
+        selected = all_codes == code
+        rows, squares = all_rows[selected], all_squares[selected]
+        if len(rows) == 0:
+            counts[symbol] = np.zeros(n, dtype=np.int64)
+            continue
+        targets = _target_counts(padded, rows, squares, symbol)
+        counts[symbol] = np.bincount(rows, weights=targets, minlength=n).astype(np.int64)
+    return counts
+
+
+def _mobility(positions, color):
+    """checkKongjian cho từng hàng: tổng trọng số * số ô đích, bên `color` trừ bên kia."""
+    weight = mobility_weights.WEIGHT_BY_SYMBOL
+    total = np.zeros(positions.shape[0], dtype=np.int64)
+    for symbol, count in mobility_counts(positions).items():
+        sign = 1 if symbol.isupper() == (color == 'red') else -1
+        total += sign * weight[symbol] * count
+    return total
+
+
+def palace_units(positions, color) -> np.ndarray:
+    """Đơn vị an toàn Tướng (king_safety.palace_units) của `color` cho từng hàng; mỗi mẫu chỉ tính một lần."""
+    relative = positions.astype(np.int64) * (1 if color == 'red' else -1)
+    cells = relative[:, [row * 9 + col for row, col in king_safety.PALACE_CELLS[color]]]
+    keys = ((cells + 8) << (np.arange(9) * king_safety.CELL_BITS)).sum(axis=1)
+    home = relative[:, [row * 9 + col for row in king_safety.HOME_ROWS[color] for col in range(9)]]
+    counts = [(home == PIECE_CODES['X']).sum(axis=1)]
+    counts += [(home == -PIECE_CODES[kind.upper()]).sum(axis=1) for kind in king_safety.ATTACKER_KINDS]
+    for i, count in enumerate(counts):
+        keys |= np.minimum(count, 2) << (king_safety.COUNT_SHIFT + 2 * i)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    units = np.array([king_safety.palace_units(int(key)) for key in unique], dtype=np.int64)
+    return units[inverse.reshape(-1)]
+
+
+def _king_safety(positions, color):
+    opponent = 'black' if color == 'red' else 'red'
+    return king_safety.KING_SAFETY_WEIGHT * (palace_units(positions, color) - palace_units(positions, opponent))
+
+
+def batch_terms(positions, color: str = 'red', chunk: int = DEFAULT_CHUNK) -> dict:
+    """
+    {'material', 'positional', 'mobility', 'king_safety'}: mỗi phần là mảng int64 (N,) theo góc nhìn
+    `color`, bằng checkShizhi / checkShizhan / checkKongjian / checkAnquan trên cùng thế cờ.
+    """
+    positions = np.asarray(positions, dtype=np.int8)
+    if positions.ndim != 2 or positions.shape[1] != 90:
+        raise ValueError("positions must have shape (N, 90)")
+    material_table, positional_table = _score_tables()
+    sign = 1 if color == 'red' else -1
+    squares = np.arange(90)
+    result = {name: np.zeros(len(positions), dtype=np.int64) for name in ('material', 'positional', 'mobility', 'king_safety')}
+    for start in range(0, len(positions), chunk):
+        block = positions[start:start + chunk]
+        codes = block.astype(np.intp) + 7
+        own = block * sign > 0
+        enemy = block * sign < 0
+        material = material_table[codes, squares]
+        result['material'][start:start + chunk] = (material * own).sum(axis=1) - (material * enemy).sum(axis=1)
+        result['positional'][start:start + chunk] = (positional_table[codes, squares] * own).sum(axis=1)
+        result['mobility'][start:start + chunk] = _mobility(block, color)
+        result['king_safety'][start:start + chunk] = _king_safety(block, color)
+    return result
+
+
+def evaluate_batch(positions, color: str = 'red', chunk: int = DEFAULT_CHUNK) -> np.ndarray:
+    """Tổng các thành phần (như evaluation_board nhưng không có luật lặp nước)."""
+    terms = batch_terms(positions, color, chunk)
+    return terms['material'] + terms['positional'] + terms['mobility'] + terms['king_safety']
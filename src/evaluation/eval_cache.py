@@ -0,0 +1,74 @@
+# Cache điểm đánh giá tĩnh theo hash thế cờ (direct-mapped)
+"""
+Mỗi ô cache giữ (hash, điểm) cho một góc nhìn; ô thứ i của màu c nằm ở chỉ số 2 * i + c.
+Ghi đè luôn khi trùng ô (không có bucket), mảng cấp phát sẵn nên không tạo object mỗi lần ghi.
+Điểm tĩnh chỉ phụ thuộc vị trí quân, nên hash bỏ SIDE_KEY để hai lượt đi dùng chung ô.
+"""
+from array import array
+
+from board.zobrist import SIDE_KEY
+
+DEFAULT_EVAL_CACHE_SIZE = 1 << 16
+_COLOR_INDEX = {'red': 0, 'black': 1}
+
+
+class EvalCache:
+    def __init__(self, size: int = DEFAULT_EVAL_CACHE_SIZE):
+        if size <= 0 or size & (size - 1):
+            raise ValueError("eval cache size must be a power of two")
+        self.size = size
+        self.mask = size - 1
+        self.keys = array('Q', bytes(16 * size))
+        self.scores = array('q', bytes(16 * size))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def position_key(board) -> int:
+        key = board.zobrist_key
+        return key ^ SIDE_KEY if board.current_player == 'black' else key
+
+    def probe(self, key: int, color: str):
+        """Điểm đã lưu cho (key, color) hoặc None."""
+        i = ((key & self.mask) << 1) | _COLOR_INDEX[color]
+        # key 0 là ô trống; hash Zobrist bằng 0 coi như không cache được
+        if key and self.keys[i] == key:
+            self.hits += 1
+            return self.scores[i]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, color: str, score: int):
+        i = ((key & self.mask) << 1) | _COLOR_INDEX[color]
+        self.keys[i] = key
+        self.scores[i] = score
+
+    def clear(self):
+        self.keys = array('Q', bytes(16 * self.size))
+        self.scores = array('q', bytes(16 * self.size))
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def nbytes(self) -> int:
+        return self.keys.itemsize * len(self.keys) + self.scores.itemsize * len(self.scores)
+
+
+_shared_caches = {}
+
+
+def shared_cache(size: int = DEFAULT_EVAL_CACHE_SIZE) -> EvalCache:
+    """Một cache cho mỗi process (theo kích thước), giữ lại giữa các lần gọi engine."""
+    if size not in _shared_caches:
+        _shared_caches[size] = EvalCache(size)
+    return _shared_caches[size]
+
+
+def clear_shared_caches():
+    """Xóa mọi cache dùng chung (điểm đã lưu không còn đúng khi trọng số đánh giá thay đổi)."""
+    for cache in _shared_caches.values():
+        cache.clear()
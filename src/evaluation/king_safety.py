@@ -0,0 +1,154 @@
+# An toàn Tướng (安全): cấu trúc Cửu Cung + quân tấn công của đối phương, cache theo mẫu
+"""
+Điểm an toàn của một bên chỉ phụ thuộc một "mẫu" nhỏ, ít thay đổi trong lúc tìm kiếm:
+    - 9 ô Cửu Cung (board/palace.py) theo góc nhìn bên đó: mã quân, dương = quân mình, âm = quân địch
+    - số Tượng của mình (0..2)
+    - số Xe / Mã / Pháo / Tốt của đối phương đang ở nửa sân mình (mỗi loại chặn ở 2)
+Mẫu được gói thành một số nguyên (palace_key) và điểm của mẫu được nhớ trong PatternTable
+(bảng băm direct-mapped nhỏ, giống pawn hash của cờ vua), nên ở nút lá chỉ tốn công đọc mẫu.
+Các số đếm được Board cập nhật tăng dần khi đi/undo (board.home_counts, theo HOME_COUNTERS) như
+material/positional, nên palace_key chỉ đọc 9 ô Cửu Cung.
+Ô Cửu Cung được đánh số từ hàng cuối của mỗi bên nên hai bên dùng chung bảng.
+
+king_safety(board, color) = KING_SAFETY_WEIGHT * (đơn vị an toàn của color - của đối phương).
+"""
+from array import array
+
+KING_SAFETY_WEIGHT = 20
+DEFAULT_PATTERN_TABLE_SIZE = 1 << 12
+# Cùng mã với evaluation.batch_eval.PIECE_CODES (không dấu)
+KIND_CODES = {'j': 1, 's': 2, 'x': 3, 'm': 4, 'r': 5, 'p': 6, 'b': 7}
+ATTACKER_KINDS = ('r', 'm', 'p', 'b')
+# Ô Cửu Cung từ hàng cuối đi lên (chỉ số 4 là ô giữa cung), nửa sân của mỗi bên
+PALACE_CELLS = {
+    'red': tuple((row, col) for row in (9, 8, 7) for col in (3, 4, 5)),
+    'black': tuple((row, col) for row in (0, 1, 2) for col in (3, 4, 5)),
+}
+HOME_ROWS = {'red': range(5, 10), 'black': range(0, 5)}
+CELL_BITS = 4
+COUNT_SHIFT = 9 * CELL_BITS
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+def _build_home_counters():
+    """
+    HOME_COUNTERS[symbol] = (side, index, inside): quân `symbol` được đếm vào board.home_counts[side][index]
+    khi inside[sq] = 1 (ô sq thuộc nửa sân của side). index 0 = Tượng của side, 1..4 = Xe, Mã, Pháo, Tốt địch.
+    """
+    counters = {}
+    for symbol in 'XRMPBxrmpb':
+        color = 'red' if symbol.isupper() else 'black'
+        kind = symbol.lower()
+        side = color if kind == 'x' else ('black' if color == 'red' else 'red')
+        index = 0 if kind == 'x' else 1 + ATTACKER_KINDS.index(kind)
+        inside = tuple(1 if sq // 9 in HOME_ROWS[side] else 0 for sq in range(90))
+        counters[symbol] = (side, index, inside)
+    return counters
+
+
+HOME_COUNTERS = _build_home_counters()
+# Giá trị 4 bit (mã tương đối + 8) của từng ký hiệu quân trong mẫu Cửu Cung của mỗi bên
+_CELL_VALUES = {
+    color: {symbol: 8 + (KIND_CODES[symbol.lower()] if symbol.isupper() == (color == 'red')
+                         else -KIND_CODES[symbol.lower()])
+            for symbol in 'JSXMRPBjsxmrpb'}
+    for color in ('red', 'black')
+}
+
+
+def pack_key(cells, xiang: int, attackers) -> int:
+    """cells: 9 mã tương đối (-7..7), attackers: số Xe, Mã, Pháo, Tốt địch ở nửa sân mình."""
+    key = 0
+    for i, code in enumerate(cells):
+        key |= (code + 8) << (i * CELL_BITS)
+    for i, count in enumerate((xiang,) + tuple(attackers)):
+        key |= min(count, 2) << (COUNT_SHIFT + 2 * i)
+    return key
+
+
+def palace_units(key: int) -> int:
+    """Đơn vị an toàn (<= 0, càng âm càng nguy hiểm) của một mẫu."""
+    cells = [((key >> (i * CELL_BITS)) & 15) - 8 for i in range(9)]
+    xiang, ju, ma, pao, bing = ((key >> (COUNT_SHIFT + 2 * i)) & 3 for i in range(5))
+    shi = cells.count(KIND_CODES['s'])
+    king = cells.index(KIND_CODES['j']) if KIND_CODES['j'] in cells else 1
+    king_row, king_col = divmod(king, 3)
+    threat = 2 * ju + ma + pao + bing
+
+    danger = (2 - shi) * (2 * ju + ma + bing)      # thiếu Sĩ trước Xe / Mã / Tốt
+    danger += (2 - xiang) * (pao + ma)             # thiếu Tượng trước Pháo / Mã
+    danger += king_row * threat                    # Tướng rời hàng cuối
+    if king_col != 1:
+        danger += ju + pao                         # Tướng lệch khỏi cột giữa
+    if cells[4] == KIND_CODES['m']:
+        danger += 1 + pao                          # Mã giữa cung (窝心马)
+    if pao and all(cells[row * 3 + king_col] == 0 for row in range(king_row + 1, 3)):
+        danger += 2 * pao                          # Trước mặt Tướng trống, địch có Pháo
+    danger += 2 * sum(1 for code in cells if code < 0)  # Quân địch đã vào cung
+    return -danger
+
+
+class PatternTable:
+    """Bảng băm direct-mapped key -> palace_units(key); ghi đè khi trùng ô."""
+
+    def __init__(self, size: int = DEFAULT_PATTERN_TABLE_SIZE):
+        if size <= 0 or size & (size - 1):
+            raise ValueError("pattern table size must be a power of two")
+        self.size = size
+        self.shift = 64 - (size.bit_length() - 1)
+        self.keys = array('Q', bytes(8 * size))
+        self.units = array('q', bytes(8 * size))
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: int) -> int:
+        i = ((key * _GOLDEN) & _MASK64) >> self.shift
+        if self.keys[i] == key:
+            self.hits += 1
+            return self.units[i]
+        self.misses += 1
+        units = palace_units(key)
+        self.keys[i] = key
+        self.units[i] = units
+        return units
+
+    def clear(self):
+        self.keys = array('Q', bytes(8 * self.size))
+        self.units = array('q', bytes(8 * self.size))
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def nbytes(self) -> int:
+        return self.keys.itemsize * len(self.keys) + self.units.itemsize * len(self.units)
+
+
+PATTERN_TABLE = PatternTable()
+
+
+def palace_key(board, color: str) -> int:
+    """Mẫu Cửu Cung của `color` trên Board (khóa của PatternTable), giống pack_key."""
+    grid = board.board
+    values = _CELL_VALUES[color]
+    key = 0
+    shift = 0
+    for row, col in PALACE_CELLS[color]:
+        piece = grid[row][col]
+        key |= (8 if piece is None else values[piece.symbol]) << shift
+        shift += CELL_BITS
+    for count in board.home_counts[color]:
+        key |= (count if count < 2 else 2) << shift
+        shift += 2
+    return key
+
+
+def king_safety(board, color: str, table: PatternTable = PATTERN_TABLE) -> int:
+    """Chênh lệch an toàn Tướng của `color` so với đối phương, nhân KING_SAFETY_WEIGHT."""
+    opponent = 'black' if color == 'red' else 'red'
+    units = table.lookup(palace_key(board, color)) - table.lookup(palace_key(board, opponent))
+    return KING_SAFETY_WEIGHT * units
@@ -0,0 +1,43 @@
+# Điểm không gian (空间 - mobility): số ô đích của từng quân nhân trọng số theo loại quân
+"""
+Đếm bằng board.attack_tables.count_targets (tra bảng, không sinh list nước đi).
+Trọng số thay cho hệ số *100 cũ áp cho mọi quân: Mã/Xe bị vây là yếu điểm lớn,
+Sĩ/Tướng/Tượng đi được nhiều hay ít ít ảnh hưởng đến thế cờ.
+"""
+from board.attack_tables import count_targets
+
+MOBILITY_WEIGHT = {
+    'ju': 80,
+    'ma': 120,
+    'pao': 60,
+    'bing': 60,
+    'xiang': 30,
+    'shi': 30,
+    'jiang': 20,
+}
+SYMBOL_NAMES = {
+    'j': 'jiang', 'p': 'pao', 'r': 'ju', 'm': 'ma', 'x': 'xiang', 's': 'shi', 'b': 'bing',
+}
+WEIGHT_BY_SYMBOL = {}
+
+
+def build_weights():
+    """(Re)build WEIGHT_BY_SYMBOL từ MOBILITY_WEIGHT hiện tại."""
+    for symbol, name in SYMBOL_NAMES.items():
+        WEIGHT_BY_SYMBOL[symbol] = WEIGHT_BY_SYMBOL[symbol.upper()] = MOBILITY_WEIGHT[name]
+
+
+def mobility(board, color: str) -> int:
+    """Tổng (trọng số * số ô đích) của `color` trừ của đối phương."""
+    grid = board.board
+    score = 0
+    for row in grid:
+        for piece in row:
+            if piece is None:
+                continue
+            value = WEIGHT_BY_SYMBOL[piece.symbol] * count_targets(grid, piece)
+            score += value if piece.color == color else -value
+    return score
+
+
+build_weights()
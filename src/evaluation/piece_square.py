@@ -0,0 +1,51 @@
+# Bảng giá trị quân theo ô (piece-square) cho đánh giá tăng dần
+"""
+MATERIAL[symbol][sq]  giá trị quân (子力) tại ô sq = row * 9 + col, gồm cả thưởng Tốt qua sông
+POSITION[symbol][sq]  điểm vị trí (势战): Mã/Xe/Pháo đã sang sông được cộng ADVANCED_BONUS
+Board cộng/trừ các giá trị này khi đi/undo, nên đánh giá chỉ cần đọc board.material/positional.
+"""
+from board.river import is_across_river
+from evaluation.shi_zhi import ShiZhi
+
+ADVANCED_BONUS = 5
+ADVANCED_PIECES = ('ma', 'ju', 'pao')
+SYMBOL_NAMES = {
+    'j': 'jiang', 'p': 'pao', 'r': 'ju', 'm': 'ma', 'x': 'xiang', 's': 'shi', 'b': 'bing',
+}
+
+MATERIAL = {}
+POSITION = {}
+
+
+def build_tables():
+    """(Re)build bảng từ ShiZhi.PIECE_VALUE và ADVANCED_BONUS hiện tại."""
+    for symbol, name in SYMBOL_NAMES.items():
+        for color, sym in (('red', symbol.upper()), ('black', symbol)):
+            material = []
+            position = []
+            for sq in range(90):
+                pos = divmod(sq, 9)
+                crossed = is_across_river(pos, color)
+                if name == 'bing':
+                    material.append(ShiZhi.PIECE_VALUE['bing_1' if crossed else 'bing_0'])
+                else:
+                    material.append(ShiZhi.PIECE_VALUE[name])
+                position.append(ADVANCED_BONUS if name in ADVANCED_PIECES and crossed else 0)
+            MATERIAL[sym] = material
+            POSITION[sym] = position
+
+
+def compute_scores(board) -> tuple:
+    """Tính lại ({color: material}, {color: positional}) từ đầu, dùng để khởi tạo/kiểm tra."""
+    material = {'red': 0, 'black': 0}
+    positional = {'red': 0, 'black': 0}
+    for row in range(10):
+        for col in range(9):
+            piece = board.board[row][col]
+            if piece is not None:
+                material[piece.color] += MATERIAL[piece.symbol][row * 9 + col]
+                positional[piece.color] += POSITION[piece.symbol][row * 9 + col]
+    return material, positional
+
+
+build_tables()
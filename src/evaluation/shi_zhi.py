@@ -1,5 +1,6 @@
 
 from pieces.piece import Piece
+from board.river import is_across_river
 class ShiZhi:
     PIECE_VALUE = {
         'jiang': 0,  # Tướng phải được bảo vệ
@@ -22,11 +23,10 @@ class ShiZhi:
     def get_value(self, piece):
         symbol = piece.symbol.lower()
         if symbol == 'b':
-            row = piece.position[0]
-            if (piece.color == 'red' and row < 5) or (piece.color == 'black' and row > 4):
-                return self.PIECE_VALUE['bing_0']
-            else:
+            if is_across_river(piece.position, piece.color):
                 return self.PIECE_VALUE['bing_1']
+            else:
+                return self.PIECE_VALUE['bing_0']
         else:
             piece_name = self.SYMBOL_MAP.get(symbol)
             return self.PIECE_VALUE.get(piece_name, 0)
@@ -0,0 +1,240 @@
+# Tune trọng số đánh giá kiểu Texel trên kho ván cờ
+"""
+Hàm đánh giá (không tính luật lặp nước) tuyến tính theo trọng số:
+    eval = sum(PIECE_VALUE * chênh lệch số quân) + ADVANCED_BONUS * số Mã/Xe/Pháo mình đã qua sông
+         + sum(MOBILITY_WEIGHT * chênh lệch số ô đích theo loại quân)
+         + KING_SAFETY_WEIGHT * chênh lệch đơn vị an toàn Tướng (evaluation.king_safety)
+nên mỗi thế cờ (theo góc nhìn một bên) là một vector đặc trưng, và trọng số được fit bằng
+logistic loss: P(thắng) = sigmoid(K * eval), nhãn = điểm ván của bên đó (1 / 0.5 / 0).
+
+Các bước (thư mục làm việc giữ lại để chạy lại không phải trích xuất lại):
+    1. extract_positions: đọc tuần tự kho ván, replay, ghi thế cờ int8 (N, 90) + kết quả ra file thô
+    2. build_features: tính đặc trưng một lần vào features.npy / targets.npy (np.memmap)
+    3. fit: chọn K theo trọng số hiện tại, rồi Adam trên toàn bộ dữ liệu, gradient vector hóa theo chunk
+    4. ghi file trọng số (evaluation.weights) để evaluator nạp lúc khởi động
+
+Chạy: PYTHONPATH=src python -m evaluation.tuner games.xqg --work-dir tune --epochs 300
+"""
+import os
+
+import numpy as np
+
+from board.fen import board_from_fen
+from evaluation import piece_square
+from evaluation.batch_eval import PIECE_CODES, encode_board, mobility_counts, palace_units
+from evaluation.shi_zhi import ShiZhi
+from evaluation.weights import DEFAULT_WEIGHTS_PATH, current_weights, save_weights
+from records.game_record import RESULT_BLACK_WIN, RESULT_DRAW, RESULT_RED_WIN, iter_games
+from records.replay import play_move
+
+MATERIAL_PARAMS = ('shi', 'xiang', 'ma', 'ju', 'pao', 'bing_0', 'bing_1')
+MOBILITY_PARAMS = ('ju', 'ma', 'pao', 'bing', 'xiang', 'shi', 'jiang')
+PARAMS = (MATERIAL_PARAMS + ('advanced_bonus',) + tuple('mobility_' + name for name in MOBILITY_PARAMS)
+          + ('king_safety',))
+NAME_SYMBOLS = {'jiang': 'J', 'shi': 'S', 'xiang': 'X', 'ma': 'M', 'ju': 'R', 'pao': 'P', 'bing': 'B'}
+RED_SCORE = {RESULT_RED_WIN: 1.0, RESULT_DRAW: 0.5, RESULT_BLACK_WIN: 0.0}
+DEFAULT_CHUNK = 1 << 16
+
+
+def iter_training_positions(corpus_path: str, skip_plies: int = 8, quiet_only: bool = True):
+    """
+    Generator (board, điểm của Đỏ) từ các ván đã có kết quả.
+    Bỏ các nước đầu (khai cuộc theo sách) và, nếu quiet_only, các thế vừa ăn quân hoặc đang bị chiếu.
+    """
+    for game in iter_games(corpus_path):
+        if game.result not in RED_SCORE:
+            continue
+        score = RED_SCORE[game.result]
+        board = board_from_fen(game.fen)
+        for ply, (from_pos, to_pos) in enumerate(game.iter_moves()):
+            if play_move(board, from_pos, to_pos) is not None:
+                break
+            if ply + 1 < skip_plies:
+                continue
+            if quiet_only and (board.move_history[-1][3] is not None or board.is_in_check(board.current_player)):
+                continue
+            yield board, score
+
+
+def extract_positions(corpus_path: str, work_dir: str, skip_plies: int = 8, quiet_only: bool = True) -> int:
+    """Bước 1: ghi positions.i8 (N * 90 byte) và results.f4 (điểm Đỏ). Trả về N."""
+    os.makedirs(work_dir, exist_ok=True)
+    count = 0
+    with open(os.path.join(work_dir, 'positions.i8'), 'wb', buffering=1 << 20) as positions, \
+            open(os.path.join(work_dir, 'results.f4'), 'wb', buffering=1 << 20) as results:
+        for board, score in iter_training_positions(corpus_path, skip_plies, quiet_only):
+            positions.write(encode_board(board).tobytes())
+            results.write(np.float32(score).tobytes())
+            count += 1
+    return count
+
+
+def _features_block(block, results):
+    """Đặc trưng (2n, len(PARAMS)) cho n thế cờ: n hàng theo góc nhìn Đỏ rồi n hàng theo góc nhìn Đen."""
+    n = len(block)
+    red_half = block[:, :45]           # Hàng 0..4: phía Đen, quân Đỏ ở đây là đã qua sông
+    black_half = block[:, 45:]
+    red = np.zeros((n, len(PARAMS)), dtype=np.float32)
+    black = np.zeros((n, len(PARAMS)), dtype=np.float32)
+
+    for i, name in enumerate(MATERIAL_PARAMS):
+        if name.startswith('bing'):
+            crossed = name == 'bing_1'
+            red_count = ((red_half if crossed else black_half) == PIECE_CODES['B']).sum(axis=1)
+            black_count = ((black_half if crossed else red_half) == PIECE_CODES['b']).sum(axis=1)
+        else:
+            symbol = NAME_SYMBOLS[name]
+            red_count = (block == PIECE_CODES[symbol]).sum(axis=1)
+            black_count = (block == PIECE_CODES[symbol.lower()]).sum(axis=1)
+        red[:, i] = red_count - black_count
+        black[:, i] = black_count - red_count
+
+    advanced = len(MATERIAL_PARAMS)
+    for name in piece_square.ADVANCED_PIECES:
+        symbol = NAME_SYMBOLS[name]
+        red[:, advanced] += (red_half == PIECE_CODES[symbol]).sum(axis=1)
+        black[:, advanced] += (black_half == PIECE_CODES[symbol.lower()]).sum(axis=1)
+
+    counts = mobility_counts(block)
+    for i, name in enumerate(MOBILITY_PARAMS, start=advanced + 1):
+        symbol = NAME_SYMBOLS[name]
+        diff = counts[symbol] - counts[symbol.lower()]
+        red[:, i] = diff
+        black[:, i] = -diff
+
+    safety = palace_units(block, 'red') - palace_units(block, 'black')
+    red[:, -1] = safety
+    black[:, -1] = -safety
+    return np.concatenate([red, black]), np.concatenate([results, 1.0 - results]).astype(np.float32)
+
+
+def build_features(work_dir: str, chunk: int = DEFAULT_CHUNK):
+    """Bước 2: tính features.npy / targets.npy một lần (bỏ qua nếu đã có và khớp số thế cờ)."""
+    positions = np.memmap(os.path.join(work_dir, 'positions.i8'), dtype=np.int8, mode='r').reshape(-1, 90)
+    results = np.fromfile(os.path.join(work_dir, 'results.f4'), dtype=np.float32)
+    features_path = os.path.join(work_dir, 'features.npy')
+    targets_path = os.path.join(work_dir, 'targets.npy')
+    n = len(positions)
+    if os.path.exists(features_path) and os.path.exists(targets_path):
+        features = np.load(features_path, mmap_mode='r')
+        if features.shape == (2 * n, len(PARAMS)):
+            return features, np.load(targets_path, mmap_mode='r')
+
+    features = np.lib.format.open_memmap(features_path, mode='w+', dtype=np.float32, shape=(2 * n, len(PARAMS)))
+    targets = np.lib.format.open_memmap(targets_path, mode='w+', dtype=np.float32, shape=(2 * n,))
+    for start in range(0, n, chunk):
+        end = min(start + chunk, n)
+        block_features, block_targets = _features_block(np.asarray(positions[start:end]), results[start:end])
+        half = end - start
+        features[start:end] = block_features[:half]
+        features[n + start:n + end] = block_features[half:]
+        targets[start:end] = block_targets[:half]
+        targets[n + start:n + end] = block_targets[half:]
+    features.flush()
+    targets.flush()
+    return features, targets
+
+
+def weights_to_vector(weights: dict) -> np.ndarray:
+    vector = [weights['piece_value'][name] for name in MATERIAL_PARAMS]
+    vector.append(weights['advanced_bonus'])
+    vector += [weights['mobility_weight'][name] for name in MOBILITY_PARAMS]
+    vector.append(weights['king_safety_weight'])
+    return np.array(vector, dtype=np.float64)
+
+
+def vector_to_weights(vector) -> dict:
+    values = [int(round(float(v))) for v in vector]
+    advanced = len(MATERIAL_PARAMS)
+    return {
+        'piece_value': dict(zip(MATERIAL_PARAMS, values[:advanced]), jiang=ShiZhi.PIECE_VALUE['jiang']),
+        'advanced_bonus': values[advanced],
+        'mobility_weight': dict(zip(MOBILITY_PARAMS, values[advanced + 1:-1])),
+        'king_safety_weight': values[-1],
+    }
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -40.0, 40.0)))
+
+
+def loss_and_gradient(features, targets, w, scale: float, chunk: int = DEFAULT_CHUNK):
+    """Logistic loss trung bình và gradient theo w, duyệt memmap theo chunk."""
+    total_loss = 0.0
+    gradient = np.zeros_like(w)
+    n = len(targets)
+    for start in range(0, n, chunk):
+        x = np.asarray(features[start:start + chunk], dtype=np.float64)
+        y = np.asarray(targets[start:start + chunk], dtype=np.float64)
+        p = _sigmoid(scale * (x @ w))
+        eps = 1e-12
+        total_loss -= (y * np.log(p + eps) + (1.0 - y) * np.log(1.0 - p + eps)).sum()
+        gradient += scale * (x.T @ (p - y))
+    return total_loss / n, gradient / n
+
+
+def fit_scale(features, targets, w, low: float = 1e-5, high: float = 1e-1, steps: int = 40) -> float:
+    """Chọn K (hệ số đổi điểm sang xác suất) cho trọng số hiện tại bằng tìm kiếm trên thang log."""
+    best_scale, best_loss = None, None
+    for scale in np.geomspace(low, high, steps):
+        loss, _ = loss_and_gradient(features, targets, w, scale)
+        if best_loss is None or loss < best_loss:
+            best_scale, best_loss = float(scale), loss
+    return best_scale
+
+
+def fit(features, targets, initial: np.ndarray, scale: float, epochs: int = 300,
+        learning_rate: float = 2.0, log=print) -> np.ndarray:
+    """Adam toàn bộ dữ liệu (full batch), K giữ cố định."""
+    w = initial.astype(np.float64).copy()
+    m = np.zeros_like(w)
+    v = np.zeros_like(w)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    for epoch in range(1, epochs + 1):
+        loss, gradient = loss_and_gradient(features, targets, w, scale)
+        m = beta1 * m + (1 - beta1) * gradient
+        v = beta2 * v + (1 - beta2) * gradient * gradient
+        m_hat = m / (1 - beta1 ** epoch)
+        v_hat = v / (1 - beta2 ** epoch)
+        w -= learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+        if log and (epoch == 1 or epoch % 25 == 0 or epoch == epochs):
+            log(f"  epoch {epoch}: loss {loss:.6f}")
+    return w
+
+
+def tune(corpus_path: str, work_dir: str, output: str = DEFAULT_WEIGHTS_PATH, epochs: int = 300,
+         learning_rate: float = 2.0, skip_plies: int = 8, quiet_only: bool = True, log=print) -> dict:
+    """Chạy cả 4 bước; thế cờ và đặc trưng đã trích xuất trong work_dir được dùng lại."""
+    log = log or (lambda message: None)
+    if not os.path.exists(os.path.join(work_dir, 'positions.i8')):
+        n = extract_positions(corpus_path, work_dir, skip_plies, quiet_only)
+        log(f"Extracted {n} positions -> {work_dir}")
+    features, targets = build_features(work_dir)
+    if len(targets) == 0:
+        raise ValueError(f"{corpus_path}: no positions from finished games")
+    initial = weights_to_vector(current_weights())
+    scale = fit_scale(features, targets, initial)
+    log(f"{len(targets)} samples, K = {scale:.3g}")
+    weights = vector_to_weights(fit(features, targets, initial, scale, epochs, learning_rate, log))
+    save_weights(output, weights)
+    return weights
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Tune trọng số đánh giá (Texel) trên kho ván cờ')
+    parser.add_argument('corpus', help='File record (.xqg)')
+    parser.add_argument('--work-dir', default='tune', help='Thư mục giữ thế cờ / đặc trưng đã trích xuất')
+    parser.add_argument('--output', default=DEFAULT_WEIGHTS_PATH)
+    parser.add_argument('--epochs', type=int, default=300)
+    parser.add_argument('--lr', type=float, default=2.0)
+    parser.add_argument('--skip-plies', type=int, default=8)
+    parser.add_argument('--all-positions', action='store_true', help='Giữ cả thế vừa ăn quân / đang bị chiếu')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = tune(args.corpus, args.work_dir, args.output, args.epochs, args.lr, args.skip_plies,
+                  not args.all_positions)
+    print(f"Wrote {args.output} in {time.perf_counter() - start:.2f}s: {result}")
@@ -0,0 +1,63 @@
+# Trọng số của hàm đánh giá: đọc/ghi file trọng số (do evaluation.tuner tạo ra)
+"""
+File JSON dạng:
+    {"piece_value": {"ju": 1000, ...}, "advanced_bonus": 5, "mobility_weight": {"ma": 120, ...},
+     "king_safety_weight": 20}
+Khóa nào thiếu thì giữ giá trị mặc định trong code. utils.move_generation gọi load_weights()
+lúc import, nên engine, self-play worker... đều dùng trọng số trong file nếu có.
+"""
+import json
+import os
+
+from evaluation import king_safety, mobility, piece_square
+from evaluation.eval_cache import clear_shared_caches
+from evaluation.shi_zhi import ShiZhi
+
+DEFAULT_WEIGHTS_PATH = os.path.join('src', 'res', 'eval_weights.json')
+
+
+def current_weights() -> dict:
+    return {
+        'piece_value': dict(ShiZhi.PIECE_VALUE),
+        'advanced_bonus': piece_square.ADVANCED_BONUS,
+        'mobility_weight': dict(mobility.MOBILITY_WEIGHT),
+        'king_safety_weight': king_safety.KING_SAFETY_WEIGHT,
+    }
+
+
+def apply_weights(weights: dict):
+    """
+    Ghi đè trọng số đang dùng, dựng lại các bảng tra (MATERIAL, POSITION, WEIGHT_BY_SYMBOL) và xóa
+    các EvalCache dùng chung (shared_cache) vì điểm trong đó tính theo trọng số cũ.
+    """
+    for name, value in weights.get('piece_value', {}).items():
+        if name not in ShiZhi.PIECE_VALUE:
+            raise ValueError(f"unknown piece value {name!r}")
+        ShiZhi.PIECE_VALUE[name] = int(value)
+    if 'advanced_bonus' in weights:
+        piece_square.ADVANCED_BONUS = int(weights['advanced_bonus'])
+    for name, value in weights.get('mobility_weight', {}).items():
+        if name not in mobility.MOBILITY_WEIGHT:
+            raise ValueError(f"unknown mobility weight {name!r}")
+        mobility.MOBILITY_WEIGHT[name] = int(value)
+    if 'king_safety_weight' in weights:
+        king_safety.KING_SAFETY_WEIGHT = int(weights['king_safety_weight'])
+    piece_square.build_tables()
+    mobility.build_weights()
+    clear_shared_caches()
+
+
+def save_weights(path: str, weights: dict):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(weights, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_weights(path: str = DEFAULT_WEIGHTS_PATH) -> bool:
+    """Nạp file trọng số nếu có (trả về True); Board tạo sau đó sẽ dùng bảng mới."""
+    if not os.path.exists(path):
+        return False
+    with open(path, encoding='utf-8') as f:
+        apply_weights(json.load(f))
+    return True
@@ -4,12 +4,13 @@ import os
 from board.board import Board
 import engine
 from network.connection import NetworkConnection, DEFAULT_PORT, get_local_ip
+from utils.clock import GameClock, DEFAULT_TIME_CONTROL, format_clock
 import time
 # Initialize pygame
 pygame.init()
 
 # Constants
-SCREEN_WIDTH, SCREEN_HEIGHT = 550, 680
+SCREEN_WIDTH, SCREEN_HEIGHT = 550, 710  # dải dưới bàn cờ (y >= 680) cho đồng hồ
 FPS = 60
 WINDOW_TITLE = "Zhongguo Xiangqi"
 
@@ -76,6 +77,11 @@ class Game:
         self.clock = pygame.time.Clock()
         self.winner = None
         self.default_difficulty = 2
+        # Đồng hồ ván cờ: (giây ban đầu, giây cộng thêm mỗi nước); None = chơi không tính giờ (mặc định),
+        # bật bằng nút "Clock" ở menu chính
+        self.time_control = None
+        self.game_clock = None
+        self.clock_moves = 0  # số nước đã bấm đồng hồ
         # Online
         self.net = None  # type: ignore
         self.online_role = None  # 'host' or 'client'
@@ -95,6 +101,8 @@ class Game:
             Button(SCREEN_WIDTH//2 - 100, 370, 200, 50, "Continue", WHITE, GREEN),
             Button(SCREEN_WIDTH//2 - 100, 440, 200, 50, "Quit", WHITE, RED)
         ]
+        # Bật / tắt đồng hồ cho ván mới (local, AI, host online)
+        self.clock_button = Button(SCREEN_WIDTH//2 - 100, 510, 200, 50, self.clock_label(), WHITE, GOLD)
         # Difficulty selection buttons
         self.select_difficulty_buttons = [
             Button(SCREEN_WIDTH//2 - 180, 300, 100, 50, "Easy", WHITE, GOLD),
@@ -145,6 +153,44 @@ class Game:
         """Reset the game state to start a new game"""
         self.board = Board()
         self.opponent_disconnected = False
+        self.start_clock(self.time_control)
+
+    def clock_label(self) -> str:
+        if not self.time_control:
+            return "Clock: Off"
+        initial, increment = self.time_control
+        return f"Clock: {initial / 60:g}+{increment:g}"
+
+    def start_clock(self, time_control):
+        """Đồng hồ mới cho ván vừa bắt đầu (Đỏ đi trước); time_control None = không tính giờ."""
+        self.game_clock = GameClock(*time_control) if time_control else None
+        self.clock_moves = len(self.board.move_history) if self.board else 0
+        if self.game_clock:
+            self.game_clock.start(self.board.current_player if self.board else 'red')
+
+    def update_clock(self):
+        """Bấm đồng hồ cho nước vừa đi và xử thua bên hết giờ."""
+        if not self.game_clock or not self.board:
+            return
+        while self.clock_moves < len(self.board.move_history):
+            self.clock_moves += 1
+            # Nước thứ n (đếm từ 1) của Đỏ nếu n lẻ
+            self.game_clock.press('red' if self.clock_moves % 2 else 'black')
+        flagged = self.game_clock.flagged()
+        if flagged:
+            self.game_clock.stop()
+            self.winner = 'Black' if flagged == 'red' else 'Red'
+            self.state = STATE_GAME_OVER
+
+    def draw_clock(self):
+        if not self.game_clock:
+            return
+        font = pygame.font.SysFont('DejaVu Sans Mono', 20, bold=True)
+        for color, label, x in (('red', 'Red', 10), ('black', 'Black', None)):
+            text = f"{label} {format_clock(self.game_clock.remaining_for(color))}"
+            surface = font.render(text, True, RED if color == 'red' else BLACK,
+                                  GOLD if self.game_clock.running == color else None)
+            screen.blit(surface, (x if x is not None else SCREEN_WIDTH - surface.get_width() - 10, 682))
 
     def draw_menu(self):
         """Draw the main menu screen"""
@@ -225,6 +271,7 @@ class Game:
                     if not hasattr(self, "paused_board") or self.paused_board is None:
                         continue
                 button.draw(screen)
+            self.clock_button.draw(screen)
 
     def draw_game(self):
         """Draw the game screen with board and pieces"""
@@ -235,6 +282,8 @@ class Game:
         for button in self.game_buttons:
             button.draw(screen)
 
+        self.draw_clock()
+
         # Draw current player indicator
         font = pygame.font.SysFont('DejaVu Sans Mono', 20, bold=True)
         player_text = f"Current Player: {'Red' if self.board.current_player == 'red' else 'Black'}"
@@ -359,6 +408,7 @@ class Game:
                             self.player_color = 'black'
                             self.state = STATE_ONLINE_PLAYING
                             self.board = Board()
+                            self.start_clock(None)  # chỉ tính giờ khi host gửi thể thức thời gian
                             self.connection_error = None
                         else:
                             self.connection_error = "Connection failed. Check IP and try again."
@@ -396,6 +446,7 @@ class Game:
             # Update button hover states
             for button in self.menu_buttons:
                 button.check_hover(pos)
+            self.clock_button.check_hover(pos)
             if click:
                 if self.menu_buttons[0].is_clicked(pos, click):  # Human vs Human
                     self.player_color = None
@@ -410,9 +461,14 @@ class Game:
                         self.board = self.paused_board
                         self.state = STATE_PLAYING
                         self.paused_board = None
+                        if self.game_clock:
+                            self.game_clock.start(self.board.current_player)
                 elif self.menu_buttons[4].is_clicked(pos, click):  # Quit
                     pygame.quit()
                     sys.exit()
+                elif self.clock_button.is_clicked(pos, click):  # Bật / tắt đồng hồ
+                    self.time_control = None if self.time_control else DEFAULT_TIME_CONTROL
+                    self.clock_button.text = self.clock_label()
                 
     def handle_game_input(self, pos, click):
         """Handle input on the game screen"""
@@ -429,6 +485,8 @@ class Game:
                     self.net = None
                 else:
                     self.paused_board = self.board
+                if self.game_clock:
+                    self.game_clock.stop()
                 self.state = STATE_MENU
                 return
             elif self.game_buttons[1].is_clicked(pos, click):  # Quit
@@ -493,6 +551,13 @@ class Game:
                     if (from_pos, to_pos) in legal:
                         self.board.handle_AI_move(from_pos, to_pos)
                         print(f"Opponent moved: {from_pos} -> {to_pos}")
+                        self.update_clock()
+                        if self.game_clock and 'clock' in msg:
+                            # Thời gian theo đồng hồ của bên vừa đi, không tính độ trễ mạng
+                            self.game_clock.sync(msg['clock'])
+                elif msg.get('type') == 'clock':
+                    # Host gửi thể thức thời gian khi ván bắt đầu
+                    self.start_clock((msg['initial'], msg['increment']))
                 elif msg.get('type') == 'disconnect':
                     print("Opponent disconnected")
                     self.opponent_disconnected = True
@@ -503,10 +568,17 @@ class Game:
         if self.player_color:
             # AI's turn to think
             if self.board.current_player != self.player_color:
+                # Bấm đồng hồ cho nước của người chơi trước khi AI nghĩ, để thời gian nghĩ tính cho AI
+                self.update_clock()
+                if self.state == STATE_GAME_OVER:
+                    return
                 # Draw before AI moves
                 self.draw_game()
                 pygame.display.flip()
-                engine.engine(self.board, self.board.current_player, type='alpha_beta', difficulty=self.ai_difficulty)
+                stats = engine.engine(self.board, self.board.current_player, type='alpha_beta',
+                                      profile=self.ai_difficulty, clock=self.game_clock)
+                if stats is not None:
+                    print(f"AI search: {stats.summary()}")
                 # Draw after AI moves
                 self.draw_game()
                 pygame.display.flip()
@@ -543,6 +615,7 @@ class Game:
                                     self.player_color = 'black'
                                     self.state = STATE_ONLINE_PLAYING
                                     self.board = Board()
+                                    self.start_clock(None)  # chỉ tính giờ khi host gửi thể thức thời gian
                                     self.connection_error = None
                                     print(f"✓ Connected to {host_ip}:{DEFAULT_PORT}")
                                 else:
@@ -572,6 +645,10 @@ class Game:
                         print(f"[DEBUG] Host received message: {msg}")
                         if msg.get('type') == 'hello':
                             self.board = Board()
+                            self.start_clock(self.time_control)
+                            if self.game_clock:
+                                self.net.send({'type': 'clock', 'initial': self.game_clock.initial,
+                                               'increment': self.game_clock.increment})
                             self.state = STATE_ONLINE_PLAYING
                             print("✓ Client connected via handshake! Game starting...")
                     elif self.net.connected.is_set():
@@ -585,11 +662,13 @@ class Game:
 
             elif self.state == STATE_PLAYING:
                 self.update()
+                self.update_clock()
                 self.draw_game()
                 self.handle_game_input(mouse_pos, mouse_clicked)
             elif self.state == STATE_ONLINE_PLAYING:
-                # Xử lý message từ đối thủ (move / disconnect / error)
+                # Xử lý message từ đối thủ (move / clock / disconnect / error)
                 self.update()
+                self.update_clock()
                 self.draw_game()
 
                 if mouse_clicked:
@@ -608,10 +687,16 @@ class Game:
                     # - Và sau khi click đã có thêm 1 nước mới trong move_history
                     if my_turn and after > before and self.net:
                         from_pos, to_pos, _, _ = self.board.move_history[-1]
-                        self.net.send({'type': 'move', 'from': from_pos, 'to': to_pos})
+                        self.update_clock()
+                        message = {'type': 'move', 'from': from_pos, 'to': to_pos}
+                        if self.game_clock:
+                            message['clock'] = self.game_clock.to_dict()
+                        self.net.send(message)
                         print(f"Sent move: {from_pos} -> {to_pos}")
 
             elif self.state == STATE_GAME_OVER:
+                if self.game_clock:
+                    self.game_clock.stop()
                 self.draw_game()
                 self.draw_game_over()
                 self.handle_game_over_input(mouse_pos, mouse_clicked)
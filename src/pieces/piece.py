@@ -7,6 +7,7 @@ class Piece:
         self.color = color          # 'red' or 'black"
         self.position = position    # (row, col)
         self.symbol = None          # To be set by subclass
+        self.attacks = ()           # Các ô đang khống chế, do Board duy trì
         
     def get_valid_moves(self, board):
         """ (abstract-function)
@@ -0,0 +1,267 @@
+# Định dạng nhị phân gọn cho kho ván cờ (棋谱 - Qípǔ)
+"""
+Layout file:
+    FILE_HEADER                   magic 'XQGR', version, flags
+    game block * N:
+        GAME_HEADER               block length, result, số nước, thời gian bắt đầu/kết thúc
+        red, black, start_fen     uint16 độ dài + utf-8 (start_fen rỗng = thế khai cuộc chuẩn)
+        moves                     uint16 * số nước, mỗi nước = (from_sq << 7) | to_sq
+
+File index (tùy chọn) '<path>.idx': các cặp (game_id, offset) sau mỗi `index_interval` ván,
+cho phép nhảy thẳng tới ván thứ n mà không phải đọc lại từ đầu file.
+"""
+import os
+import struct
+import sys
+import time
+from array import array
+
+from board.fen import START_FEN
+
+MAGIC = b'XQGR'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')
+GAME_HEADER = struct.Struct('<IBHdd')   # block_len, result, n_moves, started_at, ended_at
+STR_LEN = struct.Struct('<H')
+INDEX_ENTRY = struct.Struct('<QQ')      # game_id, byte offset
+DEFAULT_INDEX_INTERVAL = 1024
+
+RESULT_UNKNOWN = 0
+RESULT_RED_WIN = 1
+RESULT_BLACK_WIN = 2
+RESULT_DRAW = 3
+
+
+def pos_to_sq(pos) -> int:
+    return pos[0] * 9 + pos[1]
+
+
+def sq_to_pos(sq: int) -> tuple:
+    return divmod(sq, 9)
+
+
+def pack_move(from_pos, to_pos) -> int:
+    """Nén một nước đi ((r, c), (r, c)) vào 16 bit."""
+    return (pos_to_sq(from_pos) << 7) | pos_to_sq(to_pos)
+
+
+def unpack_move(move: int) -> tuple:
+    return sq_to_pos(move >> 7), sq_to_pos(move & 0x7F)
+
+
+class GameRecord:
+    """Một ván cờ đã lưu: header + danh sách nước đi đã nén 16 bit."""
+    def __init__(self, moves=None, result=RESULT_UNKNOWN, red='', black='',
+                 start_fen='', started_at=0.0, ended_at=0.0):
+        self.moves = array('H', moves or [])
+        self.result = result
+        self.red = red
+        self.black = black
+        self.start_fen = start_fen          # '' = thế khai cuộc chuẩn
+        self.started_at = started_at
+        self.ended_at = ended_at
+
+    @classmethod
+    def from_board(cls, board, result=RESULT_UNKNOWN, red='', black='', start_fen='',
+                   started_at=0.0, ended_at=None):
+        """Tạo record từ board.move_history của một ván đã chơi."""
+        moves = [pack_move(from_pos, to_pos) for from_pos, to_pos, _, _ in board.move_history]
+        return cls(moves, result, red, black, start_fen, started_at,
+                   time.time() if ended_at is None else ended_at)
+
+    @property
+    def fen(self) -> str:
+        return self.start_fen or START_FEN
+
+    def iter_moves(self):
+        """Sinh ra các nước đi dạng ((r, c), (r, c))."""
+        for move in self.moves:
+            yield unpack_move(move)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __eq__(self, other):
+        if not isinstance(other, GameRecord):
+            return NotImplemented
+        return (self.moves == other.moves and self.result == other.result
+                and self.red == other.red and self.black == other.black
+                and self.start_fen == other.start_fen
+                and self.started_at == other.started_at and self.ended_at == other.ended_at)
+
+    def __repr__(self):
+        return f"GameRecord({self.red!r} vs {self.black!r}, {len(self.moves)} moves, result={self.result})"
+
+
+def encode_game(game: GameRecord) -> bytes:
+    strings = b''
+    for text in (game.red, game.black, game.start_fen):
+        raw = text.encode('utf-8')
+        strings += STR_LEN.pack(len(raw)) + raw
+    moves = array('H', game.moves)
+    if moves.itemsize != 2:
+        raise ValueError("array('H') must be 16-bit on this platform")
+    if sys.byteorder == 'big':
+        moves.byteswap()
+    body = strings + moves.tobytes()
+    header = GAME_HEADER.pack(GAME_HEADER.size + len(body), game.result, len(moves),
+                              game.started_at, game.ended_at)
+    return header + body
+
+
+def decode_game(block: bytes) -> GameRecord:
+    _, result, n_moves, started_at, ended_at = GAME_HEADER.unpack_from(block, 0)
+    offset = GAME_HEADER.size
+    texts = []
+    for _ in range(3):
+        (length,) = STR_LEN.unpack_from(block, offset)
+        offset += STR_LEN.size
+        texts.append(block[offset:offset + length].decode('utf-8'))
+        offset += length
+    moves = array('H')
+    moves.frombytes(block[offset:offset + 2 * n_moves])
+    if sys.byteorder == 'big':
+        moves.byteswap()
+    game = GameRecord(None, result, texts[0], texts[1], texts[2], started_at, ended_at)
+    game.moves = moves
+    return game
+
+
+def _check_file_header(f, path):
+    raw = f.read(FILE_HEADER.size)
+    if len(raw) < FILE_HEADER.size:
+        raise ValueError(f"{path}: not a game record file (file too short)")
+    magic, version, _ = FILE_HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a game record file (bad magic {magic!r})")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported game record version {version}")
+
+
+def read_index(path: str) -> list:
+    """Đọc file index '<path>.idx' -> [(game_id, offset), ...] (rỗng nếu không có)."""
+    idx_path = path + '.idx'
+    if not os.path.exists(idx_path):
+        return []
+    with open(idx_path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % INDEX_ENTRY.size
+    return list(INDEX_ENTRY.iter_unpack(data[:usable]))
+
+
+def iter_game_blocks(path: str, start: int = 0, buffer_size: int = 1 << 20):
+    """Generator (game_id, offset, raw_block) - đọc tuần tự, không load cả file vào RAM."""
+    with open(path, 'rb', buffering=buffer_size) as f:
+        _check_file_header(f, path)
+        game_id, offset = 0, FILE_HEADER.size
+        if start > 0:
+            for entry_id, entry_offset in read_index(path):
+                if entry_id > start:
+                    break
+                game_id, offset = entry_id, entry_offset
+            f.seek(offset)
+        size_struct = struct.Struct('<I')
+        while True:
+            head = f.read(4)
+            if not head:
+                return
+            if len(head) < 4:
+                raise ValueError(f"{path}: truncated game block at offset {offset}")
+            (block_len,) = size_struct.unpack(head)
+            rest = f.read(block_len - 4)
+            if len(rest) < block_len - 4:
+                raise ValueError(f"{path}: truncated game block at offset {offset}")
+            if game_id >= start:
+                yield game_id, offset, head + rest
+            game_id += 1
+            offset += block_len
+
+
+def iter_games(path: str, start: int = 0):
+    """Generator các GameRecord trong file, bắt đầu từ ván thứ `start`."""
+    for _, _, block in iter_game_blocks(path, start):
+        yield decode_game(block)
+
+
+def read_game(path: str, game_id: int) -> GameRecord:
+    """Đọc đúng một ván (dùng index nếu có)."""
+    for _, _, block in iter_game_blocks(path, game_id):
+        return decode_game(block)
+    raise IndexError(f"{path}: game {game_id} out of range")
+
+
+class GameWriter:
+    """
+    Ghi nối tiếp (append) các ván vào file record, tự cập nhật file index.
+    Dùng với `with GameWriter(path) as w: w.write(game)`.
+    """
+    def __init__(self, path: str, index_interval: int = DEFAULT_INDEX_INTERVAL):
+        self.path = path
+        self.index_interval = index_interval
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if is_new or not self._index_valid():
+            # File record mới thì index cũ (nếu còn) là của file khác
+            self._rebuild_index(scan=not is_new)
+        self.game_count = 0 if is_new else self._count_existing()
+        self.file = open(path, 'ab')
+        if is_new:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+        self.index_file = open(path + '.idx', 'ab') if index_interval else None
+
+    def _index_valid(self) -> bool:
+        """Index khớp file record: gồm các entry nguyên vẹn và offset cuối nằm trong file record."""
+        idx_path = self.path + '.idx'
+        if not os.path.exists(idx_path):
+            return True
+        if os.path.getsize(idx_path) % INDEX_ENTRY.size:
+            return False
+        index = read_index(self.path)
+        return not index or FILE_HEADER.size <= index[-1][1] < os.path.getsize(self.path)
+
+    def _rebuild_index(self, scan: bool):
+        """Ghi lại index từ đầu (quét file record nếu scan); index_interval = 0 thì chỉ xóa index cũ."""
+        idx_path = self.path + '.idx'
+        if not self.index_interval:
+            if os.path.exists(idx_path):
+                os.remove(idx_path)
+            return
+        with open(idx_path, 'wb') as f:
+            if scan:
+                for game_id, offset, _ in iter_game_blocks(self.path):
+                    if game_id % self.index_interval == 0:
+                        f.write(INDEX_ENTRY.pack(game_id, offset))
+
+    def _count_existing(self) -> int:
+        last_id = 0
+        index = read_index(self.path)
+        if index:
+            last_id = index[-1][0]
+        count = last_id
+        for game_id, _, _ in iter_game_blocks(self.path, last_id):
+            count = game_id + 1
+        return count
+
+    def write(self, game: GameRecord) -> int:
+        """Ghi một ván, trả về game_id của ván đó."""
+        game_id = self.game_count
+        if self.index_file and game_id % self.index_interval == 0:
+            self.index_file.write(INDEX_ENTRY.pack(game_id, self.file.tell()))
+        self.file.write(encode_game(game))
+        self.game_count += 1
+        return game_id
+
+    def flush(self):
+        self.file.flush()
+        if self.index_file:
+            self.index_file.flush()
+
+    def close(self):
+        self.file.close()
+        if self.index_file:
+            self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
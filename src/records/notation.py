@@ -0,0 +1,140 @@
+# Đọc ký pháp ván cờ: ICCS (h2e2) và WXF (C2=5)
+"""
+ICCS: cột a-i tính từ trái sang (phía Đỏ), hàng 0-9 tính từ dưới lên (phía Đỏ).
+      Ví dụ 'h2e2' = Pháo Đỏ (7, 7) -> (7, 4).
+WXF:  <quân><cột><hướng><đích>, cột đánh số 1-9 từ phải sang trái theo góc nhìn bên đi.
+      '+' tiến, '-' lui, '=' hoặc '.' đi ngang. Quân đi thẳng (K R C P) dùng đích = số bước
+      khi tiến/lui, quân đi chéo (A B N) dùng đích = cột đến.
+      Hai quân cùng loại trên một cột: '+R=5' / 'R+=5' (quân trước), '-R=5' / 'R-=5' (quân sau).
+"""
+import re
+
+ICCS_FILES = 'abcdefghi'
+WXF_PIECES = {
+    'K': 'JiangShuai',
+    'A': 'Shi',
+    'B': 'Xiang',
+    'E': 'Xiang',
+    'N': 'Ma',
+    'H': 'Ma',
+    'R': 'Ju',
+    'C': 'Pao',
+    'P': 'BingZu',
+}
+_STRAIGHT = ('JiangShuai', 'Ju', 'Pao', 'BingZu')
+_ICCS_RE = re.compile(r'^([a-i])([0-9])-?([a-i])([0-9])$', re.IGNORECASE)
+_MOVE_NUMBER_RE = re.compile(r'^\d+\.+$')
+_RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+
+class NotationError(ValueError):
+    """Nước đi không đọc được hoặc không khớp với thế cờ."""
+
+
+def parse_iccs(text: str) -> tuple:
+    """'h2e2' -> ((7, 7), (7, 4))"""
+    match = _ICCS_RE.match(text.strip())
+    if not match:
+        raise NotationError(f"Invalid ICCS move {text!r}")
+    f1, r1, f2, r2 = match.groups()
+    return ((9 - int(r1), ICCS_FILES.index(f1.lower())),
+            (9 - int(r2), ICCS_FILES.index(f2.lower())))
+
+
+def format_iccs(from_pos, to_pos) -> str:
+    return (f"{ICCS_FILES[from_pos[1]]}{9 - from_pos[0]}"
+            f"{ICCS_FILES[to_pos[1]]}{9 - to_pos[0]}")
+
+
+def _file_to_col(number: int, color: str) -> int:
+    if not 1 <= number <= 9:
+        raise NotationError(f"Invalid WXF file {number}")
+    return 9 - number if color == 'red' else number - 1
+
+
+def parse_wxf(board, text: str) -> tuple:
+    """Đọc nước đi WXF theo thế cờ hiện tại của `board` (bên đi = board.current_player)."""
+    move = text.strip().upper()
+    if len(move) != 4:
+        raise NotationError(f"Invalid WXF move {text!r}")
+    color = board.current_player
+
+    # Vị trí: '<quân><cột>' hoặc '<quân><+/->' hoặc '<+/-><quân>'
+    tandem = None
+    if move[0] in '+-':
+        tandem, letter, file_char = move[0], move[1], None
+    elif move[1] in '+-' and move[2] in '+-=.':
+        letter, tandem, file_char = move[0], move[1], None
+    else:
+        letter, file_char = move[0], move[1]
+    action, target = move[2], move[3]
+    class_name = WXF_PIECES.get(letter)
+    if class_name is None or action not in '+-=.' or not target.isdigit():
+        raise NotationError(f"Invalid WXF move {text!r}")
+
+    candidates = [
+        piece for row in board.board for piece in row
+        if piece is not None and piece.color == color and piece.__class__.__name__ == class_name
+    ]
+    if file_char is not None:
+        if not file_char.isdigit():
+            raise NotationError(f"Invalid WXF move {text!r}")
+        col = _file_to_col(int(file_char), color)
+        candidates = [piece for piece in candidates if piece.position[1] == col]
+    else:
+        # Quân trước/sau: nhóm các quân cùng cột, theo hướng tiến của bên đi
+        by_col = {}
+        for piece in candidates:
+            by_col.setdefault(piece.position[1], []).append(piece)
+        stacked = [group for group in by_col.values() if len(group) >= 2]
+        if len(stacked) != 1:
+            raise NotationError(f"Ambiguous tandem move {text!r}")
+        group = sorted(stacked[0], key=lambda p: p.position[0], reverse=(color == 'black'))
+        candidates = [group[0] if tandem == '+' else group[-1]]
+
+    forward = -1 if color == 'red' else 1
+    number = int(target)
+    matches = []
+    for piece in candidates:
+        row, col = piece.position
+        if action in '=.':
+            dest = (row, _file_to_col(number, color))
+        else:
+            sign = forward if action == '+' else -forward
+            if class_name in _STRAIGHT:
+                dest = (row + sign * number, col)
+            else:
+                dest_col = _file_to_col(number, color)
+                d_col = abs(dest_col - col)
+                if class_name == 'Shi':
+                    d_row = 1
+                elif class_name == 'Xiang':
+                    d_row = 2
+                else:
+                    d_row = 2 if d_col == 1 else 1
+                dest = (row + sign * d_row, dest_col)
+        if dest in piece.get_valid_moves(board):
+            matches.append((piece.position, dest))
+
+    if len(matches) != 1:
+        raise NotationError(f"WXF move {text!r} matches {len(matches)} moves in this position")
+    return matches[0]
+
+
+def detect_notation(token: str) -> str:
+    return 'iccs' if _ICCS_RE.match(token.strip()) else 'wxf'
+
+
+def tokenize_game(text: str) -> list:
+    """Tách chuỗi ván cờ thành các token nước đi, bỏ số thứ tự nước và kết quả."""
+    tokens = []
+    for token in text.replace(',', ' ').split():
+        if _MOVE_NUMBER_RE.match(token) or token in _RESULTS:
+            continue
+        # '1.h2e2' -> 'h2e2'
+        if '.' in token and token.split('.', 1)[0].isdigit():
+            token = token.split('.', 1)[1]
+            if not token:
+                continue
+        tokens.append(token)
+    return tokens
@@ -0,0 +1,172 @@
+# Index "các ván đã đi qua thế cờ này" trên kho ván cờ
+"""
+File index gồm header + các bản ghi (hash, game_id, ply) kích thước cố định, đã sắp xếp
+theo hash. Truy vấn dùng mmap + tìm kiếm nhị phân nên không phải load cả file vào RAM.
+ply = số nước đã đi trước khi đạt thế cờ (0 = thế xuất phát của ván).
+"""
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+
+from board.fen import board_from_fen
+from records.game_record import iter_games
+from records.replay import play_move
+
+MAGIC = b'XQPI'
+VERSION = 1
+INDEX_HEADER = struct.Struct('<4sHHQ')   # magic, version, flags, số bản ghi
+ENTRY = struct.Struct('<QII')            # zobrist hash, game_id, ply
+DEFAULT_CHUNK_ENTRIES = 1 << 20
+
+
+def iter_game_positions(game):
+    """Generator (ply, hash) cho từng thế cờ của ván, replay bằng luật của Board."""
+    board = board_from_fen(game.fen)
+    yield 0, board.zobrist_key
+    for ply, (from_pos, to_pos) in enumerate(game.iter_moves(), start=1):
+        if play_move(board, from_pos, to_pos) is not None:
+            return  # Ván hỏng: chỉ index phần hợp lệ
+        yield ply, board.zobrist_key
+
+
+def _write_run(keys, directory):
+    """Sắp xếp một chunk (khóa int đã gộp) và ghi ra file tạm."""
+    keys.sort()
+    fd, path = tempfile.mkstemp(suffix='.run', dir=directory)
+    with os.fdopen(fd, 'wb', buffering=1 << 20) as f:
+        pack = ENTRY.pack
+        for key in keys:
+            f.write(pack(key >> 64, (key >> 32) & 0xFFFFFFFF, key & 0xFFFFFFFF))
+    return path
+
+
+def _read_run(path):
+    with open(path, 'rb', buffering=1 << 20) as f:
+        while True:
+            data = f.read(ENTRY.size * 4096)
+            if not data:
+                return
+            yield from ENTRY.iter_unpack(data)
+
+
+def build_position_index(corpus_path: str, index_path: str,
+                         chunk_entries: int = DEFAULT_CHUNK_ENTRIES) -> int:
+    """
+    Đọc tuần tự kho ván cờ, ghi index đã sắp xếp ra `index_path`.
+    Sắp xếp ngoài (external sort): mỗi chunk sắp xếp trong RAM rồi trộn các run bằng heapq.merge.
+    Trả về số bản ghi.
+    """
+    directory = os.path.dirname(os.path.abspath(index_path))
+    runs = []
+    keys = []
+    try:
+        for game_id, game in enumerate(iter_games(corpus_path)):
+            for ply, key in iter_game_positions(game):
+                # Gộp (hash, game_id, ply) thành một số nguyên để sort nhanh hơn tuple
+                keys.append((key << 64) | (game_id << 32) | ply)
+            if len(keys) >= chunk_entries:
+                runs.append(_write_run(keys, directory))
+                keys = []
+        if keys or not runs:
+            runs.append(_write_run(keys, directory))
+            keys = []
+
+        count = 0
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'wb', buffering=1 << 20) as out:
+            out.write(INDEX_HEADER.pack(MAGIC, VERSION, 0, 0))
+            pack = ENTRY.pack
+            for entry in heapq.merge(*(_read_run(path) for path in runs)):
+                out.write(pack(*entry))
+                count += 1
+            out.seek(0)
+            out.write(INDEX_HEADER.pack(MAGIC, VERSION, 0, count))
+        os.replace(tmp_path, index_path)
+        return count
+    finally:
+        for path in runs:
+            os.remove(path)
+
+
+class PositionIndex:
+    """
+    Truy vấn index qua mmap.
+        with PositionIndex(path) as index:
+            index.lookup(board.zobrist_key)   -> [(game_id, ply), ...]
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count = INDEX_HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a position index file")
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def _hash_at(self, i: int) -> int:
+        return struct.unpack_from('<Q', self.map, INDEX_HEADER.size + i * ENTRY.size)[0]
+
+    def _lower_bound(self, key: int) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._hash_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, key: int, limit: int = None) -> list:
+        """Tất cả (game_id, ply) có hash bằng `key`, theo thứ tự game_id."""
+        result = []
+        i = self._lower_bound(key)
+        while i < self.count and (limit is None or len(result) < limit):
+            h, game_id, ply = ENTRY.unpack_from(self.map, INDEX_HEADER.size + i * ENTRY.size)
+            if h != key:
+                break
+            result.append((game_id, ply))
+            i += 1
+        return result
+
+    def games_reaching(self, board, limit: int = None) -> list:
+        """Danh sách game_id (không trùng) đã đi qua thế cờ hiện tại của board."""
+        seen = []
+        for game_id, _ in self.lookup(board.zobrist_key):
+            if not seen or seen[-1] != game_id:
+                seen.append(game_id)
+                if limit is not None and len(seen) >= limit:
+                    break
+        return seen
+
+    def close(self):
+        if getattr(self, 'map', None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Tạo index thế cờ cho kho ván cờ')
+    parser.add_argument('corpus', help='File record (.xqg)')
+    parser.add_argument('index', help='File index đầu ra')
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK_ENTRIES, help='Số bản ghi mỗi chunk sort')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n = build_position_index(args.corpus, args.index, args.chunk)
+    print(f"Indexed {n} positions in {time.perf_counter() - start:.2f}s -> {args.index}")
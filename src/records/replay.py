@@ -0,0 +1,313 @@
+# Replay và kiểm tra tính hợp lệ của cả ván cờ theo luật của Board
+"""
+Dùng cho nhập kho ván cờ: play_move kiểm tra luật đi của quân (can_move: chỉ xét đúng nước đó,
+không sinh danh sách nước đi), đi bằng move_piece(validate=False) rồi kiểm tra luật không
+được để Tướng bị chiếu (Board.is_in_check, đọc bản đồ tấn công tăng dần).
+king_attacked chỉ dò các tia/điểm có thể chiếu Tướng trên lưới quân, dùng cho code sửa thẳng
+board.board mà không qua move_piece (vd. bộ sinh bảng tàn cuộc).
+replay_moves / replay_notation (nhập kho hàng loạt) không dựng Board: riêng việc tạo Board và duy trì
+bản đồ tấn công đã tốn hơn 1 ms mỗi ván. Chúng đi trên lưới quân (_ReplayGrid) với can_move +
+king_attacked, còn ReplayResult.board chỉ được dựng (bằng move_piece) khi bên gọi cần.
+"""
+from board.attack_tables import BING_MOVES, JIANG_MOVES, MA_MOVES, ORTHOGONAL, RAYS, SHI_MOVES, XIANG_MOVES
+from board.fen import START_FEN, board_from_fen, grid_from_fen
+from board.palace import is_in_palace
+from board.river import is_across_river
+from records.game_record import GameRecord, pack_move, unpack_move
+from records.notation import NotationError, detect_notation, parse_iccs, parse_wxf, tokenize_game
+
+
+def _build_ma_checks():
+    """_MA_CHECKS[sq] = ((ô Mã, chân Mã), ...) của các con Mã có thể chiếu Tướng đứng ở sq."""
+    checks = []
+    for sq in range(90):
+        kr, kc = divmod(sq, 9)
+        square = []
+        for dr, dc in ((-2, -1), (-2, 1), (2, -1), (2, 1), (-1, -2), (1, -2), (-1, 2), (1, 2)):
+            r, c = kr + dr, kc + dc
+            if 0 <= r < 10 and 0 <= c < 9:
+                # Chân Mã nằm cạnh con Mã, theo hướng bước dài
+                leg = (r - dr // 2, c) if abs(dr) == 2 else (r, c - dc // 2)
+                square.append(((r, c), leg))
+        checks.append(tuple(square))
+    return tuple(checks)
+
+
+_MA_CHECKS = _build_ma_checks()
+
+
+class ReplayResult:
+    """Kết quả replay: board cuối, các nước đã nén, và ply lỗi đầu tiên (nếu có)."""
+    def __init__(self, board, moves, error_ply=None, error=None, start_fen=START_FEN):
+        self._board = board             # None: dựng lại từ start_fen + moves khi được hỏi
+        self.moves = moves
+        self.error_ply = error_ply      # chỉ số ply (0-based) của nước sai đầu tiên
+        self.error = error
+        self.start_fen = start_fen
+
+    @property
+    def board(self):
+        """Board sau các nước hợp lệ."""
+        if self._board is None:
+            board = board_from_fen(self.start_fen)
+            for move in self.moves:
+                board.move_piece(*unpack_move(move), validate=False)
+            self._board = board
+        return self._board
+
+    @property
+    def ok(self) -> bool:
+        return self.error_ply is None
+
+    def __repr__(self):
+        if self.ok:
+            return f"ReplayResult(ok, {len(self.moves)} plies)"
+        return f"ReplayResult(illegal ply {self.error_ply}: {self.error})"
+
+
+def find_king(board, color):
+    """Tướng luôn nằm trong Cửu Cung nên chỉ cần dò 9 ô."""
+    rows = range(7, 10) if color == 'red' else range(0, 3)
+    for row in rows:
+        for col in range(3, 6):
+            piece = board.board[row][col]
+            if piece is not None and piece.color == color and piece.symbol in 'Jj':
+                return (row, col)
+    return None
+
+
+def king_attacked(board, color, king_pos=None) -> bool:
+    """Tương đương Board.is_in_check(color) nhưng chỉ dò các ô có thể chiếu Tướng."""
+    if king_pos is None:
+        king_pos = find_king(board, color)
+        if king_pos is None:
+            return False
+    grid = board.board
+    kr, kc = king_pos
+    sq = kr * 9 + kc
+    enemy = 'black' if color == 'red' else 'red'
+    # Ký hiệu quân đối phương: chữ hoa = Đỏ, chữ thường = Đen
+    ju, pao, ma, bing, jiang = ('R', 'P', 'M', 'B', 'J') if enemy == 'red' else ('r', 'p', 'm', 'b', 'j')
+
+    # Xe (quân đầu tiên trên tia) và Pháo (sau đúng một ngòi)
+    for ray in RAYS[sq]:
+        screened = False
+        for r, c in ray:
+            piece = grid[r][c]
+            if piece is not None:
+                if screened:
+                    if piece.symbol == pao:
+                        return True
+                    break
+                if piece.symbol == ju:
+                    return True
+                screened = True
+
+    # Mã: chân Mã không bị cản
+    for (r, c), (leg_r, leg_c) in _MA_CHECKS[sq]:
+        piece = grid[r][c]
+        if piece is not None and piece.symbol == ma and grid[leg_r][leg_c] is None:
+            return True
+
+    # Tốt: tiến thẳng, hoặc đi ngang sau khi qua sông
+    forward = 1 if enemy == 'black' else -1
+    r = kr - forward
+    if 0 <= r < 10:
+        piece = grid[r][kc]
+        if piece is not None and piece.symbol == bing:
+            return True
+    for c in (kc - 1, kc + 1):
+        if 0 <= c < 9:
+            piece = grid[kr][c]
+            if piece is not None and piece.symbol == bing and is_across_river((kr, c), enemy):
+                return True
+
+    # Tướng đối phương chỉ đi trong cung của nó
+    for r, c in ORTHOGONAL[sq]:
+        piece = grid[r][c]
+        if piece is not None and piece.symbol == jiang and is_in_palace((r, c), enemy):
+            return True
+    return False
+
+
+def can_move(grid, piece, to_pos) -> bool:
+    """to_pos in piece.get_valid_moves(board) (nước giả hợp lệ, chưa xét chiếu), chỉ dò đúng nước này."""
+    row, col = piece.position
+    to_row, to_col = to_pos
+    if not (0 <= to_row < 10 and 0 <= to_col < 9):
+        return False
+    target = grid[to_row][to_col]
+    if target is not None and target.color == piece.color:
+        return False
+    kind = piece.symbol.lower()
+    sq = row * 9 + col
+    if kind == 'r' or kind == 'p':
+        if row == to_row and col != to_col:
+            step = 1 if to_col > col else -1
+            between = sum(1 for c in range(col + step, to_col, step) if grid[row][c] is not None)
+        elif col == to_col and row != to_row:
+            step = 1 if to_row > row else -1
+            between = sum(1 for r in range(row + step, to_row, step) if grid[r][col] is not None)
+        else:
+            return False
+        if kind == 'r':
+            return between == 0
+        # Pháo: đi không ăn thì đường trống, ăn quân thì qua đúng một ngòi
+        return between == (0 if target is None else 1)
+    if kind == 'm':
+        for (leg_row, leg_col), dest in MA_MOVES[sq]:
+            if dest == to_pos:
+                return grid[leg_row][leg_col] is None
+        return False
+    if kind == 'x':
+        for (eye_row, eye_col), dest in XIANG_MOVES[piece.color][sq]:
+            if dest == to_pos:
+                return grid[eye_row][eye_col] is None
+        return False
+    table = SHI_MOVES if kind == 's' else JIANG_MOVES if kind == 'j' else BING_MOVES
+    return to_pos in table[piece.color][sq]
+
+
+def play_move(board, from_pos, to_pos):
+    """
+    Đi một nước sau khi kiểm tra hợp lệ. Trả về None nếu hợp lệ,
+    ngược lại trả về chuỗi mô tả lỗi (board giữ nguyên).
+    """
+    piece = board.get_piece(from_pos)
+    if piece is None:
+        return f"no piece at {from_pos}"
+    if piece.color != board.current_player:
+        return f"{piece} moved out of turn"
+    if not can_move(board.board, piece, to_pos):
+        return f"{piece} cannot move {from_pos} -> {to_pos}"
+    captured = board.move_piece(from_pos, to_pos, validate=False)
+    if board.is_in_check(piece.color):
+        board.undo_move(from_pos, to_pos, captured)
+        return f"{piece} {from_pos} -> {to_pos} leaves own king in check"
+    return None
+
+
+class _ReplayGrid:
+    """Thế cờ tối giản cho replay nhanh: lưới quân + bên đi (đủ cho can_move, king_attacked, parse_wxf)."""
+    __slots__ = ('board', 'current_player', 'kings')
+
+    def __init__(self, fen: str):
+        self.board, self.current_player = grid_from_fen(fen)
+        self.kings = {piece.color: piece for row in self.board for piece in row
+                      if piece is not None and piece.symbol in 'Jj'}
+
+    def get_piece(self, position):
+        row, col = position
+        if 0 <= row < 10 and 0 <= col < 9:
+            return self.board[row][col]
+        return None
+
+    def play(self, from_pos, to_pos):
+        """Như play_move nhưng sửa thẳng lưới và kiểm tra chiếu bằng king_attacked."""
+        piece = self.get_piece(from_pos)
+        if piece is None:
+            return f"no piece at {from_pos}"
+        if piece.color != self.current_player:
+            return f"{piece} moved out of turn"
+        grid = self.board
+        if not can_move(grid, piece, to_pos):
+            return f"{piece} cannot move {from_pos} -> {to_pos}"
+        captured = grid[to_pos[0]][to_pos[1]]
+        grid[from_pos[0]][from_pos[1]] = None
+        grid[to_pos[0]][to_pos[1]] = piece
+        piece.position = to_pos
+        king = self.kings.get(piece.color)
+        king_pos = king.position if king is not None else None
+        if king_pos is not None and grid[king_pos[0]][king_pos[1]] is king and king_attacked(self, piece.color, king_pos):
+            grid[from_pos[0]][from_pos[1]] = piece
+            grid[to_pos[0]][to_pos[1]] = captured
+            piece.position = from_pos
+            return f"{piece} {from_pos} -> {to_pos} leaves own king in check"
+        self.current_player = 'black' if piece.color == 'red' else 'red'
+        return None
+
+
+def replay_moves(moves, start_fen: str = START_FEN, board=None) -> ReplayResult:
+    """
+    Replay danh sách nước ((r, c), (r, c)) và dừng ở nước sai đầu tiên.
+    Truyền board thì đi thẳng trên board đó (play_move), không thì replay nhanh trên lưới quân.
+    """
+    state = _ReplayGrid(start_fen) if board is None else board
+    play = state.play if board is None else lambda from_pos, to_pos: play_move(board, from_pos, to_pos)
+    packed = []
+    for ply, (from_pos, to_pos) in enumerate(moves):
+        error = play(from_pos, to_pos)
+        if error is not None:
+            return ReplayResult(board, packed, ply, error, start_fen)
+        packed.append(pack_move(from_pos, to_pos))
+    return ReplayResult(board, packed, start_fen=start_fen)
+
+
+def replay_notation(tokens, start_fen: str = START_FEN, notation: str = 'auto') -> ReplayResult:
+    """Replay các token ICCS/WXF ('auto' = tự nhận dạng theo từng token)."""
+    if isinstance(tokens, str):
+        tokens = tokenize_game(tokens)
+    state = _ReplayGrid(start_fen)
+    packed = []
+    for ply, token in enumerate(tokens):
+        kind = detect_notation(token) if notation == 'auto' else notation
+        try:
+            if kind == 'iccs':
+                from_pos, to_pos = parse_iccs(token)
+            elif kind == 'wxf':
+                from_pos, to_pos = parse_wxf(state, token)
+            else:
+                raise ValueError(f"Unknown notation {notation!r}")
+        except NotationError as e:
+            return ReplayResult(None, packed, ply, str(e), start_fen)
+        error = state.play(from_pos, to_pos)
+        if error is not None:
+            return ReplayResult(None, packed, ply, f"{token}: {error}", start_fen)
+        packed.append(pack_move(from_pos, to_pos))
+    return ReplayResult(None, packed, start_fen=start_fen)
+
+
+def validate_record(game: GameRecord) -> ReplayResult:
+    return replay_moves(game.iter_moves(), game.fen)
+
+
+def import_games(lines, notation: str = 'auto', start_fen: str = START_FEN):
+    """
+    Generator: mỗi dòng là một ván (ký pháp ICCS/WXF) -> (line_no, GameRecord | None, ReplayResult).
+    Ván có nước sai trả về record None để bên gọi tự ghi log/bỏ qua.
+    """
+    for line_no, line in enumerate(lines):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        result = replay_notation(line, start_fen, notation)
+        record = None
+        if result.ok:
+            record = GameRecord(result.moves, start_fen='' if start_fen == START_FEN else start_fen)
+        yield line_no, record, result
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from records.game_record import GameWriter
+
+    parser = argparse.ArgumentParser(description='Nhập ván cờ ICCS/WXF vào file record nhị phân')
+    parser.add_argument('source', help='File text, mỗi dòng một ván')
+    parser.add_argument('output', help='File record (.xqg) để ghi nối tiếp')
+    parser.add_argument('--notation', default='auto', choices=['auto', 'iccs', 'wxf'])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    imported = rejected = 0
+    with open(args.source, encoding='utf-8') as src, GameWriter(args.output) as writer:
+        for line_no, record, result in import_games(src, args.notation):
+            if record is None:
+                rejected += 1
+                print(f"line {line_no + 1}: illegal ply {result.error_ply}: {result.error}")
+            else:
+                writer.write(record)
+                imported += 1
+    elapsed = time.perf_counter() - start
+    print(f"Imported {imported} games, rejected {rejected} in {elapsed:.2f}s "
+          f"({(imported + rejected) / max(elapsed, 1e-9):.0f} games/s)")
@@ -1,22 +1,160 @@
 
+import random
 import time
+
 from utils import move_generation
 from board.board import Board
+from search.see import order_moves, see
+from search.stats import SearchStats
+
+QUIESCENCE_DEPTH = 4
+# Khi có deadline, đồng hồ chỉ được đọc mỗi CLOCK_CHECK_NODES nút (~vài ms), không phải mỗi nút
+CLOCK_CHECK_NODES = 64
+
+
+class SearchAborted(Exception):
+    """Hết ngân sách nút (max_nodes), quá deadline hoặc bị hủy giữa chừng; partial = kết quả từng phần ở gốc."""
+
+    def __init__(self, partial=None):
+        super().__init__(partial)
+        self.partial = partial
+
+
 class AlphaBeta:
-    def __init__(self):
-        self.pruned_branches = 0
-        self.time_taken = 0
-        self.total_nodes = 0
+    def __init__(self, tablebase=None, eval_cache=None, quiescence=False, quiescence_depth=None,
+                 max_nodes=None, stats=None, deadline=None, root_noise=0.0, rng=None, should_stop=None):
+        self.tablebase = tablebase  # search.tablebase.Tablebase, tra ở các nút lá nếu có
+        self.eval_cache = eval_cache  # evaluation.eval_cache.EvalCache, dùng chung giữa các lần search
+        # Quiescence: ở nút lá tiếp tục xét các nước ăn quân không lỗ (SEE >= 0)
+        self.quiescence = quiescence
+        self.quiescence_depth = QUIESCENCE_DEPTH if quiescence_depth is None else quiescence_depth
+        # Ngân sách nút (tính cả nút quiescence, cộng dồn qua các lần search), không bao giờ bị vượt;
+        # None = không giới hạn
+        self.max_nodes = max_nodes
+        # Mốc time.perf_counter() phải dừng tìm kiếm (giới hạn cứng thời gian); None = không giới hạn
+        self.deadline = deadline
+        # Hàm không tham số, trả về True để dừng (vd. yêu cầu hủy từ bên ngoài); gọi cùng nhịp với đồng hồ
+        self.should_stop = should_stop
+        # Giảm sức mạnh: cộng nhiễu ngẫu nhiên đều trong [-root_noise, root_noise] vào điểm của từng nước
+        # gốc khi chọn nước. Khi có nhiễu, các nước gốc được tìm với cửa sổ đầy đủ để điểm là chính xác
+        # (nếu không, nước tệ bị cắt tỉa chỉ có cận trên sát alpha và nhiễu sẽ chọn nhầm nó).
+        self.root_noise = root_noise
+        self.rng = rng
+        self._check_at = 0  # tổng số nút mà tại đó kiểm tra ngân sách / đồng hồ lần tới
+        # Biến chính (PV): {độ sâu còn lại: [(from_pos, to_pos), ...]} của nút đang xét trên đường đi hiện
+        # tại; None = không ghi (mặc định). Độ sâu giảm 1 mỗi ply nên mỗi độ sâu chỉ có một nút trên đường đi.
+        self.pv = None
+        # Bộ đếm của lần tìm kiếm (search.stats.SearchStats), dùng chung qua các độ sâu
+        self.stats = stats if stats is not None else SearchStats(eval_cache)
+
+    @property
+    def total_nodes(self) -> int:
+        return self.stats.total_nodes
+
+    @property
+    def pruned_branches(self) -> int:
+        return self.stats.cutoffs
+
+    @property
+    def time_taken(self) -> float:
+        return self.stats.elapsed
+
+    def _check_limits(self):
+        total = self.stats.nodes + self.stats.qnodes
+        if self.max_nodes is not None and total >= self.max_nodes:
+            raise SearchAborted
+        if self.deadline is None and self.should_stop is None:
+            self._check_at = float('inf') if self.max_nodes is None else self.max_nodes
+            return
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchAborted
+        if self.should_stop is not None and self.should_stop():
+            raise SearchAborted
+        self._check_at = total + CLOCK_CHECK_NODES
+        if self.max_nodes is not None:
+            self._check_at = min(self._check_at, self.max_nodes)
+
+    def search_root(self, board: Board, depth: int, is_maximizing: bool = True, first_move=None):
+        """
+        Một vòng tìm kiếm từ gốc với cửa sổ đầy đủ; đo thời gian cho cả vòng (không đo từng nút).
+        first_move: (from_pos, to_pos) xét trước tiên (nước tốt nhất của vòng trước).
+        Hết ngân sách nút / quá deadline giữa vòng thì ném SearchAborted; e.partial là nước tốt nhất trong
+        số các nước gốc đã xét xong (None nếu chưa xong nước nào). Khi đó board còn ở giữa cây: hãy search
+        trên bản sao.
+        """
+        self.stats.begin_iteration(depth)
+        completed = False
+        try:
+            if depth == 0:
+                result = self.search(board, depth, is_maximizing, float('-inf'), float('inf'))
+            else:
+                result = self._search_root_moves(board, depth, is_maximizing, first_move)
+            completed = True
+            return result
+        finally:
+            self.stats.end_iteration(completed)
+
+    def _search_root_moves(self, board: Board, depth: int, is_maximizing: bool, first_move):
+        stats = self.stats
+        if stats.nodes + stats.qnodes >= self._check_at:
+            self._check_limits()
+        stats.nodes += 1
+
+        alpha, beta = float('-inf'), float('inf')
+        best_score = float('-inf') if is_maximizing else float('inf')
+        best_piece = best_move = None
+        valid_moves = move_generation.get_valid_moves(board, board.current_player)
+        flat_moves = order_moves(board, move_generation.list1_2list(valid_moves))
+        if not flat_moves:
+            return None, None, -move_generation.MATE_SCORE if is_maximizing else move_generation.MATE_SCORE
+        if first_move is not None:
+            flat_moves.sort(key=lambda entry: (entry[0].position, entry[1]) != tuple(first_move))
+        noise = self.root_noise
+        if noise:
+            rng = self.rng if self.rng is not None else random
+
+        for piece, move in flat_moves:
+            from_pos = piece.position
+            captured = board.move_piece(from_pos, move)
+            try:
+                _, _, value = self.search(board, depth - 1, not is_maximizing, alpha, beta)
+            except SearchAborted:
+                partial = (best_piece, best_move, best_score) if best_move is not None else None
+                raise SearchAborted(partial)
+            board.undo_move(from_pos, move, captured)
+            if noise:
+                value += rng.uniform(-noise, noise)
+            if (value > best_score) if is_maximizing else (value < best_score):
+                best_score, best_piece, best_move = value, from_pos, move
+            if noise:
+                continue
+            if is_maximizing:
+                alpha = max(alpha, best_score)
+            else:
+                beta = min(beta, best_score)
+        return best_piece, best_move, best_score
 
     def search(self, board: Board, depth: int, is_maximizing: bool, alpha: float, beta: float):
-        start_time = time.time()
-        self.total_nodes += 1
+        stats = self.stats
+        if stats.nodes + stats.qnodes >= self._check_at:
+            self._check_limits()
+        stats.nodes += 1
+        pv = self.pv
+        if pv is not None:
+            pv[depth] = []
 
         ai_color = board.current_player if is_maximizing else ('black' if board.current_player == 'red' else 'red')
 
-        if depth == 0 or board.is_game_over():
-            score = move_generation.evaluation_board(board, ai_color)
-            self.time_taken += time.time() - start_time
+        if depth == 0:
+            score = self.tablebase.score(board, ai_color) if self.tablebase is not None else None
+            if score is None:
+                # Chỉ thế đang bị chiếu mới cần xét hết nước (chiếu bí); evaluation không tự kiểm tra
+                if board.is_in_check(board.current_player) and not board.get_legal_moves(board.current_player):
+                    score = -move_generation.MATE_SCORE if is_maximizing else move_generation.MATE_SCORE
+                elif self.quiescence:
+                    score = self.quiesce(board, self.quiescence_depth, is_maximizing, alpha, beta, ai_color)
+                else:
+                    score = move_generation.evaluation_board(board, ai_color, alpha, beta, self.eval_cache)
             return None, None, score
 
         best_score = float('-inf') if is_maximizing else float('inf')
@@ -24,8 +162,12 @@ class AlphaBeta:
         best_piece = None
 
         valid_moves = move_generation.get_valid_moves(board, board.current_player)
-        flat_moves = move_generation.list1_2list(valid_moves)
-        for piece, move in flat_moves:
+        flat_moves = order_moves(board, move_generation.list1_2list(valid_moves))
+        if not flat_moves:
+            # Hết nước đi (bị chiếu bí hoặc bị vây) là thua
+            return None, None, -move_generation.MATE_SCORE if is_maximizing else move_generation.MATE_SCORE
+
+        for index, (piece, move) in enumerate(flat_moves):
             from_pos = piece.position
             captured = board.move_piece(from_pos, move)
 
@@ -38,17 +180,69 @@ class AlphaBeta:
                     best_score = value
                     best_piece = from_pos
                     best_move = move
+                    if pv is not None:
+                        pv[depth] = [(from_pos, move)] + pv[depth - 1]
                 alpha = max(alpha, best_score)
             else:
                 if value < best_score:
                     best_score = value
                     best_piece = from_pos
                     best_move = move
+                    if pv is not None:
+                        pv[depth] = [(from_pos, move)] + pv[depth - 1]
                 beta = min(beta, best_score)
 
             if beta <= alpha:
-                self.pruned_branches += 1
+                stats.cutoffs += 1
+                if index == 0:
+                    stats.first_move_cutoffs += 1
                 break
 
-        self.time_taken += time.time() - start_time
         return best_piece, best_move, best_score
+
+    def quiesce(self, board: Board, depth: int, is_maximizing: bool, alpha: float, beta: float, ai_color: str):
+        """Tìm kiếm tĩnh: chỉ xét nước ăn quân, bỏ các nước ăn bị lỗ theo SEE."""
+        stats = self.stats
+        if stats.nodes + stats.qnodes >= self._check_at:
+            self._check_limits()
+        stats.qnodes += 1
+        stand_pat = move_generation.evaluation_board(board, ai_color, alpha, beta, self.eval_cache)
+        if depth == 0:
+            return stand_pat
+        if is_maximizing:
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat
+            beta = min(beta, stand_pat)
+
+        captures = []
+        for from_pos, to_pos in move_generation.get_captures(board, board.current_player):
+            gain = see(board, from_pos, to_pos)
+            if gain >= 0:
+                captures.append((gain, from_pos, to_pos))
+        captures.sort(key=lambda entry: -entry[0])
+
+        best_score = stand_pat
+        for index, (_, from_pos, to_pos) in enumerate(captures):
+            captured = board.move_piece(from_pos, to_pos, validate=False)
+            if board.is_in_check(board.current_player) and not board.get_legal_moves(board.current_player):
+                value = move_generation.MATE_SCORE if is_maximizing else -move_generation.MATE_SCORE
+            else:
+                value = self.quiesce(board, depth - 1, not is_maximizing, alpha, beta, ai_color)
+            board.undo_move(from_pos, to_pos, captured)
+
+            if is_maximizing:
+                best_score = max(best_score, value)
+                alpha = max(alpha, best_score)
+            else:
+                best_score = min(best_score, value)
+                beta = min(beta, best_score)
+            if beta <= alpha:
+                stats.cutoffs += 1
+                if index == 0:
+                    stats.first_move_cutoffs += 1
+                break
+        return best_score
@@ -1,31 +1,78 @@
 import time
-from search.alphabeta import AlphaBeta
-def iterative_deepening_search(board, max_depth=5, time_limit=50.0):
+from search.alphabeta import AlphaBeta, SearchAborted
+from search.see import order_moves
+from utils import move_generation
+def iterative_deepening_search(board, max_depth=5, time_limit=50.0, tablebase=None, eval_cache=None, quiescence=False,
+                               max_nodes=None, verbose=True, stats=None, hard_time_limit=None, root_noise=0.0,
+                               rng=None, time_manager=None):
     """
     search_engine: là một instance của lớp Minimax hoặc AlphaBeta
     board: trạng thái hiện tại của bàn cờ
     max_depth: độ sâu tối đa cần tìm
-    time_limit: thời gian tối đa (tính bằng giây)
+    time_limit: giới hạn mềm (giây): chỉ kiểm tra trước mỗi độ sâu, quá thì không bắt đầu độ sâu mới;
+        None để chỉ dừng theo max_depth / max_nodes / hard_time_limit
+    tablebase: bảng tàn cuộc dùng ở nút lá (tùy chọn)
+    eval_cache: cache đánh giá (tùy chọn), giữ qua các độ sâu nên lá của vòng trước được dùng lại
+    quiescence: bật tìm kiếm tĩnh (chỉ nước ăn quân không lỗ theo SEE) ở nút lá
+    max_nodes: ngân sách nút cho cả nước đi (cộng dồn qua các độ sâu), không bao giờ bị vượt.
+        Hết ngân sách giữa một độ sâu thì dùng nước tốt nhất trong các nước gốc đã xét xong ở độ sâu
+        đó (nước tốt nhất của vòng trước được xét đầu tiên), nếu chưa xong nước nào thì giữ kết quả
+        vòng trước. Không phụ thuộc đồng hồ nên cùng thế cờ + cài đặt luôn cho cùng kết quả.
+    hard_time_limit: giới hạn cứng (giây): quá thì dừng ngay giữa độ sâu (đồng hồ được kiểm tra mỗi
+        CLOCK_CHECK_NODES nút) và xử lý như hết ngân sách nút
+    root_noise, rng: nhiễu điểm ở gốc để giảm sức mạnh (xem AlphaBeta)
+    time_manager: search.time_manager.TimeManager (theo đồng hồ ván cờ): deadline của nó là giới hạn cứng,
+        sau mỗi độ sâu hỏi should_continue() (giới hạn mềm, nới ra khi nước tốt nhất còn đổi)
+    verbose: in tiến trình từng độ sâu
+    stats: search.stats.SearchStats để nhận thống kê (tùy chọn)
     """
     start_time = time.time()
     best_result = None
-    alphabeta=AlphaBeta()
+    deadline = time.perf_counter() + hard_time_limit if hard_time_limit is not None else None
+    if time_manager is not None:
+        deadline = time_manager.deadline if deadline is None else min(deadline, time_manager.deadline)
+    alphabeta=AlphaBeta(tablebase=tablebase, eval_cache=eval_cache, quiescence=quiescence, max_nodes=max_nodes,
+                        stats=stats, deadline=deadline, root_noise=root_noise, rng=rng)
     for depth in range(1, max_depth + 1):
         current_time = time.time()
-        if current_time - start_time > time_limit:
-            print(f"⏱️ Hết thời gian trước depth {depth}, trả kết quả tốt nhất hiện có.")
+        if time_limit is not None and current_time - start_time > time_limit:
+            if verbose:
+                print(f"⏱️ Hết thời gian trước depth {depth}, trả kết quả tốt nhất hiện có.")
             break
 
-        print(f"🔍 Đang tìm với độ sâu {depth}...")
+        if verbose:
+            print(f"🔍 Đang tìm với độ sâu {depth}...")
+        first_move = best_result[:2] if best_result is not None and best_result[1] is not None else None
         try:
 
-            result = alphabeta.search(board.copy(), depth, is_maximizing=True, alpha=float('-inf'), beta=float('inf'))
+            result = alphabeta.search_root(board.copy(), depth, is_maximizing=True, first_move=first_move)
             best_result = result
+            if time_manager is not None and not time_manager.should_continue(result[:2]):
+                if verbose:
+                    print(f"⏱️ Dừng sau depth {depth} theo phân bổ thời gian ({time_manager.elapsed():.2f}s).")
+                depth += 1
+                break
+        except SearchAborted as aborted:
+            if aborted.partial is not None:
+                best_result = aborted.partial
+            if verbose:
+                print(f"🧮 Hết ngân sách nút / thời gian ở depth {depth}, trả kết quả tốt nhất hiện có.")
+            break
         except Exception as e:
             print(f"❌ Lỗi ở depth {depth}: {e}")
             break
+    else:
+        depth = max_depth + 1
+
+    if best_result is None and (max_nodes is not None or deadline is not None):
+        # Ngân sách quá nhỏ để xét xong một nước ở độ sâu 1: đi nước đầu tiên theo thứ tự sắp xếp
+        moves = order_moves(board, move_generation.list1_2list(
+            move_generation.get_valid_moves(board, board.current_player)))
+        if moves:
+            best_result = (moves[0][0].position, moves[0][1], None)
 
     end_time = time.time()
-    print(f"✅ Đã tìm xong đến độ sâu {depth-1}, mất {end_time - start_time:.2f} giây.")
+    if verbose:
+        print(f"✅ Đã tìm xong đến độ sâu {depth-1}, mất {end_time - start_time:.2f} giây.")
 
     return best_result  # (best_piece_position, best_move, best_score)
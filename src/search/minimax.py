@@ -17,13 +17,18 @@ class Minimax:
         start_time = time.time()
         self.total_nodes += 1
         ai_color = board.current_player if is_maximizing else ('black' if board.current_player == 'red' else 'red')
-        # Nếu đạt depth 0 hoặc hết game
-        if depth == 0 or board.is_game_over():
+        # Nếu đạt depth 0: chỉ thế đang bị chiếu mới cần xét chiếu bí
+        if depth == 0:
+            if board.is_in_check(board.current_player) and not board.get_legal_moves(board.current_player):
+                return None, None, -move_generation.MATE_SCORE if is_maximizing else move_generation.MATE_SCORE
             score = move_generation.evaluation_board(board, ai_color)
             return None, None, score
 
         valid_moves = move_generation.get_valid_moves(board, board.current_player)
         flat_moves = move_generation.list1_2list(valid_moves )
+        if not flat_moves:
+            # Hết nước đi (bị chiếu bí hoặc bị vây) là thua
+            return None, None, -move_generation.MATE_SCORE if is_maximizing else move_generation.MATE_SCORE
 
         best_score = float('-inf') if is_maximizing else float('inf')
         best_move = None
@@ -0,0 +1,112 @@
+# MultiPV: K nước gốc tốt nhất kèm điểm và biến chính (PV) trong một lần tìm kiếm
+"""
+Mỗi độ sâu tìm mọi nước gốc một lần (không phải K lần tìm riêng với nước bị loại trừ):
+    - khi chưa đủ K dòng, nước gốc được tìm với cửa sổ đầy đủ (điểm chính xác)
+    - khi đã đủ, cửa sổ là (điểm dòng thứ K, +inf): nước không vượt được dòng thứ K bị cắt tỉa như
+      alpha-beta thường, nước vượt được có điểm chính xác và thay dòng thứ K
+Công sức được dùng lại giữa các dòng và các độ sâu: các dòng của độ sâu trước được xét trước (theo thứ
+tự hạng), nên cửa sổ hẹp ngay từ đầu; eval cache dùng chung cho mọi dòng. PV lấy từ bảng PV của
+AlphaBeta (self.pv) nên không phải tìm lại.
+Điểm tính theo góc nhìn bên đi (dương là bên đi có lợi).
+"""
+import time
+from collections import namedtuple
+
+from records.notation import format_iccs
+from search.alphabeta import AlphaBeta, SearchAborted
+from search.see import order_moves
+from utils import move_generation
+
+
+class MultiPVLine(namedtuple('MultiPVLine', 'rank move score depth pv')):
+    """rank (1 = tốt nhất), move (from_pos, to_pos), score, depth, pv [(from_pos, to_pos), ...]."""
+
+    __slots__ = ()
+
+    def as_dict(self) -> dict:
+        return {'rank': self.rank, 'move': format_iccs(*self.move), 'score': self.score, 'depth': self.depth,
+                'pv': [format_iccs(*move) for move in self.pv]}
+
+
+class MultiPVSearch(AlphaBeta):
+    def __init__(self, multipv: int = 3, **kwargs):
+        super().__init__(**kwargs)
+        if multipv < 1:
+            raise ValueError("multipv must be at least 1")
+        self.multipv = multipv
+        self.pv = {}
+
+    def search_lines(self, board, depth: int, previous=()):
+        """
+        Một vòng ở độ sâu `depth` (>= 1); previous = các dòng của vòng trước (xét trước).
+        Trả về list MultiPVLine (tối đa multipv dòng, tốt nhất trước). Hết ngân sách / deadline thì ném
+        SearchAborted với partial = các dòng đã có chính xác ở độ sâu này.
+        """
+        self.stats.begin_iteration(depth)
+        completed = False
+        try:
+            lines = self._search_lines(board, depth, previous)
+            completed = True
+            return lines
+        finally:
+            self.stats.end_iteration(completed)
+
+    def _search_lines(self, board, depth, previous):
+        stats = self.stats
+        if stats.nodes + stats.qnodes >= self._check_at:
+            self._check_limits()
+        stats.nodes += 1
+
+        flat_moves = order_moves(board, move_generation.list1_2list(
+            move_generation.get_valid_moves(board, board.current_player)))
+        if previous:
+            rank = {line.move: line.rank for line in previous}
+            flat_moves.sort(key=lambda entry: rank.get((entry[0].position, entry[1]), len(rank) + 1))
+
+        lines = []  # (score, thứ tự xét, move, pv), tốt nhất trước
+        for index, (piece, move) in enumerate(flat_moves):
+            from_pos = piece.position
+            full = len(lines) >= self.multipv
+            alpha = lines[-1][0] if full else float('-inf')
+            captured = board.move_piece(from_pos, move)
+            try:
+                _, _, value = self.search(board, depth - 1, False, alpha, float('inf'))
+            except SearchAborted:
+                raise SearchAborted(self._lines(lines, depth) or None)
+            board.undo_move(from_pos, move, captured)
+            if full and value <= alpha:
+                continue  # không vào được top K (điểm chỉ là cận trên)
+            lines.append((value, index, (from_pos, move), [(from_pos, move)] + self.pv.get(depth - 1, [])))
+            lines.sort(key=lambda line: (-line[0], line[1]))
+            del lines[self.multipv:]
+        return self._lines(lines, depth)
+
+    @staticmethod
+    def _lines(lines, depth):
+        return [MultiPVLine(rank, move, score, depth, pv)
+                for rank, (score, _, move, pv) in enumerate(lines, start=1)]
+
+
+def multipv_search(board, multipv: int = 3, max_depth: int = 3, tablebase=None, eval_cache=None,
+                   quiescence: bool = False, max_nodes=None, hard_time_limit=None, stats=None, should_stop=None,
+                   on_iteration=None):
+    """
+    Iterative deepening MultiPV tới max_depth; trả về các dòng của độ sâu cuối cùng xét xong (hết
+    ngân sách / thời gian giữa chừng thì dùng độ sâu trước, hoặc các dòng từng phần nếu chưa xong độ
+    sâu nào). board không bị thay đổi. Không có nước đi thì trả về [].
+    should_stop: hàm trả về True để dừng sớm (xem AlphaBeta); on_iteration(lines): gọi sau mỗi độ sâu xong.
+    """
+    deadline = time.perf_counter() + hard_time_limit if hard_time_limit is not None else None
+    search = MultiPVSearch(multipv, tablebase=tablebase, eval_cache=eval_cache, quiescence=quiescence,
+                           max_nodes=max_nodes, stats=stats, deadline=deadline, should_stop=should_stop)
+    lines = []
+    for depth in range(1, max_depth + 1):
+        try:
+            lines = search.search_lines(board.copy(), depth, lines)
+            if on_iteration is not None:
+                on_iteration(lines)
+        except SearchAborted as aborted:
+            if not lines and aborted.partial:
+                lines = aborted.partial
+            break
+    return lines
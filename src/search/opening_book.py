@@ -0,0 +1,192 @@
+# Sách khai cuộc (开局库 - Kāijú kù): thống kê nước đi theo hash thế cờ
+"""
+File sách gồm header + các bản ghi cố định (hash, move, games, points) sắp xếp theo (hash, move).
+    move   = nước đi nén 16 bit (records.game_record.pack_move)
+    points = 2 * thắng + hòa, tính cho bên đi nước đó
+Lúc chơi, engine đọc sách qua mmap + tìm kiếm nhị phân và chọn nước theo trọng số.
+
+Tạo sách: PYTHONPATH=src python -m search.opening_book games.xqg book.bin --max-ply 20 --workers 4
+"""
+import mmap
+import os
+import random
+import struct
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from board.fen import board_from_fen
+from records.game_record import (
+    RESULT_BLACK_WIN, RESULT_DRAW, RESULT_RED_WIN, iter_games, pack_move, read_index, unpack_move,
+)
+from records.replay import play_move
+
+MAGIC = b'XQOB'
+VERSION = 1
+BOOK_HEADER = struct.Struct('<4sHHQ')   # magic, version, flags, số bản ghi
+ENTRY = struct.Struct('<QHII')          # hash, move, games, points
+DEFAULT_BOOK_PATH = os.path.join('src', 'res', 'book.bin')
+DEFAULT_MAX_PLY = 20
+GAMES_PER_TASK = 2048
+
+
+def _points(result, color) -> int:
+    if result == RESULT_DRAW:
+        return 1
+    if (result == RESULT_RED_WIN and color == 'red') or (result == RESULT_BLACK_WIN and color == 'black'):
+        return 2
+    return 0
+
+
+def collect_stats(games, max_ply: int = DEFAULT_MAX_PLY) -> dict:
+    """{(hash, move): [games, points]} từ các ván có kết quả (ván chưa rõ kết quả bị bỏ qua)."""
+    stats = defaultdict(lambda: [0, 0])
+    for game in games:
+        if game.result not in (RESULT_RED_WIN, RESULT_BLACK_WIN, RESULT_DRAW):
+            continue
+        board = board_from_fen(game.fen)
+        for ply, (from_pos, to_pos) in enumerate(game.iter_moves()):
+            if ply >= max_ply:
+                break
+            key, color = board.zobrist_key, board.current_player
+            if play_move(board, from_pos, to_pos) is not None:
+                break
+            entry = stats[(key, pack_move(from_pos, to_pos))]
+            entry[0] += 1
+            entry[1] += _points(game.result, color)
+    return dict(stats)
+
+
+def _collect_range(args):
+    path, start, count, max_ply = args
+    games = (game for i, game in zip(range(count), iter_games(path, start)))
+    return collect_stats(games, max_ply)
+
+
+def build_book(corpus_path: str, book_path: str, max_ply: int = DEFAULT_MAX_PLY,
+               min_games: int = 1, workers: int = 1, games_per_task: int = GAMES_PER_TASK) -> int:
+    """Tạo file sách từ kho ván cờ. workers > 1 chia kho thành các đoạn cho process pool."""
+    if workers <= 1:
+        merged = collect_stats(iter_games(corpus_path), max_ply)
+    else:
+        # Đếm số ván, bắt đầu từ entry cuối của block index nếu có
+        index = read_index(corpus_path)
+        total = index[-1][0] if index else 0
+        for _ in iter_games(corpus_path, total):
+            total += 1
+        tasks = [(corpus_path, start, games_per_task, max_ply)
+                 for start in range(0, total, games_per_task)]
+        merged = defaultdict(lambda: [0, 0])
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for partial in pool.map(_collect_range, tasks):
+                for key, (games, points) in partial.items():
+                    entry = merged[key]
+                    entry[0] += games
+                    entry[1] += points
+    return write_book(book_path, merged, min_games)
+
+
+def write_book(book_path: str, stats: dict, min_games: int = 1) -> int:
+    entries = sorted((key, move, games, points)
+                     for (key, move), (games, points) in stats.items() if games >= min_games)
+    tmp_path = book_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(BOOK_HEADER.pack(MAGIC, VERSION, 0, len(entries)))
+        for entry in entries:
+            f.write(ENTRY.pack(*entry))
+    os.replace(tmp_path, book_path)
+    return len(entries)
+
+
+class OpeningBook:
+    """Đọc sách khai cuộc qua mmap."""
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count = BOOK_HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: not an opening book file")
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def probe(self, key: int) -> list:
+        """[(from_pos, to_pos, games, points), ...] của thế cờ có hash `key`."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if struct.unpack_from('<Q', self.map, BOOK_HEADER.size + mid * ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        result = []
+        while lo < self.count:
+            h, move, games, points = ENTRY.unpack_from(self.map, BOOK_HEADER.size + lo * ENTRY.size)
+            if h != key:
+                break
+            result.append(unpack_move(move) + (games, points))
+            lo += 1
+        return result
+
+    def choose_move(self, board, rng=None, min_games: int = 1):
+        """
+        Chọn nước theo trọng số = số ván * tỉ lệ điểm (làm trơn Laplace).
+        Trả về (from_pos, to_pos) hoặc None nếu thế cờ không có trong sách.
+        """
+        candidates = []
+        weights = []
+        for from_pos, to_pos, games, points in self.probe(board.zobrist_key):
+            if games < min_games:
+                continue
+            piece = board.get_piece(from_pos)
+            # Phòng trường hợp trùng hash: nước trong sách phải đi được trên thế cờ này
+            if piece is None or piece.color != board.current_player or to_pos not in piece.get_valid_moves(board):
+                continue
+            weight = games * (points + 1) / (2 * games + 2)
+            if weight > 0:
+                candidates.append((from_pos, to_pos))
+                weights.append(weight)
+        if not candidates:
+            return None
+        return (rng or random).choices(candidates, weights)[0]
+
+    def close(self):
+        if getattr(self, 'map', None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_loaded_books = {}
+
+
+def load_book(path: str = DEFAULT_BOOK_PATH):
+    """Mở sách một lần cho mỗi process; trả về None nếu không có file."""
+    if path not in _loaded_books:
+        _loaded_books[path] = OpeningBook(path) if os.path.exists(path) else None
+    return _loaded_books[path]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Tạo sách khai cuộc từ kho ván cờ')
+    parser.add_argument('corpus', help='File record (.xqg), ví dụ từ src/selfplay.py')
+    parser.add_argument('book', nargs='?', default=DEFAULT_BOOK_PATH, help='File sách đầu ra')
+    parser.add_argument('--max-ply', type=int, default=DEFAULT_MAX_PLY)
+    parser.add_argument('--min-games', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n = build_book(args.corpus, args.book, args.max_ply, args.min_games, args.workers)
+    print(f"Wrote {n} book entries in {time.perf_counter() - start:.2f}s -> {args.book}")
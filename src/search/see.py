@@ -0,0 +1,81 @@
+# SEE (Static Exchange Evaluation): đánh giá chuỗi ăn quân qua lại trên một ô
+"""
+see(board, from_pos, to_pos) = số điểm quân bên đi được lợi nếu đi from -> to rồi hai bên
+lần lượt ăn lại trên ô đó bằng quân rẻ nhất, mỗi bên có quyền dừng khi ăn tiếp bị lỗ.
+Các lần ăn được đi thật trên board (move_piece/undo_move), nên bản đồ tấn công của Board
+tự cập nhật ngòi Pháo mới xuất hiện / mất đi và chân Mã được giải phóng sau mỗi lần ăn.
+Không xét ghim quân hay luật để Tướng bị chiếu (như SEE thông thường).
+"""
+from evaluation.piece_square import MATERIAL
+
+# Tướng có giá trị 0 trong ShiZhi.PIECE_VALUE; trong SEE Tướng ăn sau cùng và không được để bị ăn
+KING_VALUE = 100000
+
+
+def piece_value(piece, sq: int) -> int:
+    """Giá trị quân (ShiZhi.PIECE_VALUE qua bảng MATERIAL, Tốt qua sông tính theo ô)."""
+    if piece.symbol in 'Jj':
+        return KING_VALUE
+    return MATERIAL[piece.symbol][sq]
+
+
+def least_valuable_attacker(board, color: str, sq: int):
+    """Quân rẻ nhất của `color` đang khống chế ô sq, hoặc None."""
+    if board.attack_counts[color][sq] == 0:
+        return None
+    best, best_value = None, None
+    for row in board.board:
+        for piece in row:
+            if piece is not None and piece.color == color and sq in piece.attacks:
+                value = piece_value(piece, sq)
+                if best is None or value < best_value:
+                    best, best_value = piece, value
+    return best
+
+
+def see(board, from_pos, to_pos) -> int:
+    """Lợi ích (theo giá trị quân) của bên đi nước from_pos -> to_pos sau chuỗi ăn qua lại."""
+    piece = board.get_piece(from_pos)
+    target = board.get_piece(to_pos)
+    sq = to_pos[0] * 9 + to_pos[1]
+    gains = [piece_value(target, sq) if target is not None else 0]
+    on_square = piece_value(piece, sq)
+    made = [(from_pos, to_pos, board.move_piece(from_pos, to_pos, validate=False))]
+    side = 'black' if piece.color == 'red' else 'red'
+
+    while True:
+        attacker = least_valuable_attacker(board, side, sq)
+        if attacker is None:
+            break
+        gains.append(on_square - gains[-1])
+        if on_square == KING_VALUE:
+            break  # Ăn được Tướng: chuỗi ăn kết thúc
+        on_square = piece_value(attacker, sq)
+        start = attacker.position
+        made.append((start, to_pos, board.move_piece(start, to_pos, validate=False)))
+        side = 'black' if side == 'red' else 'red'
+
+    for move in reversed(made):
+        board.undo_move(*move)
+
+    # Quay lui: mỗi bên chọn giữa ăn tiếp và dừng
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+
+def order_moves(board, moves) -> list:
+    """
+    Sắp xếp [(piece, to_pos), ...] cho alpha-beta: nước ăn quân có SEE >= 0 trước (SEE giảm dần),
+    rồi nước thường, cuối cùng là nước ăn quân bị lỗ.
+    """
+    good, quiet, bad = [], [], []
+    for piece, to_pos in moves:
+        if board.board[to_pos[0]][to_pos[1]] is None:
+            quiet.append((piece, to_pos))
+            continue
+        score = see(board, piece.position, to_pos)
+        (good if score >= 0 else bad).append((score, piece, to_pos))
+    good.sort(key=lambda entry: -entry[0])
+    bad.sort(key=lambda entry: -entry[0])
+    return [(p, t) for _, p, t in good] + quiet + [(p, t) for _, p, t in bad]
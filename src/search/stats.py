@@ -0,0 +1,95 @@
+# Thống kê một lần tìm kiếm: số nút, nps, hệ số phân nhánh, chất lượng cắt tỉa, tỉ lệ trúng cache
+"""
+Trong lúc tìm kiếm chỉ tăng các bộ đếm số nguyên (nodes, qnodes, cutoffs, first_move_cutoffs);
+đồng hồ chỉ được đọc ở đầu / cuối mỗi vòng (begin_iteration / end_iteration), nên thống kê
+không làm chậm từng nút và thời gian không bị cộng trùng giữa nút cha và nút con.
+    nodes               nút của AlphaBeta.search (kể cả nút lá)
+    qnodes              nút của quiescence
+    cutoffs             số lần beta <= alpha (cả search lẫn quiescence)
+    first_move_cutoffs  số lần cắt ngay ở nước đầu tiên (đo chất lượng sắp xếp nước đi)
+    iterations          mỗi vòng (độ sâu): nút, thời gian, nps, EBF = nút vòng này / nút vòng trước
+    lines               kết quả MultiPV (search.multipv.MultiPVLine) nếu tìm theo chế độ MultiPV
+Tỉ lệ trúng của eval cache và bảng mẫu an toàn Tướng tính theo phần tăng trong lần tìm kiếm.
+"""
+import json
+import time
+
+from evaluation.king_safety import PATTERN_TABLE
+
+
+class SearchStats:
+    def __init__(self, eval_cache=None, pattern_table=PATTERN_TABLE):
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.iterations = []
+        self.lines = []
+        self.elapsed = 0.0
+        self.eval_cache = eval_cache
+        self.pattern_table = pattern_table
+        self._tables = [table for table in (eval_cache, pattern_table) if table is not None]
+        self._baseline = {id(table): (table.hits, table.misses) for table in self._tables}
+        self._iteration_start = None
+
+    @property
+    def total_nodes(self) -> int:
+        return self.nodes + self.qnodes
+
+    def begin_iteration(self, depth: int):
+        self._iteration_start = (depth, time.perf_counter(), self.nodes, self.qnodes)
+
+    def end_iteration(self, completed: bool = True):
+        depth, started, nodes, qnodes = self._iteration_start
+        elapsed = time.perf_counter() - started
+        self.elapsed += elapsed
+        searched = self.nodes - nodes + self.qnodes - qnodes
+        previous = self.iterations[-1]['nodes'] if self.iterations else 0
+        self.iterations.append({
+            'depth': depth,
+            'completed': completed,
+            'nodes': searched,
+            'qnodes': self.qnodes - qnodes,
+            'time': elapsed,
+            'nps': searched / elapsed if elapsed > 0 else 0.0,
+            'ebf': searched / previous if previous else None,
+        })
+
+    def _hit_rate(self, table):
+        if table is None:
+            return None
+        hits, misses = self._baseline[id(table)]
+        hits, misses = table.hits - hits, table.misses - misses
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'time': self.elapsed,
+            'nps': self.total_nodes / self.elapsed if self.elapsed > 0 else 0.0,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else None,
+            'eval_cache_hit_rate': self._hit_rate(self.eval_cache),
+            'pattern_table_hit_rate': self._hit_rate(self.pattern_table),
+            'iterations': list(self.iterations),
+            'lines': [line.as_dict() for line in self.lines],
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def summary(self) -> str:
+        """Một dòng tóm tắt để in log."""
+        data = self.as_dict()
+        depth = self.iterations[-1]['depth'] if self.iterations else 0
+        ebf = self.iterations[-1]['ebf'] if self.iterations else None
+        parts = [f"depth {depth}", f"{self.total_nodes} nodes ({self.qnodes} q)", f"{data['time']:.2f}s",
+                 f"{data['nps']:.0f} nps"]
+        if ebf is not None:
+            parts.append(f"ebf {ebf:.1f}")
+        if data['first_move_cutoff_rate'] is not None:
+            parts.append(f"first-move cut {data['first_move_cutoff_rate']:.0%}")
+        if data['eval_cache_hit_rate'] is not None:
+            parts.append(f"eval cache {data['eval_cache_hit_rate']:.0%}")
+        return ', '.join(parts)
@@ -0,0 +1,516 @@
+# Bảng tàn cuộc (残局库 - Cánjú kù) sinh bằng phân tích ngược (retrograde analysis)
+"""
+Mỗi bảng ứng với một bộ quân (signature) viết theo ký hiệu quân của repo, ví dụ
+'JRvJSX' (Xe vs Sĩ-Tượng), 'JMBvJS' (Mã-Tốt vs Sĩ). Bên trái 'v' luôn được lưu là Đỏ;
+thế cờ có bộ quân ngược lại được lật bàn (hàng r -> 9 - r, đổi màu) trước khi tra bảng.
+
+Chỉ số (index) của thế cờ: bên đi * tích số ô hợp lệ của từng quân. Số ô được thu nhỏ nhờ:
+    - Tướng/Sĩ chỉ đứng trong Cửu Cung, Tượng chỉ có 7 ô bên mình, Tốt không lùi qua sông
+    - đối xứng trái-phải: Tướng Đỏ luôn được đưa về cột 3-4
+Mỗi thế cờ lưu 1 byte: 0 = hòa, 255 = thế không hợp lệ, còn lại = DTM + 1 (số ply tới khi bị
+chiếu bí / hết nước). DTM lẻ = bên đi thắng, DTM chẵn = bên đi thua. Hết nước đi = thua.
+
+Sinh bảng: PYTHONPATH=src python -m search.tablebase JRvJSX JMBvJS --out src/res/tablebases --workers 8
+"""
+import mmap
+import os
+import struct
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from board.board import Board
+from records.replay import king_attacked
+
+MAGIC = b'XQTB'
+VERSION = 1
+TB_HEADER = struct.Struct('<4sHH16sQ')     # magic, version, flags, signature, số thế cờ
+DEFAULT_TB_DIR = os.path.join('src', 'res', 'tablebases')
+MATE_SCORE = 99999999
+MAX_PIECES = 5
+
+VALUE_DRAW = 0
+VALUE_INVALID = 255
+MAX_DTM = 253                   # DTM lớn nhất lưu được trong một byte (DTM+1 <= 254)
+
+PIECE_ORDER = 'RMPBSX'          # thứ tự quân trong signature
+ATTACKERS = set('RMPB')         # quân có thể sang sông chiếu Tướng
+# Trọng số cố định chỉ dùng để chọn bên được lưu là Đỏ (tên file bảng). Không lấy từ ShiZhi vì
+# tuner / load_weights() thay đổi giá trị quân, làm đổi tên bảng đã sinh. Không được sửa.
+_SIGNATURE_WEIGHT = {'R': 1000, 'M': 450, 'P': 400, 'X': 250, 'S': 200, 'B': 100}
+
+
+def _red_squares(symbol: str) -> list:
+    """Các ô mà quân Đỏ loại `symbol` có thể đứng (theo luật Cửu Cung / sông)."""
+    if symbol == 'J':
+        return [(r, c) for r in range(7, 10) for c in range(3, 6)]
+    if symbol == 'S':
+        return [(7, 3), (7, 5), (8, 4), (9, 3), (9, 5)]
+    if symbol == 'X':
+        return [(5, 2), (5, 6), (7, 0), (7, 4), (7, 8), (9, 2), (9, 6)]
+    if symbol == 'B':
+        return [(r, c) for r in range(5) for c in range(9)] + [(r, c) for r in (5, 6) for c in range(0, 9, 2)]
+    return [(r, c) for r in range(10) for c in range(9)]
+
+
+def allowed_squares(symbol: str) -> list:
+    """Chữ hoa = Đỏ, chữ thường = Đen (ảnh lật theo hàng của Đỏ)."""
+    red = _red_squares(symbol.upper())
+    if symbol.isupper():
+        return sorted(red)
+    return sorted((9 - r, c) for r, c in red)
+
+
+def parse_signature(name: str) -> tuple:
+    """'JRvJSX' -> (['R'], ['S', 'X'])"""
+    try:
+        red, black = name.upper().split('V')
+    except ValueError:
+        raise ValueError(f"Invalid tablebase signature {name!r}")
+    if not red.startswith('J') or not black.startswith('J'):
+        raise ValueError(f"Invalid tablebase signature {name!r} (both sides need a J)")
+    red, black = list(red[1:]), list(black[1:])
+    for symbol in red + black:
+        if symbol not in PIECE_ORDER:
+            raise ValueError(f"Invalid piece {symbol!r} in signature {name!r}")
+    return sorted(red, key=PIECE_ORDER.index), sorted(black, key=PIECE_ORDER.index)
+
+
+def canonical_signature(red: list, black: list) -> tuple:
+    """Trả về (tên bảng, flipped). flipped=True nghĩa là phải lật bàn để Đen thành bên được lưu là Đỏ."""
+    red = sorted(red, key=PIECE_ORDER.index)
+    black = sorted(black, key=PIECE_ORDER.index)
+    red_key = (sum(_SIGNATURE_WEIGHT[p] for p in red), [PIECE_ORDER.index(p) for p in red])
+    black_key = (sum(_SIGNATURE_WEIGHT[p] for p in black), [PIECE_ORDER.index(p) for p in black])
+    flipped = black_key > red_key
+    if flipped:
+        red, black = black, red
+    return 'J' + ''.join(red) + 'vJ' + ''.join(black), flipped
+
+
+def has_mating_material(red: list, black: list) -> bool:
+    return any(p in ATTACKERS for p in red) or any(p in ATTACKERS for p in black)
+
+
+def dependencies(name: str) -> list:
+    """Các bảng con (sau khi ăn một quân) cần sinh trước, theo thứ tự sinh."""
+    order = []
+
+    def visit(sig):
+        red, black = parse_signature(sig)
+        for side in (0, 1):
+            pieces = (red, black)[side]
+            for i in range(len(pieces)):
+                sub = [red, black]
+                sub[side] = pieces[:i] + pieces[i + 1:]
+                if not has_mating_material(*sub):
+                    continue
+                sub_name, _ = canonical_signature(*sub)
+                if sub_name not in order:
+                    visit(sub_name)
+                    if sub_name not in order:
+                        order.append(sub_name)
+
+    visit(canonical_signature(*parse_signature(name))[0])
+    return order
+
+
+class TableLayout:
+    """Mã hóa/giải mã chỉ số thế cờ cho một signature (Đỏ = bên được lưu)."""
+    def __init__(self, name: str):
+        self.name = name
+        red, black = parse_signature(name)
+        self.symbols = ['J', 'j'] + red + [p.lower() for p in black]
+        self.squares = [allowed_squares(symbol) for symbol in self.symbols]
+        # Đối xứng trái-phải: Tướng Đỏ chỉ ở cột 3-4
+        self.squares[0] = [sq for sq in self.squares[0] if sq[1] <= 4]
+        self.lookup = []
+        for squares in self.squares:
+            table = [-1] * 90
+            for i, (r, c) in enumerate(squares):
+                table[r * 9 + c] = i
+            self.lookup.append(table)
+        self.sizes = [len(squares) for squares in self.squares]
+        self.size = 2
+        for n in self.sizes:
+            self.size *= n
+
+    def encode(self, positions, red_to_move: bool) -> int:
+        """positions: ô (r, c) của từng slot theo thứ tự self.symbols. Trả về -1 nếu không hợp lệ."""
+        if positions[0][1] > 4:
+            positions = [(r, 8 - c) for r, c in positions]
+        index = 0 if red_to_move else 1
+        for slot, (r, c) in enumerate(positions):
+            i = self.lookup[slot][r * 9 + c]
+            if i < 0:
+                return -1
+            index = index * self.sizes[slot] + i
+        return index
+
+    def decode(self, index: int) -> tuple:
+        positions = [None] * len(self.sizes)
+        for slot in range(len(self.sizes) - 1, -1, -1):
+            index, i = divmod(index, self.sizes[slot])
+            positions[slot] = self.squares[slot][i]
+        return positions, index == 0
+
+
+def table_path(directory: str, name: str) -> str:
+    return os.path.join(directory, name + '.xtb')
+
+
+class Tablebase:
+    """Tra bảng tàn cuộc qua mmap; bảng được mở khi cần lần đầu."""
+    def __init__(self, directory: str = DEFAULT_TB_DIR, max_pieces: int = MAX_PIECES):
+        self.directory = directory
+        self.max_pieces = max_pieces
+        self.tables = {}
+        self.probes = 0
+        self.hits = 0
+
+    def _table(self, name: str):
+        if name not in self.tables:
+            entry = None
+            path = table_path(self.directory, name)
+            if os.path.exists(path):
+                f = open(path, 'rb')
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, _, sig, size = TB_HEADER.unpack_from(data, 0)
+                if magic != MAGIC or version != VERSION or sig.rstrip(b'\0').decode() != name:
+                    raise ValueError(f"{path}: not a tablebase for {name}")
+                entry = (TableLayout(name), data, f)
+            self.tables[name] = entry
+        return self.tables[name]
+
+    def probe_pieces(self, pieces, red_to_move: bool):
+        """
+        pieces: [(symbol, (r, c)), ...] gồm cả hai Tướng.
+        Trả về (thắng/thua/hòa cho bên đi: 1/-1/0, dtm) hoặc None nếu không có bảng.
+        """
+        self.probes += 1
+        red = [s for s, _ in pieces if s.isupper() and s != 'J']
+        black = [s.upper() for s, _ in pieces if s.islower() and s != 'j']
+        if not has_mating_material(red, black):
+            self.hits += 1
+            return 0, 0
+        name, flipped = canonical_signature(red, black)
+        table = self._table(name)
+        if table is None:
+            return None
+        layout, data, _ = table
+        if flipped:
+            pieces = [(s.swapcase(), (9 - r, c)) for s, (r, c) in pieces]
+            red_to_move = not red_to_move
+        # Xếp quân vào slot theo thứ tự của layout
+        remaining = list(pieces)
+        positions = []
+        for symbol in layout.symbols:
+            for i, (s, pos) in enumerate(remaining):
+                if s == symbol:
+                    positions.append(pos)
+                    del remaining[i]
+                    break
+            else:
+                return None
+        index = layout.encode(positions, red_to_move)
+        if index < 0:
+            return None
+        value = data[TB_HEADER.size + index]
+        if value == VALUE_INVALID:
+            return None
+        self.hits += 1
+        if value == VALUE_DRAW:
+            return 0, 0
+        dtm = value - 1
+        return (1 if dtm % 2 else -1), dtm
+
+    def probe(self, board):
+        """Tra thế cờ của Board cho bên đang đi; None nếu không có trong bảng."""
+        pieces = []
+        for row in board.board:
+            for piece in row:
+                if piece is not None:
+                    pieces.append((piece.symbol, piece.position))
+                    if len(pieces) > self.max_pieces:
+                        return None
+        return self.probe_pieces(pieces, board.current_player == 'red')
+
+    def score(self, board, color: str):
+        """Điểm theo góc nhìn `color` (cùng thang với evaluation_board), None nếu không tra được."""
+        result = self.probe(board)
+        if result is None:
+            return None
+        outcome, dtm = result
+        if outcome == 0:
+            return 0
+        score = MATE_SCORE - dtm if outcome > 0 else -(MATE_SCORE - dtm)
+        return score if color == board.current_player else -score
+
+    def best_move(self, board):
+        """
+        Nước tốt nhất theo bảng ở gốc: thắng nhanh nhất / thua chậm nhất.
+        Trả về (from_pos, to_pos, outcome, dtm) hoặc None nếu thế cờ không thắng/thua theo bảng.
+        """
+        root = self.probe(board)
+        if root is None or root[0] == 0:
+            return None
+        best = None
+        for from_pos, to_pos in board.get_legal_moves(board.current_player):
+            captured = board.move_piece(from_pos, to_pos, validate=False)
+            child = self.probe(board)
+            board.undo_move(from_pos, to_pos, captured)
+            if child is None:
+                continue
+            # Giá trị cho bên đi hiện tại
+            outcome, dtm = -child[0], child[1] + 1
+            key = (outcome, -dtm if outcome > 0 else dtm)
+            if best is None or key > best[0]:
+                best = (key, from_pos, to_pos, outcome, dtm)
+        if best is None:
+            return None
+        return best[1:]
+
+    def close(self):
+        for entry in self.tables.values():
+            if entry is not None:
+                entry[1].close()
+                entry[2].close()
+        self.tables = {}
+
+
+_loaded = {}
+
+
+def load_tablebase(directory: str = DEFAULT_TB_DIR):
+    """Mở thư mục bảng một lần cho mỗi process; None nếu thư mục không tồn tại."""
+    if directory not in _loaded:
+        _loaded[directory] = Tablebase(directory) if os.path.isdir(directory) else None
+    return _loaded[directory]
+
+
+# ---------- Sinh bảng ----------
+
+def _make_pieces(layout):
+    from board.fen import _piece_classes
+    classes = _piece_classes()
+    names = {'J': 'JiangShuai', 'S': 'Shi', 'X': 'Xiang', 'M': 'Ma', 'R': 'Ju', 'P': 'Pao', 'B': 'BingZu'}
+    return [classes[names[s.upper()]]('red' if s.isupper() else 'black', (0, 0)) for s in layout.symbols]
+
+
+_worker = {}
+
+
+def _init_worker(name, directory):
+    layout = TableLayout(name)
+    board = Board(headless=True)
+    board.clear()
+    _worker.update(layout=layout, board=board, pieces=_make_pieces(layout),
+                   subtables=Tablebase(directory, max_pieces=len(layout.symbols)))
+
+
+def _expand_range(bounds):
+    """
+    Sinh nước đi cho các thế cờ trong [start, end) (chạy trong worker).
+    Trả về (status, offsets, edges, ext_win, ext_loss, ext_draw) cho đoạn đó:
+        status   1 = thế không hợp lệ
+        edges    chỉ số thế cờ kế tiếp (không ăn quân) trong cùng bảng
+        ext_*    thông tin từ các nước ăn quân (sang bảng con)
+    """
+    start, end = bounds
+    layout, board, pieces = _worker['layout'], _worker['board'], _worker['pieces']
+    subtables = _worker['subtables']
+    grid = board.board
+    n = end - start
+    status = array('B', bytes(n))
+    offsets = array('I', [0])
+    edges = array('I')
+    ext_win = array('H', [0xFFFF]) * n      # DTM nhỏ nhất nếu ăn quân dẫn tới thế đối phương thua
+    ext_loss = array('H', bytes(2 * n))     # DTM lớn nhất trong các nước ăn quân dẫn tới đối phương thắng
+    ext_open = array('B', bytes(n))         # có nước ăn quân dẫn tới thế hòa
+
+    for k in range(n):
+        positions, red_to_move = layout.decode(start + k)
+        if len(set(positions)) != len(positions):
+            status[k] = 1
+            offsets.append(len(edges))
+            continue
+        for piece, (r, c) in zip(pieces, positions):
+            piece.position = (r, c)
+            grid[r][c] = piece
+        mover = 'red' if red_to_move else 'black'
+        if king_attacked(board, 'black' if red_to_move else 'red'):
+            status[k] = 1
+        else:
+            for slot, piece in enumerate(pieces):
+                if piece.color != mover:
+                    continue
+                from_pos = piece.position
+                for to_pos in piece.get_valid_moves(board):
+                    captured = grid[to_pos[0]][to_pos[1]]
+                    grid[from_pos[0]][from_pos[1]] = None
+                    grid[to_pos[0]][to_pos[1]] = piece
+                    piece.position = to_pos
+                    if not king_attacked(board, mover):
+                        if captured is None:
+                            next_positions = list(positions)
+                            next_positions[slot] = to_pos
+                            edges.append(layout.encode(next_positions, not red_to_move))
+                        else:
+                            rest = [(p.symbol, p.position) for p in pieces if p is not captured]
+                            result = subtables.probe_pieces(rest, not red_to_move)
+                            if result is None:
+                                raise RuntimeError(f"{layout.name}: missing subtable for {rest}")
+                            outcome, dtm = result
+                            if outcome < 0:
+                                ext_win[k] = min(ext_win[k], dtm + 1)
+                            elif outcome > 0:
+                                ext_loss[k] = max(ext_loss[k], dtm + 1)
+                            else:
+                                ext_open[k] = 1
+                    grid[to_pos[0]][to_pos[1]] = captured
+                    grid[from_pos[0]][from_pos[1]] = piece
+                    piece.position = from_pos
+        for r, c in positions:
+            grid[r][c] = None
+        offsets.append(len(edges))
+    return start, status, offsets, edges, ext_win, ext_loss, ext_open
+
+
+def generate_table(name: str, directory: str, workers: int = 1, chunk: int = 20000, log=print) -> str:
+    """Sinh một bảng (các bảng con phải có sẵn trong `directory`). Trả về đường dẫn file."""
+    name, _ = canonical_signature(*parse_signature(name))
+    layout = TableLayout(name)
+    size = layout.size
+    ranges = [(start, min(start + chunk, size)) for start in range(0, size, chunk)]
+
+    status = array('B', bytes(size))
+    succ_offsets = array('Q', [0]) * (size + 1)
+    succ_chunks = []
+    ext_win = array('H', [0xFFFF]) * size
+    ext_loss = array('H', bytes(2 * size))
+    ext_open = array('B', bytes(size))
+    remaining = array('I', bytes(4 * size))
+
+    def collect(result):
+        start, st, offsets, edges, e_win, e_loss, e_open = result
+        base = sum(len(e) for e in succ_chunks)
+        succ_chunks.append(edges)
+        for k in range(len(st)):
+            i = start + k
+            status[i] = st[k]
+            succ_offsets[i + 1] = base + offsets[k + 1]
+            ext_win[i] = e_win[k]
+            ext_loss[i] = e_loss[k]
+            ext_open[i] = e_open[k]
+            remaining[i] = offsets[k + 1] - offsets[k]
+
+    # Bước 1: sinh nước đi cho mọi thế cờ (song song theo từng đoạn chỉ số)
+    if workers <= 1:
+        _init_worker(name, directory)
+        for bounds in ranges:
+            collect(_expand_range(bounds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(name, directory)) as pool:
+            for result in pool.map(_expand_range, ranges):
+                collect(result)
+    succ = array('I')
+    for edges in succ_chunks:
+        succ.extend(edges)
+    succ_chunks.clear()
+    log(f"[{name}] {size} positions, {len(succ)} quiet edges")
+
+    # Bước 2: đồ thị ngược (các thế cờ đi tới được thế này)
+    pred_offsets = array('Q', [0]) * (size + 1)
+    for target in succ:
+        pred_offsets[target + 1] += 1
+    for i in range(size):
+        pred_offsets[i + 1] += pred_offsets[i]
+    fill = array('Q', pred_offsets[:-1])
+    pred = array('I', bytes(4 * len(succ)))
+    for i in range(size):
+        for e in range(succ_offsets[i], succ_offsets[i + 1]):
+            target = succ[e]
+            pred[fill[target]] = i
+            fill[target] += 1
+    del succ, fill
+
+    # Bước 3: phân tích ngược theo từng mức DTM (buckets)
+    values = bytearray(size)
+    buckets = [[] for _ in range(MAX_DTM + 1)]
+
+    def push(dtm, i):
+        # Không kẹp về MAX_DTM: kẹp có thể đổi tính chẵn lẻ, lưu thế thua thành thắng
+        if dtm > MAX_DTM:
+            raise OverflowError(f"[{name}] DTM {dtm} does not fit in a byte (max {MAX_DTM})")
+        buckets[dtm].append(i)
+
+    for i in range(size):
+        if status[i]:
+            values[i] = VALUE_INVALID
+        elif ext_win[i] != 0xFFFF:
+            push(ext_win[i], i)
+        elif remaining[i] == 0 and not ext_open[i]:
+            # Không còn nước đi, hoặc mọi nước ăn quân đều dẫn tới đối phương thắng
+            push(ext_loss[i], i)
+    loss_max = ext_loss
+    for dtm in range(MAX_DTM + 1):
+        for i in buckets[dtm]:
+            if values[i]:
+                continue
+            values[i] = dtm + 1
+            for e in range(pred_offsets[i], pred_offsets[i + 1]):
+                p = pred[e]
+                if values[p]:
+                    continue
+                if dtm % 2 == 0:
+                    # Thế này thua cho bên đi -> thế trước đó thắng
+                    push(dtm + 1, p)
+                else:
+                    remaining[p] -= 1
+                    if dtm + 1 > loss_max[p]:
+                        loss_max[p] = dtm + 1
+                    if remaining[p] == 0 and not ext_open[p] and ext_win[p] == 0xFFFF:
+                        push(loss_max[p], p)
+        buckets[dtm] = None
+
+    os.makedirs(directory, exist_ok=True)
+    path = table_path(directory, name)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(TB_HEADER.pack(MAGIC, VERSION, 0, name.encode(), size))
+        f.write(values)
+    os.replace(path + '.tmp', path)
+    wins = sum(1 for v in values if v not in (VALUE_DRAW, VALUE_INVALID) and (v - 1) % 2)
+    losses = sum(1 for v in values if v not in (VALUE_DRAW, VALUE_INVALID) and (v - 1) % 2 == 0)
+    log(f"[{name}] wins {wins}, losses {losses}, max dtm {max((v - 1 for v in values if 0 < v < VALUE_INVALID), default=0)}")
+    return path
+
+
+def generate(names, directory: str = DEFAULT_TB_DIR, workers: int = 1, log=print) -> list:
+    """Sinh các bảng và toàn bộ bảng con còn thiếu (bảng con trước)."""
+    order = []
+    for name in names:
+        for sig in dependencies(name) + [canonical_signature(*parse_signature(name))[0]]:
+            if sig not in order:
+                order.append(sig)
+    paths = []
+    for sig in order:
+        path = table_path(directory, sig)
+        if not os.path.exists(path):
+            generate_table(sig, directory, workers, log=log)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Sinh bảng tàn cuộc bằng phân tích ngược')
+    parser.add_argument('signatures', nargs='+', help="Ví dụ: JRvJSX JMBvJS")
+    parser.add_argument('--out', default=DEFAULT_TB_DIR)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate(args.signatures, args.out, args.workers)
+    print(f"Done in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,71 @@
+# Phân bổ thời gian cho một nước đi từ đồng hồ ván cờ (giới hạn mềm / cứng)
+"""
+    soft  thời gian dự kiến cho nước này: phần chia đều thời gian còn lại cho số nước ước tính còn
+          phải đi, cộng phần lớn increment. Chỉ kiểm tra giữa các độ sâu: quá soft thì không bắt đầu
+          độ sâu mới.
+    hard  giới hạn cứng: tìm kiếm bị dừng giữa độ sâu (AlphaBeta.deadline). Không quá một phần thời
+          gian còn lại và luôn chừa MOVE_OVERHEAD cho độ trễ (vẽ màn hình, mạng, máy bận) để không thua vì
+          hết giờ.
+Nước tốt nhất đổi giữa hai độ sâu liên tiếp (tìm kiếm chưa ổn định) thì soft được nới thêm
+INSTABILITY_BONUS mỗi lần đổi (không quá hard); nước ổn định thì dừng sớm hơn.
+"""
+import time
+
+MOVE_OVERHEAD = 0.1          # giây chừa cho độ trễ ngoài tìm kiếm
+MIN_MOVES_TO_GO = 15         # luôn chia thời gian còn lại cho ít nhất chừng này nước
+EXPECTED_GAME_MOVES = 50     # số nước (mỗi bên) ước tính của một ván
+INCREMENT_SHARE = 0.8        # phần increment được tiêu ngay ở nước này
+HARD_FACTOR = 4.0            # hard = soft * HARD_FACTOR ...
+MAX_HARD_FRACTION = 0.25     # ... nhưng không quá tỉ lệ này của thời gian còn lại
+INSTABILITY_BONUS = 0.5      # nới soft thêm 50% cho mỗi lần nước tốt nhất đổi
+STABLE_FACTOR = 0.6          # nước tốt nhất giữ nguyên >= STABLE_ITERATIONS độ sâu: soft * hệ số này
+STABLE_ITERATIONS = 3
+
+
+def allocate(remaining: float, increment: float = 0.0, move_number: int = 1):
+    """(soft, hard) giây cho nước thứ `move_number` (của bên đi) khi còn `remaining` giây."""
+    available = max(remaining - MOVE_OVERHEAD, 0.0)
+    moves_to_go = max(MIN_MOVES_TO_GO, EXPECTED_GAME_MOVES - move_number)
+    soft = available / moves_to_go + increment * INCREMENT_SHARE
+    hard = min(soft * HARD_FACTOR, available * MAX_HARD_FRACTION + increment * INCREMENT_SHARE, available)
+    return min(soft, hard), hard
+
+
+class TimeManager:
+    """Giới hạn thời gian của một nước; iterative deepening gọi should_continue() sau mỗi độ sâu."""
+
+    def __init__(self, soft: float, hard: float):
+        self.soft = soft
+        self.hard = hard
+        self.started = time.perf_counter()
+        self.deadline = self.started + hard
+        self.best_changes = 0
+        self.stable_iterations = 0
+        self._best_move = None
+
+    @classmethod
+    def from_clock(cls, clock, color: str, move_number: int, max_time: float = None):
+        soft, hard = allocate(clock.remaining_for(color), clock.increment, move_number)
+        if max_time is not None:
+            soft, hard = min(soft, max_time), min(hard, max_time)
+        return cls(soft, hard)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def soft_limit(self) -> float:
+        if self.stable_iterations >= STABLE_ITERATIONS:
+            limit = self.soft * STABLE_FACTOR
+        else:
+            limit = self.soft * (1 + INSTABILITY_BONUS * self.best_changes)
+        return min(limit, self.hard)
+
+    def should_continue(self, best_move) -> bool:
+        """Ghi nhận nước tốt nhất của độ sâu vừa xong; True nếu nên tìm tiếp độ sâu sau."""
+        if self._best_move is not None and best_move != self._best_move:
+            self.best_changes += 1
+            self.stable_iterations = 0
+        else:
+            self.stable_iterations += 1
+        self._best_move = best_move
+        return self.elapsed() < self.soft_limit()
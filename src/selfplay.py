@@ -0,0 +1,113 @@
+# Tự đấu (self-play) giữa các cấu hình AI, ghi kết quả ra file record
+"""
+Chạy: PYTHONPATH=src python src/selfplay.py games.xqg --games 100 --workers 4
+Mỗi ván bắt đầu bằng vài nước ngẫu nhiên (theo seed) để các ván không giống nhau.
+--profile out/prof ghi profile từng worker (xem utils/profiling.py).
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+from board.fen import START_FEN, board_from_fen
+from records.game_record import (
+    GameRecord, GameWriter, RESULT_BLACK_WIN, RESULT_DRAW, RESULT_RED_WIN,
+)
+from utils import profiling
+
+DEFAULT_PLAYER = {'type': 'alpha_beta', 'difficulty': 1}
+
+
+def player_name(settings) -> str:
+    return ','.join(f"{k}={v}" for k, v in sorted(settings.items()))
+
+
+@profiling.profiled
+def play_game(red=None, black=None, start_fen: str = START_FEN, max_plies: int = 200,
+              random_plies: int = 4, seed=None, prepare=None) -> GameRecord:
+    """
+    Chơi một ván giữa hai cấu hình engine (dict tham số cho engine.engine).
+    Bên hết nước đi (bị chiếu bí hoặc bị vây) thua; quá max_plies hoặc lặp nước = hòa.
+    prepare: hàm prepare(color) gọi trước mỗi lần engine đi (vd. nạp tham số riêng của từng bên).
+    """
+    red = red or DEFAULT_PLAYER
+    black = black or DEFAULT_PLAYER
+    rng = random.Random(seed)
+    board = board_from_fen(start_fen)
+    started_at = time.time()
+    result = RESULT_DRAW
+
+    for ply in range(max_plies):
+        color = board.current_player
+        legal = board.get_legal_moves(color)
+        if not legal:
+            result = RESULT_BLACK_WIN if color == 'red' else RESULT_RED_WIN
+            break
+        if board.is_repeating_state(color):
+            break
+        before = len(board.move_history)
+        if ply < random_plies:
+            board.move_piece(*rng.choice(legal))
+        else:
+            settings = red if color == 'red' else black
+            if prepare is not None:
+                prepare(color)
+            engine.engine(board, color, **settings)
+        if len(board.move_history) == before:
+            # Engine không trả về nước đi: coi như thua
+            result = RESULT_BLACK_WIN if color == 'red' else RESULT_RED_WIN
+            break
+
+    return GameRecord.from_board(
+        board, result,
+        red=player_name(red), black=player_name(black),
+        start_fen='' if start_fen == START_FEN else start_fen,
+        started_at=started_at,
+    )
+
+
+def _play_game_args(args):
+    return play_game(*args)
+
+
+def generate_games(n_games: int, red=None, black=None, workers: int = 1, seed: int = 0,
+                   max_plies: int = 200, random_plies: int = 4, start_fen: str = START_FEN):
+    """Generator các GameRecord tự đấu; workers > 1 dùng process pool."""
+    jobs = [(red, black, start_fen, max_plies, random_plies, seed + i) for i in range(n_games)]
+    if workers <= 1:
+        for job in jobs:
+            yield play_game(*job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_play_game_args, jobs)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Self-play giữa các AI, ghi ra file record')
+    parser.add_argument('output', help='File record (.xqg) để ghi nối tiếp')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--difficulty', type=int, default=1)
+    parser.add_argument('--type', default='alpha_beta')
+    parser.add_argument('--nodes', type=int, help='Ngân sách nút mỗi nước (kết quả lặp lại được)')
+    parser.add_argument('--max-plies', type=int, default=200)
+    parser.add_argument('--random-plies', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', help='Tiền tố file profile (bật profiling)')
+    parser.add_argument('--profile-mode', default='sampling', choices=('sampling', 'deterministic'))
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable(args.profile, args.profile_mode)
+
+    player = {'type': args.type, 'difficulty': args.difficulty}
+    if args.nodes is not None:
+        player['nodes'] = args.nodes
+    start = time.perf_counter()
+    with GameWriter(args.output) as writer:
+        for i, game in enumerate(generate_games(args.games, player, player, args.workers, args.seed,
+                                                args.max_plies, args.random_plies)):
+            writer.write(game)
+            print(f"  - Ván {i + 1}/{args.games}: {len(game)} nước, kết quả {game.result}")
+    print(f"Xong {args.games} ván trong {time.perf_counter() - start:.2f} giây.")
@@ -0,0 +1,188 @@
+# Tune tham số engine bằng SPSA trên self-play
+"""
+Mỗi vòng k: chọn ngẫu nhiên dấu delta_i = ±1 cho từng tham số, tạo hai bộ
+    theta+ = theta + c_k * delta,  theta- = theta - c_k * delta
+rồi cho hai bộ đấu với nhau từng cặp ván (cùng khai cuộc ngẫu nhiên, đổi màu quân).
+result = (điểm theta+ - điểm theta-) / số ván, trong [-1, 1], và
+    theta_i += a_k * c_k_i * delta_i * result
+với a_k = a / (k + 1 + A) ** 0.602, c_k_i = step_i / (k + 1) ** 0.101.
+
+Tìm kiếm chạy theo ngân sách nút (engine.engine(nodes=...)), không theo đồng hồ, và khai cuộc,
+delta đều lấy từ seed, nên cùng checkpoint + seed cho cùng kết quả dù số worker khác nhau.
+Sau mỗi vòng checkpoint JSON được ghi lại; chạy lại cùng file sẽ tiếp tục từ vòng đã dừng.
+
+Tham số được khai báo bằng đường dẫn 'module:ATTR' hoặc 'module:ATTR.key' (phần tử dict).
+Chỉ nên chọn giá trị được đọc lúc dùng (lề lazy eval, độ sâu quiescence, trọng số mobility / an toàn Tướng...),
+vì mỗi bên được nạp tham số riêng trước từng nước đi; bảng material/positional mà Board
+cộng dồn từ lúc đặt quân thì không tách được theo bên (dùng evaluation.tuner cho phần đó).
+
+Chạy: PYTHONPATH=src python src/spsa.py spsa.json --iterations 200 --pairs 4 --workers 4
+"""
+import importlib
+import json
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluation import mobility
+from records.game_record import RESULT_BLACK_WIN, RESULT_RED_WIN
+from selfplay import play_game
+from utils import profiling
+
+Param = namedtuple('Param', 'name target value low high step')
+
+SPSA_PARAMS = (
+    Param('lazy_margin', 'utils.move_generation:LAZY_MARGIN', 2500, 500, 6000, 250),
+    Param('quiescence_depth', 'search.alphabeta:QUIESCENCE_DEPTH', 4, 1, 8, 1),
+    Param('mobility_ju', 'evaluation.mobility:MOBILITY_WEIGHT.ju', 80, 0, 300, 15),
+    Param('mobility_ma', 'evaluation.mobility:MOBILITY_WEIGHT.ma', 120, 0, 300, 15),
+    Param('mobility_pao', 'evaluation.mobility:MOBILITY_WEIGHT.pao', 60, 0, 300, 15),
+    Param('king_safety', 'evaluation.king_safety:KING_SAFETY_WEIGHT', 20, 0, 80, 4),
+)
+
+# Cài đặt engine cho ván tune: không sách khai cuộc (chọn ngẫu nhiên), không cache đánh giá
+# dùng chung (hai bên có tham số khác nhau), dừng theo số nút
+SPSA_ENGINE = {'type': 'alpha_beta', 'difficulty': 3, 'book': None, 'eval_cache': None,
+               'quiescence': True, 'nodes': 2000}
+ALPHA, GAMMA = 0.602, 0.101
+
+
+def _resolve(target: str):
+    """'module:ATTR.key' -> (đối tượng chứa, tên / khóa)."""
+    module_name, _, path = target.partition(':')
+    obj = importlib.import_module(module_name)
+    parts = path.split('.')
+    for part in parts[:-1]:
+        obj = obj[part] if isinstance(obj, dict) else getattr(obj, part)
+    return obj, parts[-1]
+
+
+def read_params(params=SPSA_PARAMS) -> dict:
+    values = {}
+    for param in params:
+        obj, key = _resolve(param.target)
+        values[param.name] = obj[key] if isinstance(obj, dict) else getattr(obj, key)
+    return values
+
+
+def apply_params(values: dict, params=SPSA_PARAMS):
+    """Ghi giá trị (làm tròn, kẹp trong [low, high]) vào module tương ứng."""
+    for param in params:
+        if param.name not in values:
+            continue
+        value = int(round(min(max(values[param.name], param.low), param.high)))
+        obj, key = _resolve(param.target)
+        if isinstance(obj, dict):
+            obj[key] = value
+        else:
+            setattr(obj, key, value)
+    mobility.build_weights()
+
+
+def _play_pair(args):
+    """Hai ván cùng khai cuộc, theta+ cầm Đỏ rồi cầm Đen. Trả về (điểm theta+, điểm theta-)."""
+    plus, minus, params, settings, seed, max_plies, random_plies = args
+    original = read_params(params)
+    points = 0.0
+    try:
+        for plus_color in ('red', 'black'):
+            def prepare(color):
+                apply_params(plus if color == plus_color else minus, params)
+            game = play_game(settings, settings, max_plies=max_plies, random_plies=random_plies,
+                             seed=seed, prepare=prepare)
+            if game.result == (RESULT_RED_WIN if plus_color == 'red' else RESULT_BLACK_WIN):
+                points += 1.0
+            elif game.result not in (RESULT_RED_WIN, RESULT_BLACK_WIN):
+                points += 0.5
+    finally:
+        apply_params(original, params)
+    return points, 2.0 - points
+
+
+def load_checkpoint(path: str, params=SPSA_PARAMS) -> dict:
+    """Checkpoint có sẵn, hoặc trạng thái ban đầu lấy từ giá trị khai báo của params."""
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+        names = sorted(param.name for param in params)
+        if sorted(state['theta']) != names:
+            raise ValueError(f"{path}: checkpoint parameters {sorted(state['theta'])} do not match {names}")
+        return state
+    return {'iteration': 0, 'theta': {param.name: float(param.value) for param in params}, 'history': []}
+
+
+def save_checkpoint(path: str, state: dict):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def spsa(checkpoint: str, iterations: int, pairs: int = 4, workers: int = 1, params=SPSA_PARAMS,
+         settings=None, a: float = 2.0, stability: float = 10.0, seed: int = 0, max_plies: int = 150,
+         random_plies: int = 6, log=print) -> dict:
+    """
+    Chạy tới vòng thứ `iterations` (tính cả các vòng trong checkpoint), ghi checkpoint sau mỗi vòng.
+    Trả về theta cuối cùng {tên: giá trị}.
+    """
+    log = log or (lambda message: None)
+    settings = dict(SPSA_ENGINE, **(settings or {}))
+    state = load_checkpoint(checkpoint, params)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for k in range(state['iteration'], iterations):
+            rng = random.Random(seed * 1000003 + k)
+            theta = state['theta']
+            a_k = a / (k + 1 + stability) ** ALPHA
+            c_k = {param.name: param.step / (k + 1) ** GAMMA for param in params}
+            delta = {param.name: rng.choice((-1, 1)) for param in params}
+            plus = {name: value + c_k[name] * delta[name] for name, value in theta.items()}
+            minus = {name: value - c_k[name] * delta[name] for name, value in theta.items()}
+            jobs = [(plus, minus, params, settings, rng.randrange(1 << 30), max_plies, random_plies)
+                    for _ in range(pairs)]
+            scores = list(pool.map(_play_pair, jobs) if pool is not None else map(_play_pair, jobs))
+            plus_points = sum(score[0] for score in scores)
+            minus_points = sum(score[1] for score in scores)
+            result = (plus_points - minus_points) / (2 * pairs)
+            for param in params:
+                value = theta[param.name] + a_k * c_k[param.name] * delta[param.name] * result
+                theta[param.name] = min(max(value, param.low), param.high)
+            state['iteration'] = k + 1
+            state['history'].append({'iteration': k + 1, 'plus': plus_points, 'minus': minus_points,
+                                     'theta': dict(theta)})
+            save_checkpoint(checkpoint, state)
+            log(f"  iteration {k + 1}: {plus_points:g}-{minus_points:g} "
+                + ', '.join(f"{name}={value:.1f}" for name, value in sorted(theta.items())))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return dict(state['theta'])
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Tune tham số engine bằng SPSA trên self-play')
+    parser.add_argument('checkpoint', help='File JSON checkpoint (tạo mới hoặc chạy tiếp)')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--pairs', type=int, default=4, help='Số cặp ván (đổi màu) mỗi vòng')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--nodes', type=int, default=SPSA_ENGINE['nodes'], help='Ngân sách nút mỗi nước')
+    parser.add_argument('--depth', type=int, default=SPSA_ENGINE['difficulty'])
+    parser.add_argument('--max-plies', type=int, default=150)
+    parser.add_argument('--a', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', help='Tiền tố file profile (bật profiling, xem utils/profiling.py)')
+    parser.add_argument('--profile-mode', default='sampling', choices=('sampling', 'deterministic'))
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable(args.profile, args.profile_mode)
+
+    start = time.perf_counter()
+    theta = spsa(args.checkpoint, args.iterations, args.pairs, args.workers,
+                 settings={'nodes': args.nodes, 'difficulty': args.depth},
+                 a=args.a, seed=args.seed, max_plies=args.max_plies)
+    print(f"Done in {time.perf_counter() - start:.2f}s: "
+          + ', '.join(f"{name}={round(value)}" for name, value in sorted(theta.items())))
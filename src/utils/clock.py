@@ -0,0 +1,77 @@
+# Đồng hồ ván cờ: thời gian còn lại của mỗi bên + thời gian cộng thêm mỗi nước (increment, Fischer)
+"""
+Đồng hồ chỉ chạy cho bên đang đi; press(color) khi bên đó đi xong: trừ thời gian đã dùng, cộng
+increment rồi chuyển sang bên kia. Không phụ thuộc pygame để dùng được cho AI, self-play và mạng.
+Qua mạng gửi to_dict() (thời gian còn lại sau khi bấm đồng hồ) kèm mỗi nước; bên nhận sync() để
+thời gian của bên vừa đi đúng theo đồng hồ của chính bên đó (không tính độ trễ đường truyền).
+"""
+import time
+
+DEFAULT_TIME_CONTROL = (600.0, 5.0)  # 10 phút + 5 giây mỗi nước
+
+
+def format_clock(seconds: float) -> str:
+    """'m:ss' (dưới 10 giây thì 's.t')."""
+    seconds = max(seconds, 0.0)
+    if seconds < 10:
+        return f"{seconds:.1f}"
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+class GameClock:
+    def __init__(self, initial: float = DEFAULT_TIME_CONTROL[0], increment: float = DEFAULT_TIME_CONTROL[1],
+                 time_source=time.monotonic):
+        self.initial = initial
+        self.increment = increment
+        self.remaining = {'red': float(initial), 'black': float(initial)}
+        self.running = None  # màu đang chạy đồng hồ
+        self._time_source = time_source
+        self._started = None
+
+    def start(self, color: str = 'red'):
+        self._stop()
+        self.running = color
+        self._started = self._time_source()
+
+    def _stop(self):
+        if self.running is not None:
+            self.remaining[self.running] -= self._time_source() - self._started
+        self.running = None
+
+    def stop(self):
+        self._stop()
+
+    def remaining_for(self, color: str) -> float:
+        """Thời gian còn lại (giây), tính cả thời gian đang chạy; có thể âm nếu đã hết giờ."""
+        remaining = self.remaining[color]
+        if color == self.running:
+            remaining -= self._time_source() - self._started
+        return remaining
+
+    def flagged(self):
+        """Màu đã hết giờ hoặc None."""
+        for color in ('red', 'black'):
+            if self.remaining_for(color) <= 0:
+                return color
+        return None
+
+    def press(self, color: str):
+        """Bên `color` vừa đi xong: chốt thời gian, cộng increment, chạy đồng hồ bên kia."""
+        if self.running == color:
+            self._stop()
+        self.remaining[color] += self.increment
+        self.start('black' if color == 'red' else 'red')
+
+    def to_dict(self) -> dict:
+        return {'red': self.remaining_for('red'), 'black': self.remaining_for('black'),
+                'increment': self.increment}
+
+    def sync(self, data: dict):
+        """Nhận thời gian còn lại từ đối thủ (tin nhắn mạng); đồng hồ đang chạy bắt đầu lại từ lúc nhận."""
+        running = self.running
+        self._stop()
+        self.remaining['red'] = float(data['red'])
+        self.remaining['black'] = float(data['black'])
+        if running is not None:
+            self.start(running)
@@ -2,7 +2,12 @@
 API chuẩn hóa cho sinh nước đi và đánh giá bàn cờ. Chỉ dùng file này cho AI/game logic, tránh dùng các bản cũ như temp.py.
 """
 from board.board import Board
-from evaluation.shi_zhi import ShiZhi
+from evaluation.king_safety import king_safety
+from evaluation.mobility import mobility
+from evaluation.weights import load_weights
+
+# Trọng số đánh giá đã tune (src/res/eval_weights.json), nếu có
+load_weights()
 
 def get_chess_of_color(color: str) -> list:
     if color == 'red':
@@ -40,6 +45,25 @@ def get_valid_moves(board: Board, AI_color: str) -> list:
 
     return valid_moves
 
+def get_captures(board: Board, color: str) -> list:
+    """Các nước ăn quân hợp lệ [(from_pos, to_pos), ...] của `color` (dùng cho quiescence)."""
+    board_map = board.board
+    captures = []
+    for row in range(10):
+        for col in range(9):
+            piece = board_map[row][col]
+            if piece is None or piece.color != color:
+                continue
+            for move in piece.get_valid_moves(board):
+                if board_map[move[0]][move[1]] is None:
+                    continue
+                from_pos = piece.position
+                captured = board.move_piece(from_pos, move, validate=False)
+                if not board.is_in_check(color):
+                    captures.append((from_pos, move))
+                board.undo_move(from_pos, move, captured)
+    return captures
+
 def list1_2list(valid_moves: list) -> list:
     """
     Convert [(piece, [move1, move2, ...]), ...] to [(piece, move1), (piece, move2), ...]
@@ -50,64 +74,53 @@ def list1_2list(valid_moves: list) -> list:
             result.append((piece, move))
     return result
 
-def evaluation_board(board: Board, evaluating_color: str) -> int:
+MATE_SCORE = 99999999
+REPETITION_SCORE = -99999
+# Chặn trên (thực nghiệm, ~99% thế cờ) của |checkKongjian + checkAnquan|: nếu điểm rẻ đã lệch khỏi
+# cửa sổ alpha/beta quá mức này thì thêm mobility cũng không đổi quyết định cắt tỉa.
+LAZY_MARGIN = 2500
+
+def evaluation_board(board: Board, evaluating_color: str,
+                     alpha: float = float('-inf'), beta: float = float('inf'), cache=None) -> int:
     """
-    Evaluate board for given color.
+    Evaluate board for given color, theo từng tầng từ rẻ đến đắt:
+        1. lặp nước, material + vị trí (đọc từ tổng tăng dần của Board)
+        2. mobility (checkKongjian) + an toàn Tướng (checkAnquan) - bỏ qua khi điểm tầng 1 nằm ngoài [alpha - LAZY_MARGIN, beta + LAZY_MARGIN]
+    Chiếu bí / hết nước do search xử lý (search biết thế cờ còn nước đi hay không).
+    alpha/beta theo cùng góc nhìn evaluating_color.
+    cache: evaluation.eval_cache.EvalCache (tùy chọn), chỉ lưu điểm đầy đủ (có mobility).
     """
-    opponent = 'black' if evaluating_color == 'red' else 'red'
-    if board.is_checkmate(evaluating_color):
-        return -99999999
-    if board.is_checkmate(opponent):
-        return 99999999
     if board.is_repeating_state(evaluating_color):
-        return -99999
+        return REPETITION_SCORE
 
-    return (
-        checkShizhi(board, evaluating_color)
-        + checkShizhan(board, evaluating_color)
-        + checkKongjian(board, evaluating_color)
-    )
+    if cache is not None:
+        key = cache.position_key(board)
+        cached = cache.probe(key, evaluating_color)
+        if cached is not None:
+            return cached
 
-def checkShizhi(board: Board, evaluating_color: str) -> int:
-    AI_chess = get_chess_of_color(evaluating_color)
-    piece_value = ShiZhi()
-    value_AI, value_Opp = 0, 0
+    score = checkShizhi(board, evaluating_color) + checkShizhan(board, evaluating_color)
+    if score + LAZY_MARGIN <= alpha or score - LAZY_MARGIN >= beta:
+        return score
 
-    for row in board.board:
-        for piece in row:
-            if piece is None:
-                continue
-            if piece.symbol in AI_chess:
-                value_AI += piece_value.get_value(piece)
-            else:
-                value_Opp += piece_value.get_value(piece)
+    score += checkKongjian(board, evaluating_color) + checkAnquan(board, evaluating_color)
+    if cache is not None:
+        cache.store(key, evaluating_color, score)
+    return score
 
-    return value_AI - value_Opp
+def checkShizhi(board: Board, evaluating_color: str) -> int:
+    """Chênh lệch giá trị quân (子力), đọc từ tổng được Board cập nhật tăng dần."""
+    opponent = 'black' if evaluating_color == 'red' else 'red'
+    return board.material[evaluating_color] - board.material[opponent]
 
 def checkShizhan(board: Board, evaluating_color: str) -> int:
-    score = 0
-    for row in board.board:
-        for piece in row:
-            if piece and piece.color == evaluating_color:
-                r, _ = piece.position
-                if piece.__class__.__name__.lower() in ['ma', 'ju', 'pao']:
-                    if (evaluating_color == 'red' and r < 5) or (evaluating_color == 'black' and r > 4):
-                        score += 5
-    return score
+    """Điểm vị trí (Mã/Xe/Pháo đã sang sông), đọc từ tổng được Board cập nhật tăng dần."""
+    return board.positional[evaluating_color]
 
 def checkKongjian(board: Board, evaluating_color: str) -> int:
-    total_valid_moves_AI = 0
-    total_valid_moves_opp = 0
-    AI_chess = get_chess_of_color(evaluating_color)
-
-    for row in board.board:
-        for piece in row:
-            if piece is None:
-                continue
-            moves = piece.get_valid_moves(board)
-            if piece.symbol in AI_chess:
-                total_valid_moves_AI += len(moves)
-            else:
-                total_valid_moves_opp += len(moves)
+    """Mobility có trọng số theo loại quân, đếm ô đích bằng bảng tra (evaluation.mobility)."""
+    return mobility(board, evaluating_color)
 
-    return (total_valid_moves_AI - total_valid_moves_opp) * 100
+def checkAnquan(board: Board, evaluating_color: str) -> int:
+    """An toàn Tướng (安全): cấu trúc Cửu Cung trước quân tấn công, nhớ theo mẫu (evaluation.king_safety)."""
+    return king_safety(board, evaluating_color)
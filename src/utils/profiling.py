@@ -0,0 +1,188 @@
+# Profiling tùy chọn cho engine và self-play (tắt mặc định, gần như không tốn gì khi tắt)
+"""
+Bật bằng biến môi trường trước khi chạy (hoặc --profile của selfplay.py / spsa.py, hoặc enable()):
+    XIANGQI_PROFILE=out/prof            tiền tố file kết quả
+    XIANGQI_PROFILE_MODE=sampling       'sampling' (mặc định) hoặc 'deterministic' (cProfile)
+    XIANGQI_PROFILE_INTERVAL=0.001      chu kỳ lấy mẫu (giây, CPU time)
+Các hàm được bọc bằng @profiled (engine.engine, selfplay.play_game) được đo khi bật; lời gọi lồng
+nhau chỉ đo ở lớp ngoài cùng. Kết quả cộng dồn trong process và được ghi lại sau mỗi lời gọi:
+    <tiền tố>.<pid>.folded        collapsed stack ("a;b;c số_mẫu"), dùng cho flamegraph.pl / speedscope
+    <tiền tố>.<pid>.buckets.json  thời gian theo nhóm: movegen, check, eval, search, other
+    <tiền tố>.<pid>.prof          (chế độ deterministic) file pstats
+Mỗi mẫu / hàm được xếp nhóm theo frame gần nhất (từ trong ra ngoài) khớp với BUCKET_RULES; các hàm
+phụ trợ dùng chung (board/attack_tables.py...) không có luật nên tính cho hàm gọi nó.
+Khi tắt, @profiled chỉ thêm một lời gọi hàm và một phép so sánh cho mỗi nước đi (không phải mỗi nút).
+Chế độ sampling dùng signal.setitimer(ITIMER_PROF) nên chỉ chạy trên Unix, ở main thread;
+nơi khác tự chuyển sang deterministic.
+"""
+import cProfile
+import functools
+import json
+import os
+import pstats
+import signal
+import threading
+import time
+from collections import Counter
+
+PROFILE_ENV = 'XIANGQI_PROFILE'
+MODE_ENV = 'XIANGQI_PROFILE_MODE'
+INTERVAL_ENV = 'XIANGQI_PROFILE_INTERVAL'
+BUCKETS = ('movegen', 'check', 'eval', 'search', 'other')
+
+# (đuôi đường dẫn file, tên hàm hoặc None = mọi hàm trong file) -> nhóm; luật đầu tiên khớp được dùng
+BUCKET_RULES = (
+    (os.path.join('board', 'board.py'), ('is_in_check', 'is_checkmate', 'attacked_by', 'attack_count'), 'check'),
+    (os.path.join('board', 'board.py'), ('get_legal_moves', 'move_piece', 'undo_move', '_make_move',
+                                         '_unmake_move'), 'movegen'),
+    (os.path.join('utils', 'move_generation.py'), ('get_valid_moves', 'get_captures', 'list1_2list'), 'movegen'),
+    ('pieces' + os.sep, None, 'movegen'),
+    (os.path.join('utils', 'move_generation.py'), ('evaluation_board', 'checkShizhi', 'checkShizhan',
+                                                   'checkKongjian', 'checkAnquan'), 'eval'),
+    ('evaluation' + os.sep, None, 'eval'),
+    ('search' + os.sep, None, 'search'),
+    ('engine.py', ('engine',), 'search'),
+)
+
+_config = None   # (tiền tố, chế độ, chu kỳ) khi bật
+_state = {'active': False, 'stacks': Counter(), 'profile': None, 'cpu_time': 0.0}
+
+
+def enable(output: str, mode: str = 'sampling', interval: float = 0.001):
+    """Bật profiling trong process này và các process con (qua biến môi trường)."""
+    global _config
+    if mode not in ('sampling', 'deterministic'):
+        raise ValueError("profile mode must be 'sampling' or 'deterministic'")
+    os.environ[PROFILE_ENV] = output
+    os.environ[MODE_ENV] = mode
+    os.environ[INTERVAL_ENV] = str(interval)
+    _config = (output, mode, interval)
+
+
+def disable():
+    global _config
+    for name in (PROFILE_ENV, MODE_ENV, INTERVAL_ENV):
+        os.environ.pop(name, None)
+    _config = None
+    _state.update(stacks=Counter(), profile=None, cpu_time=0.0)
+
+
+def _classify(filename: str, funcname: str):
+    for suffix, names, bucket in BUCKET_RULES:
+        if suffix in filename and (names is None or funcname in names):
+            return bucket
+    return None
+
+
+def bucket_of(stack) -> str:
+    """Nhóm của một stack [(file, hàm), ...] (ngoài -> trong)."""
+    for filename, funcname in reversed(stack):
+        bucket = _classify(filename, funcname)
+        if bucket is not None:
+            return bucket
+    return 'other'
+
+
+def _sample(signum, frame):
+    stack = []
+    while frame is not None:
+        stack.append((frame.f_code.co_filename, frame.f_code.co_name))
+        frame = frame.f_back
+    _state['stacks'][tuple(reversed(stack))] += 1
+
+
+def _deterministic_buckets(stats: pstats.Stats) -> dict:
+    """tottime của từng hàm cộng vào nhóm của nó; hàm không có luật tính theo hàm gọi tốn nhiều nhất."""
+    resolved = {}
+
+    def resolve(func, seen=()):
+        if func in resolved:
+            return resolved[func]
+        bucket = _classify(func[0], func[2])
+        if bucket is None:
+            callers = stats.stats[func][4] if func in stats.stats else {}
+            callers = [caller for caller in callers if caller not in seen]
+            if callers:
+                caller = max(callers, key=lambda c: stats.stats[func][4][c][3])
+                bucket = resolve(caller, seen + (func,))
+            else:
+                bucket = 'other'
+        resolved[func] = bucket
+        return bucket
+
+    totals = dict.fromkeys(BUCKETS, 0.0)
+    for func, (_, _, tottime, _, _) in stats.stats.items():
+        totals[resolve(func)] += tottime
+    return totals
+
+
+def _write_results(prefix: str, mode: str):
+    base = f"{prefix}.{os.getpid()}"
+    directory = os.path.dirname(base)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if mode == 'deterministic':
+        stats = pstats.Stats(_state['profile'])
+        stats.dump_stats(base + '.prof')
+        totals = _deterministic_buckets(stats)
+        unit = 'seconds'
+    else:
+        # Timer của hệ điều hành có thể thưa hơn interval, nên chia thời gian CPU đo được theo tỉ lệ mẫu
+        totals = dict.fromkeys(BUCKETS, 0.0)
+        samples = sum(_state['stacks'].values())
+        with open(base + '.folded', 'w', encoding='utf-8') as f:
+            for stack, count in _state['stacks'].most_common():
+                totals[bucket_of(stack)] += _state['cpu_time'] * count / samples
+                names = ';'.join(f"{os.path.basename(filename)}:{funcname}" for filename, funcname in stack)
+                f.write(f"{names} {count}\n")
+        unit = 'CPU seconds (by sample share)'
+    total = sum(totals.values())
+    summary = {'mode': mode, 'unit': unit, 'total': total,
+               'buckets': {name: {'time': value, 'fraction': value / total if total else 0.0}
+                           for name, value in totals.items()}}
+    with open(base + '.buckets.json', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+
+def _run_profiled(func, args, kwargs):
+    prefix, mode, interval = _config
+    if mode == 'sampling' and (not hasattr(signal, 'setitimer')
+                               or threading.current_thread() is not threading.main_thread()):
+        mode = 'deterministic'
+    _state['active'] = True
+    started = time.process_time()
+    try:
+        if mode == 'deterministic':
+            if _state['profile'] is None:
+                _state['profile'] = cProfile.Profile()
+            _state['profile'].enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _state['profile'].disable()
+        previous = signal.signal(signal.SIGPROF, _sample)
+        signal.setitimer(signal.ITIMER_PROF, interval, interval)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, previous)
+    finally:
+        _state['active'] = False
+        _state['cpu_time'] += time.process_time() - started
+        _write_results(prefix, mode)
+
+
+def profiled(func):
+    """Đo `func` khi profiling đang bật; khi tắt chỉ gọi thẳng func."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _config is None or _state['active']:
+            return func(*args, **kwargs)
+        return _run_profiled(func, args, kwargs)
+    return wrapper
+
+
+if os.environ.get(PROFILE_ENV):
+    enable(os.environ[PROFILE_ENV], os.environ.get(MODE_ENV, 'sampling'),
+           float(os.environ.get(INTERVAL_ENV, '0.001')))
@@ -0,0 +1,34 @@
+# Cấu hình chung cho test: cho phép import theo kiểu `from board.board import Board`
+# và chạy pygame không cần màn hình.
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import pytest  # noqa: E402
+
+
+class SteppingTime:
+    """Đồng hồ giả: mỗi lần đọc tiến thêm `step` giây, nên test giới hạn thời gian không phụ thuộc tải máy."""
+
+    def __init__(self, step: float):
+        self.step = step
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        self.now += self.step
+        return self.now
+
+    time = perf_counter
+
+
+@pytest.fixture
+def stepping_time(monkeypatch):
+    """stepping_time(step, module, ...) thay `time` của các module bằng SteppingTime(step)."""
+    def install(step, *modules):
+        fake = SteppingTime(step)
+        for module in modules:
+            monkeypatch.setattr(module, 'time', fake)
+        return fake
+    return install
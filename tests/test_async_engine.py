@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('pygame')
+
+import async_engine
+from async_engine import AsyncEngine, Limits
+from board.fen import START_FEN, board_from_fen
+
+
+def test_analyse_returns_move_without_touching_board():
+    async def run():
+        async with AsyncEngine(workers=1) as xq:
+            board = board_from_fen(START_FEN)
+            result = await xq.analyse(board, Limits(depth=2, multipv=2))
+            return board, result
+
+    board, result = asyncio.run(run())
+    assert board.move_history == []
+    assert result.final and result.depth == 2 and len(result.lines) == 2
+    assert result.move == result.lines[0].move
+    assert result.move[1] in board.get_piece(result.move[0]).get_valid_moves(board)
+
+
+def test_analysis_yields_progress_then_final_result():
+    async def run():
+        async with AsyncEngine(workers=1) as xq:
+            return [update async for update in xq.analysis(START_FEN, Limits(depth=3))]
+
+    updates = asyncio.run(run())
+    assert [update.depth for update in updates if not update.final] == [1, 2, 3]
+    assert updates[-1].final and updates[-1].stats['nodes'] == updates[-1].nodes
+
+
+def test_cancelled_task_stops_search_process():
+    async def run():
+        async with AsyncEngine(workers=1) as xq:
+            task = asyncio.create_task(xq.analyse(START_FEN, Limits(depth=30)))
+            await asyncio.sleep(0.3)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # Chỉ có một worker: lần phân tích sau chạy ngay nghĩa là tìm kiếm cũ đã dừng
+            start = time.perf_counter()
+            await xq.analyse(START_FEN, Limits(depth=1))
+            return time.perf_counter() - start
+
+    assert asyncio.run(run()) < 2.0
+
+
+def test_aclose_shuts_down_default_engine():
+    async def run():
+        result = await async_engine.analyse(START_FEN, Limits(depth=1))
+        default = async_engine._default_engine
+        executor, manager = default._executor, default._manager
+        await async_engine.aclose()
+        return result, default, executor, manager
+
+    result, default, executor, manager = asyncio.run(run())
+    assert result.final and result.move is not None
+    assert async_engine._default_engine is None
+    assert default._executor is None and default._manager is None
+    assert executor._shutdown_thread
+    assert not manager._process.is_alive()
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+pytest.importorskip('pygame')
+np = pytest.importorskip('numpy')
+
+from board.fen import START_FEN, board_from_fen
+from evaluation.batch_eval import batch_terms, encode_boards, evaluate_batch
+from utils.move_generation import checkAnquan, checkKongjian, checkShizhan, checkShizhi
+
+
+def _sample_boards(n_games=4, plies=60):
+    rng = random.Random(21)
+    boards = []
+    for _ in range(n_games):
+        board = board_from_fen(START_FEN)
+        for _ in range(plies):
+            legal = board.get_legal_moves(board.current_player)
+            if not legal:
+                break
+            board.move_piece(*rng.choice(legal))
+            boards.append(board.copy())
+    return boards
+
+
+def test_batch_terms_match_scalar_evaluator():
+    boards = _sample_boards()
+    positions = encode_boards(boards)
+    assert positions.shape == (len(boards), 90) and positions.dtype == np.int8
+    for color in ('red', 'black'):
+        terms = batch_terms(positions, color, chunk=50)
+        for i, board in enumerate(boards):
+            assert terms['material'][i] == checkShizhi(board, color)
+            assert terms['positional'][i] == checkShizhan(board, color)
+            assert terms['mobility'][i] == checkKongjian(board, color)
+            assert terms['king_safety'][i] == checkAnquan(board, color)
+
+
+def test_evaluate_batch_rejects_bad_shape():
+    assert evaluate_batch(np.zeros((0, 90), dtype=np.int8)).shape == (0,)
+    with pytest.raises(ValueError):
+        evaluate_batch(np.zeros((3, 89), dtype=np.int8))
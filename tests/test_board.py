@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+pytest.importorskip('pygame')
+
+from board.attack_tables import attack_squares, count_targets
+from board.fen import START_FEN, board_from_fen
+from records.replay import king_attacked
+
+
+def test_count_targets_matches_get_valid_moves():
+    rng = random.Random(11)
+    board = board_from_fen(START_FEN)
+    for _ in range(60):
+        for row in board.board:
+            for piece in row:
+                if piece is not None:
+                    assert count_targets(board.board, piece) == len(piece.get_valid_moves(board))
+        legal = board.get_legal_moves(board.current_player)
+        if not legal:
+            break
+        board.move_piece(*rng.choice(legal))
+
+
+def _attack_counts_from_scratch(board):
+    counts = {'red': [0] * 90, 'black': [0] * 90}
+    for row in board.board:
+        for piece in row:
+            if piece is not None:
+                for sq in attack_squares(board.board, piece):
+                    counts[piece.color][sq] += 1
+    return counts
+
+
+def test_incremental_attack_maps_match_recompute():
+    rng = random.Random(5)
+    board = board_from_fen(START_FEN)
+    played = []
+    for _ in range(100):
+        legal = board.get_legal_moves(board.current_player)
+        if not legal:
+            break
+        from_pos, to_pos = rng.choice(legal)
+        played.append((from_pos, to_pos, board.move_piece(from_pos, to_pos)))
+        assert board.attack_counts == _attack_counts_from_scratch(board)
+        for color in ('red', 'black'):
+            assert board.is_in_check(color) == king_attacked(board, color)
+    while played:
+        board.undo_move(*played.pop())
+    assert board.attack_counts == _attack_counts_from_scratch(board)
+
+
+def test_attacked_by_counts_defenders_and_pao_screen():
+    board = board_from_fen('4k4/9/9/9/4c4/9/4C4/9/4R4/3K5 w')
+    pao_sq, rook_sq = 6 * 9 + 4, 8 * 9 + 4
+    # Xe bảo vệ Pháo của mình; Pháo chỉ khống chế ô sau ngòi
+    assert board.attacked_by('red', pao_sq)
+    assert board.attack_count('red', 4 * 9 + 4) == 0
+    assert board.attack_count('black', rook_sq) == 1
+    assert board.attack_count('red', 0 * 9 + 4) == 1
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip('pygame')
+
+import engine
+import search.alphabeta
+import search.iterative_deepening
+import search.time_manager
+from board.fen import START_FEN, board_from_fen
+from search.time_manager import MOVE_OVERHEAD, TimeManager, allocate
+from utils.clock import GameClock, format_clock
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_clock_press_adds_increment_and_switches_side():
+    now = FakeTime()
+    clock = GameClock(60, 2, time_source=now)
+    clock.start('red')
+    now.now = 10
+    assert clock.remaining_for('red') == 50
+    clock.press('red')
+    assert clock.remaining['red'] == 52 and clock.running == 'black'
+    now.now = 70
+    assert clock.flagged() == 'black'
+    assert format_clock(125) == '2:05' and format_clock(3.25) == '3.2'
+
+
+def test_clock_sync_takes_remote_times():
+    now = FakeTime()
+    clock = GameClock(60, 0, time_source=now)
+    clock.start('black')
+    now.now = 5
+    clock.sync({'red': 40, 'black': 58})
+    now.now = 6
+    assert clock.remaining_for('red') == 40 and clock.remaining_for('black') == 57
+
+
+def test_allocation_keeps_within_remaining_time():
+    soft, hard = allocate(60, 0, move_number=1)
+    assert 0 < soft <= hard <= (60 - MOVE_OVERHEAD) * 0.25
+    # Ít thời gian hơn thì nghĩ ít hơn; increment cho phép nghĩ lâu hơn
+    assert allocate(10, 0, 1)[0] < soft < allocate(60, 5, 1)[0]
+    assert allocate(0.05, 0, 30) == (0.0, 0.0)
+
+
+def test_unstable_best_move_extends_soft_limit():
+    manager = TimeManager(1.0, 3.0)
+    manager.should_continue(((0, 0), (1, 0)))
+    base = manager.soft_limit()
+    manager.should_continue(((0, 1), (2, 2)))
+    assert manager.soft_limit() > base
+    for _ in range(3):
+        manager.should_continue(((0, 1), (2, 2)))
+    assert manager.soft_limit() < base
+
+
+def test_engine_with_clock_moves_within_hard_limit(stepping_time):
+    # Thời gian tìm kiếm là đồng hồ giả (5 ms mỗi lần đọc), không phụ thuộc tải máy
+    fake = stepping_time(0.005, search.alphabeta, search.iterative_deepening, search.time_manager)
+    board = board_from_fen(START_FEN)
+    clock = GameClock(2.0, 0, time_source=FakeTime())
+    clock.start('red')
+    stats = engine.engine(board, 'red', type='alpha_beta', book=None, tablebase=None, eval_cache=None, clock=clock)
+    assert fake.now < allocate(2.0, 0, 1)[1] + 5 * fake.step
+    assert len(board.move_history) == 1
+    assert stats.iterations
@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+pytest.importorskip('pygame')
+
+from board.fen import START_FEN, board_from_fen
+from evaluation.eval_cache import EvalCache, shared_cache
+from evaluation.king_safety import (
+    ATTACKER_KINDS, HOME_ROWS, KIND_CODES, KING_SAFETY_WEIGHT, PALACE_CELLS, PatternTable, king_safety, pack_key,
+    palace_key,
+)
+from evaluation.piece_square import ADVANCED_BONUS, compute_scores
+from evaluation.shi_zhi import ShiZhi
+from evaluation.weights import apply_weights, current_weights
+from utils.move_generation import LAZY_MARGIN, checkAnquan, checkShizhan, checkShizhi, evaluation_board
+
+
+def test_incremental_scores_match_full_recompute():
+    rng = random.Random(7)
+    board = board_from_fen(START_FEN)
+    start = (dict(board.material), dict(board.positional))
+    played = []
+    for _ in range(80):
+        legal = board.get_legal_moves(board.current_player)
+        if not legal:
+            break
+        from_pos, to_pos = rng.choice(legal)
+        played.append((from_pos, to_pos, board.move_piece(from_pos, to_pos)))
+        assert compute_scores(board) == (board.material, board.positional)
+    while played:
+        board.undo_move(*played.pop())
+    assert (board.material, board.positional) == start
+
+
+def test_bing_across_river_and_advanced_bonus():
+    board = board_from_fen('4k4/9/9/4P4/9/9/9/9/9/4K4 w')
+    assert checkShizhi(board, 'red') == ShiZhi.PIECE_VALUE['bing_1']
+    board = board_from_fen('4k4/9/9/9/9/4P4/9/9/9/4K4 w')
+    assert checkShizhi(board, 'red') == ShiZhi.PIECE_VALUE['bing_0']
+    board = board_from_fen('4k4/9/9/4R4/9/9/9/9/9/4K4 w')
+    assert checkShizhan(board, 'red') == ADVANCED_BONUS
+    assert checkShizhan(board, 'black') == 0
+
+
+def test_lazy_evaluation_matches_full_inside_window():
+    board = board_from_fen(START_FEN)
+    rng = random.Random(3)
+    for _ in range(20):
+        board.move_piece(*rng.choice(board.get_legal_moves(board.current_player)))
+    full = evaluation_board(board, 'red')
+    assert evaluation_board(board, 'red', full - 1, full + 1) == full
+    # Ngoài cửa sổ quá LAZY_MARGIN: trả điểm rẻ, vẫn nằm cùng phía cửa sổ
+    cheap = checkShizhi(board, 'red') + checkShizhan(board, 'red')
+    alpha = cheap + LAZY_MARGIN + 1
+    assert evaluation_board(board, 'red', alpha, alpha + 1) == cheap
+
+
+def test_eval_cache_hits_return_full_score():
+    board = board_from_fen(START_FEN)
+    board.move_piece((7, 1), (7, 4))
+    cache = EvalCache(1 << 8)
+    first = evaluation_board(board, 'black', cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert evaluation_board(board, 'black', cache=cache) == first
+    assert evaluation_board(board, 'red', cache=cache) == evaluation_board(board, 'red')
+    assert (cache.hits, cache.misses) == (1, 2)
+    with pytest.raises(ValueError):
+        EvalCache(1000)
+
+
+def test_king_safety_penalises_bare_palace_under_attack():
+    assert checkAnquan(board_from_fen(START_FEN), 'red') == 0
+    # Tướng Đen không còn Sĩ, Xe Đỏ đã sang nửa sân Đen: thiếu 2 Sĩ * (2 * 1 Xe)
+    board = board_from_fen('4k4/9/9/4R4/9/9/9/9/9/3AKA3 w')
+    assert checkAnquan(board, 'red') == 4 * KING_SAFETY_WEIGHT
+    assert checkAnquan(board, 'black') == -4 * KING_SAFETY_WEIGHT
+
+
+def test_king_safety_pattern_table_reuses_palace_patterns():
+    table = PatternTable(size=64)
+    board = board_from_fen(START_FEN)
+    first = king_safety(board, 'red', table)
+    board.move_piece((9, 0), (8, 0))  # Xe đi ngoài Cửu Cung: mẫu không đổi
+    assert king_safety(board, 'red', table) == first
+    assert table.misses == 1 and table.hits == 3
+
+
+def _scanned_palace_key(board, color):
+    cells = []
+    for row, col in PALACE_CELLS[color]:
+        piece = board.board[row][col]
+        code = KIND_CODES[piece.symbol.lower()] if piece else 0
+        cells.append(code if piece is None or piece.color == color else -code)
+    home = [piece for row in HOME_ROWS[color] for piece in board.board[row] if piece is not None]
+    xiang = sum(1 for piece in home if piece.color == color and piece.symbol in 'Xx')
+    attackers = [sum(1 for piece in home if piece.color != color and piece.symbol.lower() == kind)
+                 for kind in ATTACKER_KINDS]
+    return pack_key(cells, xiang, attackers)
+
+
+def test_palace_key_counts_are_incremental():
+    rng = random.Random(11)
+    board = board_from_fen(START_FEN)
+    played = []
+    for _ in range(80):
+        legal = board.get_legal_moves(board.current_player)
+        if not legal:
+            break
+        from_pos, to_pos = rng.choice(legal)
+        played.append((from_pos, to_pos, board.move_piece(from_pos, to_pos)))
+        for color in ('red', 'black'):
+            assert palace_key(board, color) == _scanned_palace_key(board, color)
+    while played:
+        board.undo_move(*played.pop())
+    assert board.home_counts == board_from_fen(START_FEN).home_counts
+
+
+def test_apply_weights_clears_shared_eval_cache():
+    defaults = current_weights()
+    cache = shared_cache(64)
+    fen = '4k4/9/9/4R4/9/9/9/9/9/4K4 w'
+    evaluation_board(board_from_fen(fen), 'red', cache=cache)
+    try:
+        apply_weights({'piece_value': {'ju': defaults['piece_value']['ju'] + 100}})
+        # Board mới dùng bảng MATERIAL mới; cùng hash nên cache cũ sẽ trả điểm sai nếu không bị xóa
+        board = board_from_fen(fen)
+        assert evaluation_board(board, 'red', cache=cache) == evaluation_board(board, 'red')
+    finally:
+        apply_weights(defaults)
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+pytest.importorskip('pygame')
+
+from board.fen import START_FEN, board_from_fen
+from records.game_record import GameRecord, GameWriter, RESULT_DRAW, RESULT_RED_WIN, pack_move
+from search.opening_book import OpeningBook, build_book
+
+
+def _write_corpus(path):
+    # Đỏ luôn thắng sau Pháo đầu, hòa sau nước Tốt
+    with GameWriter(path) as writer:
+        for _ in range(3):
+            writer.write(GameRecord([pack_move((7, 7), (7, 4)), pack_move((0, 7), (2, 6))], RESULT_RED_WIN))
+        writer.write(GameRecord([pack_move((6, 2), (5, 2))], RESULT_DRAW))
+
+
+def test_build_and_probe_book(tmp_path):
+    corpus, book_path = str(tmp_path / 'games.xqg'), str(tmp_path / 'book.bin')
+    _write_corpus(corpus)
+    assert build_book(corpus, book_path) == 3
+    with OpeningBook(book_path) as book:
+        start = board_from_fen(START_FEN)
+        entries = sorted(book.probe(start.zobrist_key))
+        assert entries == [((6, 2), (5, 2), 1, 1), ((7, 7), (7, 4), 3, 6)]
+        assert book.choose_move(start, random.Random(0)) in [((6, 2), (5, 2)), ((7, 7), (7, 4))]
+        start.move_piece((9, 0), (8, 0))
+        assert book.choose_move(start) is None
+
+
+def test_engine_plays_book_move(tmp_path):
+    import engine
+    corpus, book_path = str(tmp_path / 'games.xqg'), str(tmp_path / 'book.bin')
+    _write_corpus(corpus)
+    build_book(corpus, book_path, workers=2, games_per_task=2)
+    board = board_from_fen(START_FEN)
+    board.move_piece((7, 7), (7, 4))
+    with OpeningBook(book_path) as book:
+        engine.engine(board, 'black', type='alpha_beta', difficulty=1, book=book)
+    assert board.move_history[-1][:2] == ((0, 7), (2, 6))
+
+
+def test_engine_multipv_searches_book_positions(tmp_path):
+    import engine
+    corpus, book_path = str(tmp_path / 'games.xqg'), str(tmp_path / 'book.bin')
+    _write_corpus(corpus)
+    build_book(corpus, book_path)
+    board = board_from_fen(START_FEN)
+    board.move_piece((7, 7), (7, 4))
+    with OpeningBook(book_path) as book:
+        stats = engine.engine(board, 'black', type='alpha_beta', difficulty=1, book=book, tablebase=None,
+                              eval_cache=None, multipv=2)
+    assert len(stats.lines) == 2
+    assert board.move_history[-1][:2] == stats.lines[0].move
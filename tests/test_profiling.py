@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('pygame')
+
+import engine
+from board.fen import START_FEN, board_from_fen
+from utils import profiling
+
+
+def test_bucket_of_uses_innermost_classified_frame():
+    src = os.path.join('src', '')
+    stack = [(src + os.path.join('search', 'alphabeta.py'), 'search'),
+             (src + os.path.join('utils', 'move_generation.py'), 'evaluation_board'),
+             (src + os.path.join('evaluation', 'mobility.py'), 'mobility'),
+             (src + os.path.join('board', 'attack_tables.py'), 'count_targets')]
+    assert profiling.bucket_of(stack) == 'eval'
+    assert profiling.bucket_of(stack[:1] + [(src + os.path.join('board', 'board.py'), 'is_in_check')]) == 'check'
+    assert profiling.bucket_of([('other.py', 'f')]) == 'other'
+
+
+@pytest.mark.parametrize('mode', ['sampling', 'deterministic'])
+def test_profiled_engine_writes_bucket_summary(tmp_path, mode):
+    prefix = str(tmp_path / 'prof')
+    profiling.enable(prefix, mode)
+    try:
+        board = board_from_fen(START_FEN)
+        engine.engine(board, 'red', type='alpha_beta', difficulty=2, book=None, eval_cache=None)
+    finally:
+        profiling.disable()
+    base = f"{prefix}.{os.getpid()}"
+    with open(base + '.buckets.json') as f:
+        summary = json.load(f)
+    assert summary['mode'] == mode and set(summary['buckets']) == set(profiling.BUCKETS)
+    assert os.path.exists(base + ('.folded' if mode == 'sampling' else '.prof'))
+    assert len(board.move_history) == 1
@@ -0,0 +1,156 @@
+import pytest
+
+pytest.importorskip('pygame')
+
+from board.fen import START_FEN, board_from_fen, board_to_fen
+from records.game_record import (
+    FILE_HEADER, GameRecord, GameWriter, RESULT_RED_WIN, iter_games, pack_move, read_game, read_index, unpack_move,
+)
+
+
+def test_pack_move_roundtrip():
+    for from_pos, to_pos in [((0, 0), (9, 8)), ((9, 4), (8, 4)), ((7, 1), (0, 1))]:
+        move = pack_move(from_pos, to_pos)
+        assert move < 1 << 16
+        assert unpack_move(move) == (from_pos, to_pos)
+
+
+def test_fen_roundtrip_start_position():
+    board = board_from_fen(START_FEN)
+    assert board_to_fen(board) == START_FEN
+    assert board.get_piece((9, 4)).__class__.__name__ == 'JiangShuai'
+    assert board.get_piece((7, 1)).symbol == 'P'
+
+
+def test_writer_appends_and_reader_streams(tmp_path):
+    path = str(tmp_path / 'games.xqg')
+    games = [
+        GameRecord([pack_move((7, 1), (7, 4)), pack_move((0, 1), (2, 2))], RESULT_RED_WIN,
+                   'Đỏ', 'Đen', '', 1.5, 2.5)
+        for _ in range(5)
+    ]
+    with GameWriter(path, index_interval=2) as writer:
+        for game in games[:3]:
+            writer.write(game)
+    with GameWriter(path, index_interval=2) as writer:
+        assert writer.game_count == 3
+        for game in games[3:]:
+            writer.write(game)
+
+    assert list(iter_games(path)) == games
+    assert [game_id for game_id, _ in read_index(path)] == [0, 2, 4]
+    assert read_game(path, 3) == games[3]
+    assert len(list(iter_games(path, start=4))) == 1
+
+
+def test_writer_resets_or_rebuilds_stale_index(tmp_path):
+    import os
+    import shutil
+    path = str(tmp_path / 'games.xqg')
+    games = [GameRecord([pack_move((7, 1), (7, col))], RESULT_RED_WIN) for col in range(5)]
+    with GameWriter(path, index_interval=2) as writer:
+        for game in games:
+            writer.write(game)
+
+    # File record mới nhưng index cũ còn sót lại: index bắt đầu lại từ đầu
+    os.remove(path)
+    with GameWriter(path, index_interval=2) as writer:
+        writer.write(games[4])
+    assert read_index(path) == [(0, FILE_HEADER.size)]
+    assert list(iter_games(path)) == [games[4]]
+
+    # File record bị thay bằng file ngắn hơn: offset cuối của index nằm ngoài file -> dựng lại index
+    with GameWriter(path, index_interval=2) as writer:
+        for game in games[:4]:
+            writer.write(game)
+    short = str(tmp_path / 'short.xqg')
+    with GameWriter(short, index_interval=0) as writer:
+        for game in games[:2]:
+            writer.write(game)
+    shutil.copy(short, path)
+    with GameWriter(path, index_interval=2) as writer:
+        assert writer.game_count == 2
+        writer.write(games[2])
+    assert [game_id for game_id, _ in read_index(path)] == [0, 2]
+    assert read_game(path, 2) == games[2]
+
+
+def test_parse_iccs_and_wxf_agree():
+    from records.notation import parse_iccs, parse_wxf
+    board = board_from_fen(START_FEN)
+    assert parse_iccs('h2e2') == ((7, 7), (7, 4))
+    assert parse_wxf(board, 'C2=5') == ((7, 7), (7, 4))
+    assert parse_wxf(board, 'H2+3') == ((9, 7), (7, 6))
+    board.current_player = 'black'
+    assert parse_wxf(board, 'H8+7') == ((0, 7), (2, 6))
+
+
+def test_replay_reports_first_illegal_ply():
+    from records.replay import replay_notation
+    result = replay_notation('1. C2=5 H8+7 2. H2+3 R9=8')
+    assert result.ok and len(result.moves) == 4
+    bad = replay_notation('h2e2 h9g7 h2e3 a0a1')
+    assert not bad.ok and bad.error_ply == 2
+    assert len(bad.moves) == 2
+
+
+def test_fast_replay_matches_board_rules():
+    from records.replay import can_move, replay_moves
+    for seed in range(5):
+        board = _random_game(seed)
+        for row in board.board:
+            for piece in row:
+                if piece is None:
+                    continue
+                valid = set(piece.get_valid_moves(board))
+                for target in [(r, c) for r in range(10) for c in range(9)]:
+                    assert can_move(board.board, piece, target) == (target in valid)
+        moves = [(from_pos, to_pos) for from_pos, to_pos, _, _ in board.move_history]
+        result = replay_moves(moves)
+        assert result.ok and board_to_fen(result.board) == board_to_fen(board)
+        # Nước để Tướng mình bị chiếu bị từ chối như Board.get_legal_moves
+        color = board.current_player
+        legal = set(board.get_legal_moves(color))
+        for piece in [p for row in board.board for p in row if p is not None and p.color == color]:
+            for to_pos in piece.get_valid_moves(board):
+                assert replay_moves(moves + [(piece.position, to_pos)]).ok == ((piece.position, to_pos) in legal)
+
+
+def _random_game(seed, plies=40):
+    import random
+    rng = random.Random(seed)
+    board = board_from_fen(START_FEN)
+    for _ in range(plies):
+        moves = board.get_legal_moves(board.current_player)
+        if not moves:
+            break
+        board.move_piece(*rng.choice(moves))
+    return board
+
+
+def test_incremental_hash_matches_recomputed():
+    from board.zobrist import compute_hash
+    board = _random_game(7)
+    assert board.zobrist_key == compute_hash(board)
+    while board.move_history:
+        from_pos, to_pos, _, captured = board.move_history[-1]
+        board.undo_move(from_pos, to_pos, captured)
+        assert board.zobrist_key == compute_hash(board)
+    assert board.zobrist_key == board_from_fen(START_FEN).zobrist_key
+
+
+def test_position_index_finds_games(tmp_path):
+    from records.position_index import PositionIndex, build_position_index
+    corpus = str(tmp_path / 'games.xqg')
+    boards = [_random_game(seed, plies=12) for seed in range(6)]
+    with GameWriter(corpus) as writer:
+        for board in boards:
+            writer.write(GameRecord.from_board(board))
+
+    index_path = str(tmp_path / 'positions.idx')
+    count = build_position_index(corpus, index_path, chunk_entries=20)
+    assert count == sum(len(board.move_history) + 1 for board in boards)
+    with PositionIndex(index_path) as index:
+        assert index.games_reaching(board_from_fen(START_FEN)) == list(range(6))
+        assert (3, len(boards[3].move_history)) in index.lookup(boards[3].zobrist_key)
+        assert index.lookup(12345) == []
@@ -0,0 +1,161 @@
+import json
+import random
+
+import pytest
+
+pytest.importorskip('pygame')
+
+import engine
+import search.alphabeta
+import search.iterative_deepening
+from board.fen import START_FEN, board_from_fen
+from search.alphabeta import AlphaBeta
+from search.iterative_deepening import iterative_deepening_search
+from search.multipv import multipv_search
+from search.see import order_moves, see
+from search.stats import SearchStats
+from utils.move_generation import MATE_SCORE, get_valid_moves
+
+
+def test_depth_one_finds_mate_at_leaf():
+    board = board_from_fen('4k4/R8/9/9/9/9/9/9/8R/3K5 w')
+    best_piece, best_move, score = AlphaBeta().search(board, 1, True, float('-inf'), float('inf'))
+    assert (best_piece, best_move) == ((8, 8), (0, 8))
+    assert score == MATE_SCORE
+
+
+def test_side_without_moves_loses():
+    board = board_from_fen('4k3R/R8/9/9/9/9/9/9/9/3K5 b')
+    _, best_move, score = AlphaBeta().search(board, 2, True, float('-inf'), float('inf'))
+    assert best_move is None
+    assert score == -MATE_SCORE
+
+
+def test_see_defended_and_undefended_captures():
+    # Xe ăn Tốt được Mã bảo vệ: mất Xe
+    board = board_from_fen('4k4/9/2n6/4p4/9/9/9/9/4R4/3K5 w')
+    assert see(board, (8, 4), (3, 4)) == 100 - 1000
+    board = board_from_fen('4k4/9/9/4p4/9/9/9/9/4R4/3K5 w')
+    assert see(board, (8, 4), (3, 4)) == 100
+    # Bàn cờ giữ nguyên sau khi tính
+    assert board.get_piece((8, 4)).symbol == 'R' and board.get_piece((3, 4)).symbol == 'b'
+
+
+def test_see_updates_pao_screen_during_exchange():
+    # Pháo đỏ ở (9, 4) dùng Xe làm ngòi; Xe đi ăn thì Pháo mất ngòi, không ăn lại được
+    board = board_from_fen('3k5/9/2n6/4r4/9/9/9/9/4R4/3KC4 w')
+    assert see(board, (8, 4), (3, 4)) == 0
+
+
+def test_order_moves_puts_losing_captures_last():
+    board = board_from_fen('4k4/9/2n6/4p4/9/9/9/9/4R4/3K5 w')
+    moves = [(piece, move) for piece, moves in get_valid_moves(board, 'red') for move in moves]
+    ordered = order_moves(board, moves)
+    assert ordered[-1][1] == (3, 4)
+    assert len(ordered) == len(moves)
+
+
+def test_quiescence_sees_recapture():
+    # Depth 1 không quiescence tưởng ăn Tốt là lời; quiescence thấy Mã ăn lại Xe
+    board = board_from_fen('4k4/9/2n6/4p4/9/9/9/9/4R4/3K5 w')
+    _, best_move, _ = AlphaBeta(quiescence=True).search(board, 1, True, float('-inf'), float('inf'))
+    assert best_move != (3, 4)
+
+
+def test_search_stats_count_nodes_per_iteration():
+    board = board_from_fen(START_FEN)
+    stats = SearchStats()
+    iterative_deepening_search(board, max_depth=2, time_limit=None, verbose=False, stats=stats)
+    data = json.loads(stats.to_json())
+    assert [it['depth'] for it in data['iterations']] == [1, 2]
+    assert data['nodes'] == sum(it['nodes'] for it in data['iterations'])
+    assert data['iterations'][0]['nodes'] == 1 + 44  # gốc + 44 nước đi đầu tiên
+    assert data['iterations'][1]['ebf'] > 1
+    assert 0 <= data['first_move_cutoff_rate'] <= 1
+
+
+def test_node_budget_is_exact_and_deterministic():
+    results = []
+    for _ in range(2):
+        board = board_from_fen(START_FEN)
+        stats = SearchStats()
+        move = iterative_deepening_search(board, max_depth=4, time_limit=None, max_nodes=700, verbose=False,
+                                          stats=stats)
+        assert stats.total_nodes <= 700
+        results.append((move[:2], stats.total_nodes, [it['nodes'] for it in stats.iterations]))
+    assert results[0] == results[1]
+    assert results[0][1] == 700  # độ sâu 4 không xong trong 700 nút: dừng đúng ở ngân sách
+
+
+def test_tiny_node_budget_still_returns_a_move():
+    board = board_from_fen(START_FEN)
+    move = iterative_deepening_search(board, max_depth=3, time_limit=None, max_nodes=3, verbose=False)
+    assert move is not None and move[1] in board.get_piece(move[0]).get_valid_moves(board)
+
+
+def test_hard_time_limit_stops_mid_iteration(stepping_time):
+    # Mỗi lần đọc đồng hồ (mỗi CLOCK_CHECK_NODES nút) là 10 ms giả
+    fake = stepping_time(0.01, search.alphabeta, search.iterative_deepening)
+    board = board_from_fen(START_FEN)
+    stats = SearchStats()
+    move = iterative_deepening_search(board, max_depth=10, time_limit=None, hard_time_limit=0.2, verbose=False,
+                                      stats=stats)
+    assert move is not None and move[1] is not None
+    assert not stats.iterations[-1]['completed']
+    # Dừng ngay ở lần kiểm tra đầu tiên quá deadline (vài lần đọc đồng hồ ngoài vòng tìm kiếm)
+    assert 0.2 <= fake.now < 0.2 + 5 * fake.step
+
+
+def test_profile_with_node_budget_is_reproducible():
+    # Mức có nhiễu (easy) vẫn lặp lại được khi chỉ dừng theo số nút
+    results = []
+    for seed in range(2):
+        random.seed(seed)  # nhiễu không được phụ thuộc random toàn cục
+        board = board_from_fen(START_FEN)
+        stats = engine.engine(board, 'red', type='alpha_beta', book=None, tablebase=None, eval_cache=None,
+                              profile='easy', nodes='difficulty')
+        assert stats.total_nodes <= engine.DIFFICULTY_NODES[1]
+        results.append((board.move_history[-1][:2], stats.total_nodes))
+    assert results[0] == results[1]
+
+
+def test_root_noise_searches_root_with_full_window():
+    # Điểm các nước gốc là chính xác nên điểm chọn được lệch điểm tốt nhất không quá mức nhiễu
+    board = board_from_fen('4k4/9/2n6/4p4/9/9/9/9/4R4/3K5 w')
+    plain = AlphaBeta().search_root(board.copy(), 2)
+    for seed in range(5):
+        noisy = AlphaBeta(root_noise=10, rng=random.Random(seed)).search_root(board.copy(), 2)
+        assert abs(noisy[2] - plain[2]) <= 10
+    wild = AlphaBeta(root_noise=5000, rng=random.Random(1)).search_root(board.copy(), 2)
+    assert wild[1] in board.get_piece(wild[0]).get_valid_moves(board)
+
+
+def test_multipv_lines_match_exact_root_scores():
+    board = board_from_fen('4k4/9/2n6/4p4/9/9/9/9/4R4/3K5 w')
+    exact = []
+    for piece, move in [(p, m) for p, moves in get_valid_moves(board, 'red') for m in moves]:
+        child = board.copy()
+        child.move_piece(piece.position, move)
+        exact.append(AlphaBeta().search(child, 1, False, float('-inf'), float('inf'))[2])
+    lines = multipv_search(board, multipv=3, max_depth=2)
+    assert [line.score for line in lines] == sorted(exact, reverse=True)[:3]
+    assert [line.rank for line in lines] == [1, 2, 3]
+    assert lines[0].score == AlphaBeta().search_root(board.copy(), 2)[2]
+    # PV là chuỗi nước hợp lệ bắt đầu bằng nước của dòng
+    for line in lines:
+        assert line.pv[0] == line.move and len(line.pv) == 2
+        replay = board.copy()
+        for from_pos, to_pos in line.pv:
+            assert to_pos in replay.get_piece(from_pos).get_valid_moves(replay)
+            replay.move_piece(from_pos, to_pos)
+
+
+def test_multipv_through_engine_and_analyse():
+    board = board_from_fen(START_FEN)
+    lines = engine.analyse(board, multipv=2, depth=2, tablebase=None, eval_cache=None)
+    assert len(lines) == 2 and board.move_history == []
+    assert lines[0].as_dict()['pv'][0] == lines[0].as_dict()['move']
+    stats = engine.engine(board, 'red', type='alpha_beta', difficulty=2, book=None, tablebase=None,
+                          eval_cache=None, multipv=2)
+    assert [line.move for line in stats.lines] == [line.move for line in lines]
+    assert board.move_history[-1][:2] == lines[0].move
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+pytest.importorskip('pygame')
+
+import spsa
+from board.fen import START_FEN, board_from_fen
+from engine import engine
+
+FAST = {'nodes': 200, 'difficulty': 2}
+
+
+def test_apply_params_writes_targets_and_clamps():
+    original = spsa.read_params()
+    try:
+        spsa.apply_params({'lazy_margin': 99999, 'mobility_ma': 131.4})
+        values = spsa.read_params()
+        assert values['lazy_margin'] == 6000
+        assert values['mobility_ma'] == 131
+        assert values['quiescence_depth'] == original['quiescence_depth']
+    finally:
+        spsa.apply_params(original)
+    assert spsa.read_params() == original
+
+
+def test_node_budget_moves_are_reproducible():
+    moves = []
+    for _ in range(2):
+        board = board_from_fen(START_FEN)
+        engine(board, 'red', type='alpha_beta', difficulty=4, book=None, eval_cache=None, nodes=500)
+        moves.append(board.move_history[-1][:2])
+    assert moves[0] == moves[1]
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path):
+    original = spsa.read_params()
+    full = spsa.spsa(str(tmp_path / 'full.json'), 2, pairs=1, settings=FAST, max_plies=12, log=None)
+    resumed_path = str(tmp_path / 'resumed.json')
+    spsa.spsa(resumed_path, 1, pairs=1, settings=FAST, max_plies=12, log=None)
+    resumed = spsa.spsa(resumed_path, 2, pairs=1, settings=FAST, max_plies=12, log=None)
+    assert resumed == full
+    with open(resumed_path, encoding='utf-8') as f:
+        state = json.load(f)
+    assert state['iteration'] == 2 and len(state['history']) == 2
+    # Tham số của process được trả lại như cũ sau khi chơi
+    assert spsa.read_params() == original
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+pytest.importorskip('pygame')
+
+import search.tablebase
+from board.fen import _piece_classes, board_from_fen
+from evaluation.shi_zhi import ShiZhi
+from search.tablebase import Tablebase, TableLayout, canonical_signature, dependencies, generate
+
+
+@pytest.fixture(scope='module')
+def tb_dir(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp('tablebases'))
+    generate(['JRvJ'], directory, log=lambda *_: None)
+    return directory
+
+
+def test_signatures():
+    assert canonical_signature(['S', 'X'], ['R']) == ('JRvJSX', True)
+    assert dependencies('JRvJSX') == ['JRvJ', 'JRvJX', 'JRvJS']
+    layout = TableLayout('JRvJ')
+    positions = [(9, 3), (0, 4), (5, 5)]
+    assert layout.decode(layout.encode(positions, False)) == (positions, False)
+
+
+def test_signature_ignores_tuned_piece_values(monkeypatch):
+    # Tên bảng không được đổi theo trọng số đánh giá (tuner / load_weights)
+    monkeypatch.setitem(ShiZhi.PIECE_VALUE, 'pao', 900)
+    assert canonical_signature(['M'], ['P']) == ('JMvJP', False)
+    assert canonical_signature(['P'], ['M']) == ('JMvJP', True)
+
+
+def test_dtm_overflow_raises_instead_of_clamping(tmp_path, monkeypatch):
+    monkeypatch.setattr(search.tablebase, 'MAX_DTM', 2)
+    with pytest.raises(OverflowError):
+        generate(['JRvJ'], str(tmp_path), log=lambda *_: None)
+
+
+def test_probe_matches_board_rules(tb_dir):
+    tb = Tablebase(tb_dir)
+    # Xe ở (1, 4) khống chế cả hai ô thoát của Tướng Đen ở góc: hết nước đi = thua
+    board = board_from_fen('3k5/4R4/9/9/9/9/9/9/9/3K5 b')
+    assert tb.probe(board) == (-1, 0)
+    # Lật màu: kết quả phải giống hệt
+    assert tb.probe(board_from_fen('3k5/9/9/9/9/9/9/9/4r4/3K5 w')) == (-1, 0)
+
+    rng = random.Random(1)
+    checked = 0
+    while checked < 40:
+        cols = [rng.randrange(3, 6), rng.randrange(3, 6)]
+        rook = (rng.randrange(10), rng.randrange(9))
+        board = board_from_fen('9/9/9/9/9/9/9/9/9/9 w')
+        classes = _piece_classes()
+        squares = [(rng.randrange(7, 10), cols[0]), (rng.randrange(0, 3), cols[1]), rook]
+        if len(set(squares)) < 3:
+            continue
+        for name, color, pos in zip(('JiangShuai', 'JiangShuai', 'Ju'), ('red', 'black', 'red'), squares):
+            board.place_piece(classes[name](color, pos))
+        board.current_player = rng.choice(['red', 'black'])
+        if board.is_in_check('black' if board.current_player == 'red' else 'red'):
+            continue
+        moves = board.get_legal_moves(board.current_player)
+        children = []
+        for from_pos, to_pos in moves:
+            captured = board.move_piece(from_pos, to_pos, validate=False)
+            children.append(tb.probe(board))
+            board.undo_move(from_pos, to_pos, captured)
+        wins = [dtm for outcome, dtm in children if outcome < 0]
+        if not moves:
+            expected = (-1, 0)
+        elif wins:
+            expected = (1, min(wins) + 1)
+        elif all(outcome > 0 for outcome, _ in children):
+            expected = (-1, max(dtm for _, dtm in children) + 1)
+        else:
+            expected = (0, 0)
+        assert tb.probe(board) == expected
+        checked += 1
+
+
+def test_engine_uses_tablebase_at_root(tb_dir):
+    import engine
+    board = board_from_fen('4k4/9/9/9/9/9/9/9/R8/3K5 w')
+    result = Tablebase(tb_dir).probe(board)
+    engine.engine(board, 'red', type='alpha_beta', difficulty=1, book=None, tablebase=Tablebase(tb_dir))
+    assert result[0] == 1
+    assert Tablebase(tb_dir).probe(board) == (-1, result[1] - 1)
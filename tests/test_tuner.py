@@ -0,0 +1,68 @@
+import json
+import random
+
+import pytest
+
+pytest.importorskip('pygame')
+np = pytest.importorskip('numpy')
+
+from board.fen import START_FEN, board_from_fen
+from evaluation import tuner
+from evaluation.batch_eval import encode_boards, evaluate_batch
+from evaluation.weights import apply_weights, current_weights, load_weights
+from records.game_record import RESULT_BLACK_WIN, RESULT_DRAW, RESULT_RED_WIN, GameRecord, GameWriter
+from utils.move_generation import checkShizhi, evaluation_board
+
+
+def _random_games(n_games=20, plies=60, seed=3):
+    rng = random.Random(seed)
+    games, boards = [], []
+    for _ in range(n_games):
+        board = board_from_fen(START_FEN)
+        for _ in range(plies):
+            legal = board.get_legal_moves(board.current_player)
+            if not legal:
+                break
+            captures = [move for move in legal if board.get_piece(move[1]) is not None]
+            board.move_piece(*(rng.choice(captures) if captures and rng.random() < 0.7 else rng.choice(legal)))
+            boards.append(board.copy())
+        balance = checkShizhi(board, 'red')
+        result = RESULT_RED_WIN if balance > 300 else RESULT_BLACK_WIN if balance < -300 else RESULT_DRAW
+        games.append(GameRecord.from_board(board, result))
+    return games, boards
+
+
+def test_features_reproduce_evaluator():
+    _, boards = _random_games(6)
+    positions = encode_boards(boards)
+    features, _ = tuner._features_block(positions, np.zeros(len(positions), dtype=np.float32))
+    w = tuner.weights_to_vector(current_weights())
+    n = len(positions)
+    assert np.array_equal(features[:n] @ w, evaluate_batch(positions, 'red'))
+    assert np.array_equal(features[n:] @ w, evaluate_batch(positions, 'black'))
+
+
+def test_tune_writes_weight_file_and_reuses_features(tmp_path):
+    games, _ = _random_games()
+    corpus = str(tmp_path / 'games.xqg')
+    with GameWriter(corpus) as writer:
+        for game in games:
+            writer.write(game)
+    work_dir = str(tmp_path / 'work')
+    output = str(tmp_path / 'weights.json')
+    defaults = current_weights()
+    try:
+        weights = tuner.tune(corpus, work_dir, output, epochs=20, log=None)
+        with open(output) as f:
+            assert json.load(f) == weights
+        features_mtime = (tmp_path / 'work' / 'features.npy').stat().st_mtime_ns
+        weights = tuner.tune(corpus, work_dir, output, epochs=1, log=None)
+        assert (tmp_path / 'work' / 'features.npy').stat().st_mtime_ns == features_mtime
+
+        assert load_weights(output)
+        assert current_weights()['piece_value']['ju'] == weights['piece_value']['ju']
+        board = board_from_fen(START_FEN)
+        board.move_piece((7, 1), (7, 4))
+        assert evaluation_board(board, 'red') == evaluate_batch(encode_boards([board]), 'red')[0]
+    finally:
+        apply_weights(defaults)